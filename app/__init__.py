@@ -8,14 +8,23 @@ def create_app() -> Flask:
     app.config["SECRET_KEY"] = "dev-secret-key-change-me"
     app.config.setdefault("APP_DEFAULT_LANG", "jp")
 
-    # ---- Register context processor (lang/t/perms/field_perm/current_user) ----
+    # ---- Request-scoped DB connection (released on app context teardown) ----
+    from .db.mysql import init_app as init_db
+    init_db(app)
+
+    # ---- Schema migrations: `flask db migrate`; startup only checks the version ----
+    from .db.migrations import init_app as init_migrations, check_schema
+    init_migrations(app)
     try:
-        from .db.schema import ensure_schema
-        ensure_schema()
-        app.logger.info("Database schema ensured.")
+        check_schema(app)
     except Exception as e:
-        app.logger.exception("Failed to ensure database schema: %s", e)
+        app.logger.exception("Failed to check database schema version: %s", e)
 
+    # ---- Periodic jobs (overdue-inspection sweep...): `flask jobs run` / background thread ----
+    from .jobs import init_app as init_jobs
+    init_jobs(app)
+
+    # ---- Register context processor (lang/t/perms/field_perm/current_user) ----
     try:
         from .context import register_context
         register_context(app)
@@ -44,6 +53,10 @@ def create_app() -> Flask:
                 "lang_url_cn": "/?lang=cn",
             }
 
+    # ---- Content-hashed vehicle image URLs: vehicle_image_url() in templates ----
+    from .vehicle_images import init_app as init_vehicle_images
+    init_vehicle_images(app)
+
     # ---- Blueprints ----
     from .blueprints.auth import bp as auth_bp
     from .blueprints.ui import bp as ui_bp
@@ -57,4 +70,13 @@ def create_app() -> Flask:
     app.register_blueprint(qr_bp)
     app.register_blueprint(admin_bp)
 
+    # ---- Load schema metadata in one query, then build declared repository SQL ----
+    try:
+        from .db import metadata
+        from .db.sql_registry import compile_all
+        metadata.load()
+        compile_all()
+    except Exception as e:
+        app.logger.exception("Failed to load schema metadata / compile SQL registry: %s", e)
+
     return app
@@ -1,11 +1,13 @@
+import csv
+import io
 import json
 
-from flask import render_template, redirect, url_for, request, flash
+from flask import render_template, redirect, url_for, request, session, flash, Response, stream_with_context
 from . import bp
 from ...repositories.field_permission_repo import (
     field_permission_exists,
     list_field_catalog,
-    list_field_permissions_admin,
+    iter_field_permissions_admin,
     refresh_field_catalog,
     upsert_field_permission,
     update_field_permission,
@@ -21,8 +23,8 @@ from ...repositories.audit_setting_repo import (
     update_audit_flags,
     update_table_audit_flag,
 )
-from ...repositories.rental_pricing_repo import list_rental_pricing, upsert_rental_pricing
-from ...repositories.rental_booking_repo import list_rental_bookings
+from ...repositories.rental_pricing_repo import iter_rental_pricing, list_rental_pricing, upsert_rental_pricing
+from ...repositories.rental_booking_repo import iter_rental_bookings, list_rental_bookings
 from ...repositories.rental_discount_repo import (
     list_rental_discount_rules,
     create_rental_discount_rule,
@@ -34,10 +36,6 @@ from ...repositories.rental_service_repo import (
     update_rental_service,
 )
 from ...repositories.master_data_repo import (
-    list_brands,
-    list_models,
-    list_colors,
-    list_enums,
     create_brand,
     update_brand,
     deactivate_brand,
@@ -51,7 +49,9 @@ from ...repositories.master_data_repo import (
     update_enum,
     deactivate_enum,
 )
+from ...repositories import master_data_cache
 from ...security.users import get_current_user
+from ...db.mysql import pool_stats
 from werkzeug.security import generate_password_hash
 
 SYSTEM_FIELDS = {
@@ -129,6 +129,28 @@ def _parse_float(value: str | None, default: float | None = None) -> float | Non
         return default
 
 
+def _csv_response(filename: str, header: list[str], rows):
+    """Streams `rows` (any iterable of sequences) as CSV without materialising them."""
+    def _generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        buf.write("\ufeff")
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            if buf.tell() > 8192:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    return Response(
+        stream_with_context(_generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 @bp.get("/users")
 def user_list():
     if not _require_admin():
@@ -149,13 +171,20 @@ def customer_list():
     customers = list_customers(page=page, per_page=per_page)
     total = count_customers()
     total_pages = max((total + per_page - 1) // per_page, 1)
+    if total.approximate:
+        # 估算的总数只用于展示，翻页以本页是否取满为准
+        total_pages = max(total_pages, page)
+        has_next = len(customers) == per_page
+    else:
+        has_next = page < total_pages
     pagination = {
         "page": page,
         "per_page": per_page,
         "total": total,
+        "approximate": total.approximate,
         "total_pages": total_pages,
         "has_prev": page > 1,
-        "has_next": page < total_pages,
+        "has_next": has_next,
     }
     return render_template(
         "admin/customers.html",
@@ -261,7 +290,7 @@ def field_permissions():
     admin_role_id = _admin_role_id(roles)
     roles = [role for role in roles if role["role_code"] != "admin"]
     field_catalog = list_field_catalog()
-    field_permissions = list_field_permissions_admin()
+    field_permissions = iter_field_permissions_admin()
     selected_role_id = request.args.get("role_id", "").strip()
     catalog_map = _catalog_map(field_catalog)
     table_names = sorted(catalog_map.keys())
@@ -386,10 +415,13 @@ def audit_log():
 
     total_logs = count_audit_logs()
     total_pages = max((total_logs + per_page - 1) // per_page, 1)
-    if page > total_pages:
+    if total_logs.approximate:
+        total_pages = max(total_pages, page)
+    elif page > total_pages:
         page = total_pages
     offset = (page - 1) * per_page
     audit_logs = list_audit_logs(per_page, offset)
+    has_next = len(audit_logs) == per_page if total_logs.approximate else page < total_pages
     for row in audit_logs:
         if row["actor"] == "user":
             row["actor_label"] = row["full_name"] or row["username"] or "-"
@@ -405,9 +437,10 @@ def audit_log():
             "page": page,
             "per_page": per_page,
             "total": total_logs,
+            "approximate": total_logs.approximate,
             "total_pages": total_pages,
             "has_prev": page > 1,
-            "has_next": page < total_pages,
+            "has_next": has_next,
         },
     )
 
@@ -689,13 +722,16 @@ def update_field_permissions():
 def dictionaries():
     if not _require_admin():
         return redirect(url_for("ui.dashboard"))
+    lang = request.args.get("lang") or session.get("lang") or "jp"
+    master_data = master_data_cache.get()
     return render_template(
         "admin/dictionaries.html",
         active_menu="admin_dictionaries",
-        brands=list_brands(),
-        models=list_models(),
-        colors=list_colors(),
-        enums=list_enums(),
+        brands=master_data.rows["brands"],
+        brand_options=master_data.options(lang)["brands"],
+        models=master_data.rows["models"],
+        colors=master_data.rows["colors"],
+        enums=master_data.rows["enums"],
     )
 
 
@@ -769,6 +805,7 @@ def dictionary_actions():
             if enum_id:
                 deactivate_enum(enum_id)
 
+    # 主数据缓存的版本由 master_data_cache 的 on_write 监听在提交后递增
     return redirect(url_for("admin.dictionaries", lang=request.args.get("lang")))
 
 
@@ -797,6 +834,31 @@ def rental_pricing():
     )
 
 
+@bp.get("/rental/pricing/export")
+def rental_pricing_export():
+    if not _require_admin():
+        return redirect(url_for("ui.dashboard"))
+    columns = [
+        "vehicle_id",
+        "vin",
+        "brand_jp",
+        "model_jp",
+        "model_year_ad",
+        "currency",
+        "daily_price",
+        "deposit_amount",
+        "insurance_per_day",
+        "free_km_per_day",
+        "extra_km_price",
+        "cleaning_fee",
+        "late_fee_per_day",
+        "tax_rate",
+        "updated_at",
+    ]
+    rows = ([row.get(c) for c in columns] for row in iter_rental_pricing())
+    return _csv_response("rental_pricing.csv", columns, rows)
+
+
 @bp.post("/rental/pricing")
 def rental_pricing_actions():
     if not _require_admin():
@@ -918,6 +980,13 @@ def rental_pricing_actions():
     return redirect(url_for("admin.rental_pricing", lang=request.args.get("lang")))
 
 
+@bp.get("/db/pool")
+def db_pool_stats():
+    if not _require_admin():
+        return redirect(url_for("ui.dashboard"))
+    return pool_stats()
+
+
 @bp.get("/rental/requests")
 def rental_requests():
     if not _require_admin():
@@ -952,3 +1021,37 @@ def rental_requests():
         active_menu="admin_rental_requests",
         rental_requests=requests,
     )
+
+
+@bp.get("/rental/requests/export")
+def rental_requests_export():
+    if not _require_admin():
+        return redirect(url_for("ui.dashboard"))
+    columns = [
+        "id",
+        "status",
+        "vin",
+        "brand_jp",
+        "model_jp",
+        "customer_no",
+        "display_name",
+        "start_date",
+        "end_date",
+        "pickup_method",
+        "dropoff_method",
+        "store_name",
+        "estimated_total",
+        "created_at",
+    ]
+
+    def _rows():
+        for row in iter_rental_bookings():
+            snapshot = row.get("price_snapshot")
+            try:
+                snapshot_data = json.loads(snapshot) if isinstance(snapshot, str) else (snapshot or {})
+            except (TypeError, ValueError):
+                snapshot_data = {}
+            row["estimated_total"] = snapshot_data.get("estimated_total")
+            yield [row.get(c) for c in columns]
+
+    return _csv_response("rental_requests.csv", columns, _rows())
@@ -1,40 +1,38 @@
 # app/blueprints/portal/routes.py
 import os
 import re
+from functools import partial
 
-from flask import render_template, abort, send_from_directory, redirect, url_for, request, session
+from flask import render_template, abort, redirect, url_for, request, session
 
 from . import bp
-from ...repositories.vehicle_repo import list_vehicles, get_vehicle_i18n, get_status
+from ... import http_cache
+from ...page_cache import MEDIA, PRICING, VEHICLES, cached_page
+from ...db.mysql import fan_out
+from ...repositories.vehicle_repo import list_vehicles, get_vehicle_projection, get_status
 from ...repositories.vehicle_media_repo import list_vehicle_media
 from ...repositories.customer_repo import get_customer_by_identity, update_customer_last_login
 from ...repositories.rental_pricing_repo import get_rental_pricing, list_rental_pricing_for_vehicle_ids
 from ...repositories.rental_service_repo import list_rental_services
 from ...repositories.rental_booking_repo import create_rental_booking, get_booking_by_token
 from ...repositories.rental_delivery_fee_repo import list_delivery_fee_tiers
-from ...repositories.store_repo import list_stores, get_store
+from ...repositories import master_data_cache
+from ...repositories.vehicle_version_repo import get_vehicle_versions
+from ...repositories.store_repo import get_store
 from ...security.customers import get_current_customer, login_customer, logout_customer
 from ...security.users import get_current_user
+from ...vehicle_images import send_vehicle_image
 import secrets
 import json
 import math
 from datetime import datetime
 
 PHOTO_FILE_TYPE = "photo"
-PHOTO_DIR_CATEGORY = "vehicle_photo"
-LEGACY_PHOTO_DIR_CATEGORY = "Vehicle_photo"
 DEFAULT_CUSTOMER_CODE = "123321"
+RENTALS_PER_PAGE = 24
 
 
 
-def _image_base_dir():
-    return os.path.join(os.getcwd(), "db", "image")
-
-
-def _safe_vin(vin: str) -> str:
-    return "".join([c if c.isalnum() or c in ("-", "_") else "_" for c in vin])
-
-
 def _select_cover_filename(rows: list[dict]) -> str | None:
     for row in rows:
         if row.get("is_primary"):
@@ -97,11 +95,13 @@ def _build_public_vehicle_card(vehicle_row: dict, pricing_map: dict) -> dict:
 
 
 @bp.get("/")
+@cached_page()
 def portal_root():
     return render_template("portal/home.html", active_menu="portal")
 
 
 @bp.get("/portal")
+@cached_page()
 def portal_home():
     return render_template("portal/home.html", active_menu="portal")
 
@@ -117,22 +117,37 @@ def portal_management():
 
 
 @bp.get("/portal/repair")
+@cached_page()
 def portal_repair():
     return render_template("portal/repair.html", active_menu="portal")
 
 
 @bp.get("/portal/trade")
+@cached_page()
 def portal_trade():
     return render_template("portal/trade.html", active_menu="portal")
 
 
 @bp.get("/portal/rentals")
+@cached_page(VEHICLES, PRICING, MEDIA)
 def portal_rentals():
-    vehicles, _ = list_vehicles(page=1, per_page=500)
+    keyword = request.args.get("q", "").strip()
+    vehicles, _, cursors = list_vehicles(
+        filters={"brand": keyword},
+        per_page=RENTALS_PER_PAGE,
+        cursor=request.args.get("cursor") or None,
+        with_total=False,
+    )
     vehicle_ids = [row["id"] for row in vehicles]
     pricing_map = list_rental_pricing_for_vehicle_ids(vehicle_ids)
     cards = [_build_public_vehicle_card(row, pricing_map) for row in vehicles]
-    return render_template("portal/rentals.html", active_menu="portal", vehicles=cards)
+    return render_template(
+        "portal/rentals.html",
+        active_menu="portal",
+        vehicles=cards,
+        cursors=cursors,
+        keyword=keyword,
+    )
 
 
 @bp.get("/portal/repair/apply")
@@ -272,30 +287,50 @@ def portal_customer_login_post():
 
 @bp.get("/portal/rentals/<int:vehicle_id>")
 def portal_rental_detail(vehicle_id: int):
-    vehicle = get_vehicle_i18n(vehicle_id)
+    # 服务 / 配送费 / 门店列表没有更新时间，直接把内容算进校验值
+    shared = fan_out(
+        versions=partial(get_vehicle_versions, vehicle_id),
+        rental_services=list_rental_services,
+        delivery_tiers=list_delivery_fee_tiers,
+    )
+    if not shared["versions"]:
+        abort(404)
+    stores = master_data_cache.rows("stores")
+    validator = http_cache.page_validator(
+        shared["versions"], shared["rental_services"], shared["delivery_tiers"], stores
+    )
+    cached = http_cache.not_modified(validator)
+    if cached is not None:
+        return cached
+
+    rows = fan_out(
+        vehicle=partial(get_vehicle_projection, vehicle_id, "detail", cached=False),
+        status=partial(get_status, vehicle_id),
+        pricing=partial(get_rental_pricing, vehicle_id),
+        photo_rows=partial(list_vehicle_media, vehicle_id, PHOTO_FILE_TYPE),
+    )
+    vehicle = rows["vehicle"]
     if not vehicle:
         abort(404)
-    status = get_status(vehicle_id) or {}
-    pricing = get_rental_pricing(vehicle_id)
-    photo_rows = list_vehicle_media(vehicle_id, PHOTO_FILE_TYPE)
+    photo_rows = rows["photo_rows"]
     cover_filename = _select_cover_filename(photo_rows)
     photo_items = _media_items(photo_rows)
-    rental_services = list_rental_services()
-    stores = list_stores()
-    delivery_tiers = list_delivery_fee_tiers()
-    return render_template(
-        "portal/rental_detail.html",
-        active_menu="portal",
-        vehicle=vehicle,
-        status=status,
-        pricing=pricing,
-        cover_filename=cover_filename,
-        vehicle_photos=photo_items,
-        rental_services=rental_services,
-        stores=stores,
-        delivery_tiers=delivery_tiers,
-        submitted=request.args.get("submitted") == "1",
-        error=request.args.get("error"),
+    return http_cache.conditional(
+        render_template(
+            "portal/rental_detail.html",
+            active_menu="portal",
+            vehicle=vehicle,
+            status=rows["status"] or {},
+            pricing=rows["pricing"],
+            cover_filename=cover_filename,
+            vehicle_photos=photo_items,
+            rental_services=shared["rental_services"],
+            stores=stores,
+            delivery_tiers=shared["delivery_tiers"],
+            submitted=request.args.get("submitted") == "1",
+            error=request.args.get("error"),
+        ),
+        validator,
     )
 
 
@@ -321,7 +356,7 @@ def portal_rental_request(vehicle_id: int):
     if not start_date or not end_date:
         return redirect(url_for("portal.portal_rental_detail", vehicle_id=vehicle_id, lang=request.args.get("lang"), error="dates"))
 
-    vehicle = get_vehicle_i18n(vehicle_id) or {}
+    vehicle = get_vehicle_projection(vehicle_id, "pricing") or {}
     pricing = get_rental_pricing(vehicle_id) or {}
     tiers = list_delivery_fee_tiers()
 
@@ -501,60 +536,6 @@ def portal_rental_booking(access_token: str):
     )
 
 
-@bp.post("/portal/rentals/<int:vehicle_id>/apply")
-def portal_rental_request(vehicle_id: int):
-    customer = get_current_customer()
-    if not customer.is_authenticated:
-        next_url = url_for("portal.portal_rental_detail", vehicle_id=vehicle_id, lang=request.args.get("lang"))
-        return redirect(url_for("portal.portal_customer_login", next_url=next_url, lang=request.args.get("lang")))
-    start_date = request.form.get("start_date")
-    end_date = request.form.get("end_date")
-    delivery_lat = request.form.get("delivery_lat")
-    delivery_lng = request.form.get("delivery_lng")
-    delivery_address = request.form.get("delivery_address")
-    service_ids = [int(sid) for sid in request.form.getlist("service_ids") if sid.isdigit()]
-    note = request.form.get("note")
-
-    def _to_float(value: str | None):
-        if not value:
-            return None
-        try:
-            return float(value)
-        except ValueError:
-            return None
-
-    if not start_date or not end_date:
-        return redirect(url_for("portal.portal_rental_detail", vehicle_id=vehicle_id, lang=request.args.get("lang"), error="dates"))
-    create_rental_request(
-        vehicle_id=vehicle_id,
-        customer_id=customer.customer_id,
-        start_date=start_date,
-        end_date=end_date,
-        delivery_lat=_to_float(delivery_lat),
-        delivery_lng=_to_float(delivery_lng),
-        delivery_address=delivery_address,
-        service_ids=service_ids,
-        note=note,
-    )
-    return redirect(url_for("portal.portal_rental_detail", vehicle_id=vehicle_id, lang=request.args.get("lang"), submitted=1))
-
-
 @bp.get("/portal/vehicle/image/<vin>/<category>/<filename>")
 def portal_vehicle_image(vin: str, category: str, filename: str):
-    if category not in {"legal_doc", PHOTO_DIR_CATEGORY, LEGACY_PHOTO_DIR_CATEGORY}:
-        abort(404)
-    safe_vin = _safe_vin(vin)
-    base_dir = _image_base_dir()
-    if category == "legal_doc":
-        dir_path = os.path.join(base_dir, safe_vin, category)
-    else:
-        candidate_dirs = [
-            os.path.join(base_dir, safe_vin, PHOTO_DIR_CATEGORY),
-            os.path.join(base_dir, safe_vin, LEGACY_PHOTO_DIR_CATEGORY),
-        ]
-        dir_path = candidate_dirs[0]
-        for candidate in candidate_dirs:
-            if os.path.exists(os.path.join(candidate, filename)):
-                dir_path = candidate
-                break
-    return send_from_directory(dir_path, filename)
+    return send_vehicle_image(vin, category, filename, public=True)
@@ -1,9 +1,11 @@
 # app/blueprints/qr/routes.py
 from flask import render_template, abort, redirect, url_for, session, request
 from . import bp
+from ... import http_cache
 from ...utils.masking import mask_plate
-from ...repositories.vehicle_repo import get_status
-from ...repositories.qr_repo import get_vehicle_by_qr_slug, get_vehicle_id_by_qr_slug
+from ...repositories.vehicle_repo import get_status, get_vehicle_projection
+from ...repositories.qr_repo import get_vehicle_id_by_qr_slug
+from ...repositories.vehicle_version_repo import get_vehicle_versions
 from ...security.users import get_current_user
 
 @bp.get("/v/<string:qr_slug>")
@@ -19,7 +21,16 @@ def qr_public(qr_slug: str):
 
 @bp.get("/v/<string:qr_slug>/detail")
 def qr_detail(qr_slug: str):
-    vehicle = get_vehicle_by_qr_slug(qr_slug)
+    vehicle_id = get_vehicle_id_by_qr_slug(qr_slug)
+    versions = get_vehicle_versions(vehicle_id) if vehicle_id else None
+    if not versions:
+        abort(404)
+    validator = http_cache.page_validator(versions)
+    cached = http_cache.not_modified(validator)
+    if cached is not None:
+        return cached
+
+    vehicle = get_vehicle_projection(vehicle_id, "detail", cached=False)
     if not vehicle:
         abort(404)
 
@@ -32,10 +43,13 @@ def qr_detail(qr_slug: str):
     except Exception:
         status = None
 
-    return render_template(
-        "qr/public.html",
-        qr_slug=qr_slug,
-        vehicle=vehicle_vm,
-        status=status,
-        scanned_at="now",
+    return http_cache.conditional(
+        render_template(
+            "qr/public.html",
+            qr_slug=qr_slug,
+            vehicle=vehicle_vm,
+            status=status,
+            scanned_at="now",
+        ),
+        validator,
     )
@@ -2,15 +2,20 @@
 import os
 import shutil
 from datetime import date, datetime
+from functools import partial
 
 import yaml
 
-from flask import render_template, redirect, url_for, abort, request, flash, send_from_directory, session
+from flask import render_template, redirect, url_for, abort, request, flash, session
 from . import bp
+from ... import http_cache
+from ...db.mysql import fan_out, transaction
 from ...i18n import Translator
 from ...security.users import get_current_user
 from ...security.permissions import PermissionService
 from ...utils.masking import mask_plate
+from ...utils.thumbnails import create_derivatives, remove_derivatives
+from ...vehicle_images import send_vehicle_image
 from ...repositories.vehicle_repo import (
     list_vehicles,
     get_vehicle,
@@ -22,13 +27,8 @@ from ...repositories.vehicle_repo import (
     delete_vehicles,
     upsert_status,
 )
-from ...repositories.master_data_repo import (
-    list_brands,
-    list_models,
-    list_colors,
-    list_enums,
-)
-from ...repositories.store_repo import list_stores
+from ...repositories import master_data_cache
+from ...repositories.vehicle_version_repo import get_vehicle_versions
 from ...repositories.vehicle_media_repo import (
     list_vehicle_media,
     create_vehicle_media,
@@ -38,7 +38,7 @@ from ...repositories.vehicle_media_repo import (
 )
 from ...repositories.vehicle_log_repo import log_vehicle_action
 from ...repositories.qr_repo import ensure_vehicle_qr, get_vehicle_qr_by_vehicle_id
-from ...repositories.audit_log_repo import create_audit_log
+from ...repositories.audit_log_repo import create_audit_log, create_audit_logs
 from ...repositories.audit_setting_repo import get_audit_config
 
 def _require_login():
@@ -110,6 +110,25 @@ def _audit_changes(
     )
 
 
+def _audit_bulk_delete(table_name: str, vehicle_ids: list[int], message: str):
+    table_audited, audited_fields = get_audit_config(table_name)
+    if not table_audited and not audited_fields:
+        return
+    actor_id = get_current_user().user_id
+    create_audit_logs(
+        [
+            (
+                vehicle_id,
+                "user",
+                actor_id,
+                "delete",
+                {"table": table_name, "pk": {"id": vehicle_id}, "op": "delete", "message": message},
+            )
+            for vehicle_id in vehicle_ids
+        ]
+    )
+
+
 VEHICLE_FIELDS = [
     {"name": "vin", "label_key": "vehicle_edit.fields.vin", "type": "text"},
     {"name": "plate_no", "label_key": "vehicle_edit.fields.plate_no", "type": "text"},
@@ -217,6 +236,10 @@ def _vehicle_image_dirs(vin: str):
     return legal_dir, photo_dir
 
 
+def _upload_names(files):
+    return [os.path.basename(f.filename) for f in files or [] if f and f.filename]
+
+
 def _save_uploads(files, target_dir):
     saved = []
     if not files:
@@ -232,6 +255,17 @@ def _save_uploads(files, target_dir):
     return saved
 
 
+def _move_image_dirs(old_vin, new_vin):
+    old_legal_dir, old_photo_dir = _vehicle_image_dirs(old_vin)
+    legal_dir, photo_dir = _vehicle_image_dirs(new_vin)
+    if os.path.exists(old_legal_dir):
+        os.makedirs(os.path.dirname(legal_dir), exist_ok=True)
+        shutil.move(old_legal_dir, legal_dir)
+    if os.path.exists(old_photo_dir):
+        os.makedirs(os.path.dirname(photo_dir), exist_ok=True)
+        shutil.move(old_photo_dir, photo_dir)
+
+
 def _remove_files(target_dir, filenames):
     for name in filenames:
         if not name:
@@ -239,6 +273,7 @@ def _remove_files(target_dir, filenames):
         file_path = os.path.join(target_dir, os.path.basename(name))
         if os.path.exists(file_path):
             os.remove(file_path)
+    remove_derivatives(target_dir, filenames)
 
 
 def _payload_from_form():
@@ -314,66 +349,16 @@ def _build_year_options():
 
 
 def _load_master_data():
-    brands = list_brands()
-    models = list_models()
-    colors = list_colors()
-    enums = list_enums()
-    stores = list_stores()
-
-    brand_options = [
-        {
-            "value": row["id"],
-            "label": f"{row['name_jp']} / {row['name_cn']}",
-            "is_active": bool(row.get("is_active", 1)),
-        }
-        for row in brands
-    ]
-    brand_map = {row["id"]: row for row in brands}
-    model_options = []
-    for row in models:
-        brand = brand_map.get(row["brand_id"])
-        brand_label = f"{brand['name_jp']} / {brand['name_cn']}" if brand else "-"
-        model_label = f"{row['name_jp']} / {row['name_cn']}"
-        model_options.append(
-            {
-                "value": row["id"],
-                "label": f"{brand_label} - {model_label}",
-                "is_active": bool(row.get("is_active", 1)),
-                "brand_id": row["brand_id"],
-            }
-        )
-
-    color_options = [
-        {
-            "value": row["id"],
-            "label": f"{row['name_jp']} / {row['name_cn']}",
-            "is_active": bool(row.get("is_active", 1)),
-        }
-        for row in colors
-    ]
-    enum_groups = {}
-    for row in enums:
-        enum_groups.setdefault(row["enum_type"], []).append(
-            {
-                "value": row["enum_code"],
-                "label": f"{row['name_jp']} / {row['name_cn']}",
-                "is_active": bool(row.get("is_active", 1)),
-            }
-        )
-
-    store_options = [
-        {"value": row["id"], "label": row["name"], "is_active": True}
-        for row in stores
-    ]
-
+    lang = request.args.get("lang") or session.get("lang") or "jp"
+    options = master_data_cache.options(lang)
     return {
-        "brands": brand_options,
-        "models": model_options,
-        "colors": color_options,
-        "stores": store_options,
-        "engine_layout": enum_groups.get("engine_layout", []),
-        "fuel_type": enum_groups.get("fuel_type", []),
-        "drive_type": enum_groups.get("drive_type", []),
+        "brands": options["brands"],
+        "models": options["models"],
+        "colors": options["colors"],
+        "stores": options["stores"],
+        "engine_layout": options["engine_layout"],
+        "fuel_type": options["fuel_type"],
+        "drive_type": options["drive_type"],
         "status_options": [
             {"value": "available", "label": "available", "is_active": True},
             {"value": "rented", "label": "rented", "is_active": True},
@@ -459,23 +444,7 @@ def _current_yyyymm(current_date: date) -> int:
 def vehicle_image(vin: str, category: str, filename: str):
     if not _require_login():
         return redirect(url_for("auth.login"))
-    if category not in {"legal_doc", PHOTO_DIR_CATEGORY, LEGACY_PHOTO_DIR_CATEGORY}:
-        abort(404)
-    safe_vin = _safe_vin(vin)
-    base_dir = _image_base_dir()
-    if category == "legal_doc":
-        dir_path = os.path.join(base_dir, safe_vin, category)
-    else:
-        candidate_dirs = [
-            os.path.join(base_dir, safe_vin, PHOTO_DIR_CATEGORY),
-            os.path.join(base_dir, safe_vin, LEGACY_PHOTO_DIR_CATEGORY),
-        ]
-        dir_path = candidate_dirs[0]
-        for candidate in candidate_dirs:
-            if os.path.exists(os.path.join(candidate, filename)):
-                dir_path = candidate
-                break
-    return send_from_directory(dir_path, filename)
+    return send_vehicle_image(vin, category, filename, public=False)
 
 
 @bp.get("/dashboard")
@@ -488,16 +457,12 @@ def dashboard():
     inspection_urgent_yyyymm = _current_yyyymm(_add_months(current_date, 1))
     insurance_warn_date = _add_months(current_date, 1)
 
-    from ...repositories.vehicle_repo import (
-        get_status_counts,
-        list_due_inspections,
-        list_due_insurance,
-        set_inactive_for_overdue_inspections,
-    )
+    from ...repositories.vehicle_repo import get_dashboard_stats
 
-    set_inactive_for_overdue_inspections(current_yyyymm)
-    inspection_due_list = list_due_inspections(current_yyyymm, inspection_warn_yyyymm)
-    insurance_due_list = list_due_insurance(current_date, insurance_warn_date)
+    # 车检过期的停用由定时任务 inspection_sweep 处理（app/jobs.py），这里只读
+    stats = get_dashboard_stats(current_yyyymm, inspection_warn_yyyymm, current_date, insurance_warn_date)
+    inspection_due_list = stats["due_inspections"]
+    insurance_due_list = stats["due_insurance"]
 
     lang = request.args.get("lang") or session.get("lang") or "jp"
 
@@ -537,8 +502,8 @@ def dashboard():
             }
         )
 
-    _, total = list_vehicles()
-    status_counts = get_status_counts()
+    total = stats["total"]
+    status_counts = stats["status_counts"]
     available_count = status_counts["available"]
     rented_count = status_counts["rented"]
     maintenance_count = status_counts["maintenance"]
@@ -576,39 +541,27 @@ def vehicle_list():
         action = request.form.get("action")
         ids = [int(v) for v in request.form.getlist("vehicle_ids") if v.isdigit()]
         if action == "delete" and ids:
-            delete_vehicles(ids)
-            for vehicle_id in ids:
-                _audit_changes(
-                    "vehicle",
-                    {"id": vehicle_id},
-                    {},
-                    {},
-                    vehicle_id,
-                    "delete",
-                    "删除 vehicle",
-                )
+            with transaction():
+                # 先写审计再删除：audit_log.vehicle_id 外键在删除时被置 NULL，行本身保留
+                _audit_bulk_delete("vehicle", ids, "删除 vehicle")
+                delete_vehicles(ids)
             flash(_t("vehicle_list.messages.deleted"), "success")
         return redirect(url_for("ui.vehicle_list", lang=request.args.get("lang")))
 
     brand = request.args.get("brand", "").strip()
     status = request.args.get("status", "").strip()
-    try:
-        page = int(request.args.get("page", "1") or 1)
-    except ValueError:
-        page = 1
+    cursor = request.args.get("cursor") or None
     try:
         per_page = int(request.args.get("per_page", "20") or 20)
     except ValueError:
         per_page = 20
     if per_page not in {20, 50}:
         per_page = 20
-    if page < 1:
-        page = 1
 
-    rows, total = list_vehicles(
+    rows, total, cursors = list_vehicles(
         filters={"brand": brand, "status": status},
-        page=page,
         per_page=per_page,
+        cursor=cursor,
     )
     vehicles = []
     for v in rows:
@@ -620,14 +573,19 @@ def vehicle_list():
 
     status_options = [("available", "available"), ("rented", "rented"), ("maintenance", "maintenance")]
     total_pages = max((total + per_page - 1) // per_page, 1)
+    if total.approximate:
+        total_pages = max(total_pages, cursors["page"])
 
     pagination = {
         "total": total,
-        "page": page,
+        "approximate": total.approximate,
+        "page": min(cursors["page"], total_pages),
         "per_page": per_page,
         "total_pages": total_pages,
-        "has_prev": page > 1,
-        "has_next": page < total_pages,
+        "has_prev": cursors["prev"] is not None,
+        "has_next": cursors["next"] is not None,
+        "prev_cursor": cursors["prev"],
+        "next_cursor": cursors["next"],
     }
 
     return render_template(
@@ -644,32 +602,49 @@ def vehicle_detail(vehicle_id: int):
     if not _require_login():
         return redirect(url_for("auth.login"))
 
-    vehicle = get_vehicle_i18n(vehicle_id)
+    versions = get_vehicle_versions(vehicle_id)
+    validator = http_cache.page_validator(versions) if versions else None
+    cached = http_cache.not_modified(validator)
+    if cached is not None:
+        return cached
+
+    def _status_or_none():
+        try:
+            return get_status(vehicle_id)
+        except Exception:
+            return None
+
+    rows = fan_out(
+        vehicle=partial(get_vehicle_i18n, vehicle_id),
+        status=_status_or_none,
+        legal_docs=partial(list_vehicle_media, vehicle_id, "legal_doc"),
+        vehicle_photos=partial(list_vehicle_media, vehicle_id, PHOTO_FILE_TYPE),
+        qr_row=partial(get_vehicle_qr_by_vehicle_id, vehicle_id),
+    )
+    vehicle = rows["vehicle"]
     if not vehicle:
         abort(404)
 
     vehicle_vm = dict(vehicle)
     vehicle_vm["masked_plate_no"] = mask_plate(vehicle.get("plate_no", ""))
 
-    status = None
-    try:
-        status = get_status(vehicle_id)
-    except Exception:
-        status = None
-
-    legal_docs = _media_filenames(list_vehicle_media(vehicle_id, "legal_doc"))
-    vehicle_photos = _media_filenames(list_vehicle_media(vehicle_id, PHOTO_FILE_TYPE))
-    qr_row = get_vehicle_qr_by_vehicle_id(vehicle_id)
-
-    return render_template(
-        "vehicle/detail.html",
-        active_menu="vehicle",
-        vehicle=vehicle_vm,
-        status=status,
-        recent_logs=[],
-        legal_docs=legal_docs,
-        vehicle_photos=vehicle_photos,
-        qr_slug=qr_row["qr_slug"] if qr_row else None,
+    status = rows["status"]
+    legal_docs = _media_filenames(rows["legal_docs"])
+    vehicle_photos = _media_filenames(rows["vehicle_photos"])
+    qr_row = rows["qr_row"]
+
+    return http_cache.conditional(
+        render_template(
+            "vehicle/detail.html",
+            active_menu="vehicle",
+            vehicle=vehicle_vm,
+            status=status,
+            recent_logs=[],
+            legal_docs=legal_docs,
+            vehicle_photos=vehicle_photos,
+            qr_slug=qr_row["qr_slug"] if qr_row else None,
+        ),
+        validator,
     )
 
 @bp.route("/vehicle/<int:vehicle_id>/edit", methods=["GET","POST"])
@@ -696,110 +671,117 @@ def vehicle_edit(vehicle_id: int):
             flash(_t("vehicle_edit.messages.vin_exists"), "warning")
             return redirect(url_for("ui.vehicle_edit", vehicle_id=vehicle_id, lang=request.args.get("lang")))
 
-        legal_dir, photo_dir = _vehicle_image_dirs(vin)
-        if vehicle.get("vin") and vehicle.get("vin") != vin:
-            old_legal_dir, old_photo_dir = _vehicle_image_dirs(vehicle["vin"])
-            if os.path.exists(old_legal_dir):
-                os.makedirs(os.path.dirname(legal_dir), exist_ok=True)
-                shutil.move(old_legal_dir, legal_dir)
-            if os.path.exists(old_photo_dir):
-                os.makedirs(os.path.dirname(photo_dir), exist_ok=True)
-                shutil.move(old_photo_dir, photo_dir)
-            update_vehicle_media_paths(
-                vehicle_id,
-                f"{_safe_vin(vehicle['vin'])}/",
-                f"{_safe_vin(vin)}/",
-            )
-
+        # 事务内只改数据库；搬目录、删文件、存上传都在提交之后做，回滚时磁盘保持原样
+        vin_changed = bool(vehicle.get("vin")) and vehicle.get("vin") != vin
         removed_legal = request.form.get("remove_legal_docs", "").split(",")
         removed_photos = request.form.get("remove_vehicle_photos", "").split(",")
+        legal_files = request.files.getlist("legal_doc_files")
+        photo_files = request.files.getlist("vehicle_photo_files")
+        new_legal = _upload_names(legal_files)
+        new_photos = _upload_names(photo_files)
+
+        with transaction():
+            if vin_changed:
+                update_vehicle_media_paths(
+                    vehicle_id,
+                    f"{_safe_vin(vehicle['vin'])}/",
+                    f"{_safe_vin(vin)}/",
+                )
 
-        _remove_files(legal_dir, removed_legal)
-        _remove_files(photo_dir, removed_photos)
-
-        delete_vehicle_media(
-            vehicle_id,
-            "legal_doc",
-            _media_rel_paths(vin, "legal_doc", removed_legal),
-        )
-        delete_vehicle_media(
-            vehicle_id,
-            PHOTO_FILE_TYPE,
-            _media_rel_paths(vin, PHOTO_DIR_CATEGORY, removed_photos)
-            + _media_rel_paths(vin, LEGACY_PHOTO_DIR_CATEGORY, removed_photos),
-        )
-
-        new_legal = _save_uploads(request.files.getlist("legal_doc_files"), legal_dir)
-        new_photos = _save_uploads(request.files.getlist("vehicle_photo_files"), photo_dir)
+            delete_vehicle_media(
+                vehicle_id,
+                "legal_doc",
+                _media_rel_paths(vin, "legal_doc", removed_legal),
+            )
+            delete_vehicle_media(
+                vehicle_id,
+                PHOTO_FILE_TYPE,
+                _media_rel_paths(vin, PHOTO_DIR_CATEGORY, removed_photos)
+                + _media_rel_paths(vin, LEGACY_PHOTO_DIR_CATEGORY, removed_photos),
+            )
 
-        create_vehicle_media(
-            vehicle_id,
-            "legal_doc",
-            _media_rel_paths(vin, "legal_doc", new_legal),
-            get_current_user().user_id,
-        )
-        create_vehicle_media(
-            vehicle_id,
-            PHOTO_FILE_TYPE,
-            _media_rel_paths(vin, PHOTO_DIR_CATEGORY, new_photos),
-            get_current_user().user_id,
-        )
-        primary_photo = (request.form.get("primary_vehicle_photo") or "").strip()
-        if primary_photo:
-            photo_rows = list_vehicle_media(vehicle_id, PHOTO_FILE_TYPE)
-            primary_row = next(
-                (row for row in photo_rows if os.path.basename(row.get("file_path", "")) == primary_photo),
-                None,
+            create_vehicle_media(
+                vehicle_id,
+                "legal_doc",
+                _media_rel_paths(vin, "legal_doc", new_legal),
+                get_current_user().user_id,
             )
-            if primary_row:
-                set_primary_vehicle_media(vehicle_id, PHOTO_FILE_TYPE, primary_row["file_path"])
-
-        payload["updated_by"] = get_current_user().user_id
-        update_vehicle(vehicle_id, payload)
-        _audit_changes(
-            "vehicle",
-            {"id": vehicle_id},
-            old_vehicle,
-            payload,
-            vehicle_id,
-            "update",
-            "修改 vehicle 字段",
-        )
-        ensure_vehicle_qr(vehicle_id)
-        if payload.get("etc_type") == "none":
-            status_payload["has_etc_card"] = "0"
-        if status_payload:
-            status_payload["updated_by"] = get_current_user().user_id
-            upsert_status(vehicle_id, status_payload)
+            create_vehicle_media(
+                vehicle_id,
+                PHOTO_FILE_TYPE,
+                _media_rel_paths(vin, PHOTO_DIR_CATEGORY, new_photos),
+                get_current_user().user_id,
+            )
+            primary_photo = (request.form.get("primary_vehicle_photo") or "").strip()
+            if primary_photo:
+                photo_rows = list_vehicle_media(vehicle_id, PHOTO_FILE_TYPE)
+                primary_row = next(
+                    (row for row in photo_rows if os.path.basename(row.get("file_path", "")) == primary_photo),
+                    None,
+                )
+                if primary_row:
+                    set_primary_vehicle_media(vehicle_id, PHOTO_FILE_TYPE, primary_row["file_path"])
+
+            payload["updated_by"] = get_current_user().user_id
+            update_vehicle(vehicle_id, payload)
             _audit_changes(
-                "vehicle_status",
-                {"vehicle_id": vehicle_id},
-                old_status,
-                status_payload,
+                "vehicle",
+                {"id": vehicle_id},
+                old_vehicle,
+                payload,
                 vehicle_id,
                 "update",
-                "修改 vehicle_status 字段",
+                "修改 vehicle 字段",
             )
-        log_vehicle_action(
-            vehicle_id,
-            actor=get_current_user().username,
-            action_type="vehicle_update",
-            action_detail={
-                "vin": vin,
-                "removed_legal": [f for f in removed_legal if f],
-                "removed_photos": [f for f in removed_photos if f],
-                "new_legal": new_legal,
-                "new_photos": new_photos,
-            },
-            source_module="vehicle_edit",
-        )
+            ensure_vehicle_qr(vehicle_id)
+            if payload.get("etc_type") == "none":
+                status_payload["has_etc_card"] = "0"
+            if status_payload:
+                status_payload["updated_by"] = get_current_user().user_id
+                upsert_status(vehicle_id, status_payload)
+                _audit_changes(
+                    "vehicle_status",
+                    {"vehicle_id": vehicle_id},
+                    old_status,
+                    status_payload,
+                    vehicle_id,
+                    "update",
+                    "修改 vehicle_status 字段",
+                )
+            log_vehicle_action(
+                vehicle_id,
+                actor=get_current_user().username,
+                action_type="vehicle_update",
+                action_detail={
+                    "vin": vin,
+                    "removed_legal": [f for f in removed_legal if f],
+                    "removed_photos": [f for f in removed_photos if f],
+                    "new_legal": new_legal,
+                    "new_photos": new_photos,
+                },
+                source_module="vehicle_edit",
+            )
+
+        if vin_changed:
+            _move_image_dirs(vehicle["vin"], vin)
+        legal_dir, photo_dir = _vehicle_image_dirs(vin)
+        _remove_files(legal_dir, removed_legal)
+        _remove_files(photo_dir, removed_photos)
+        _save_uploads(legal_files, legal_dir)
+        _save_uploads(photo_files, photo_dir)
+        # 缩略图同样在提交后生成，不在持锁期间做图片处理
+        create_derivatives(photo_dir, new_photos)
         return redirect(url_for("ui.vehicle_detail", vehicle_id=vehicle_id, lang=request.args.get("lang")))
 
-    legal_docs = _media_filenames(list_vehicle_media(vehicle_id, "legal_doc"))
-    photo_rows = list_vehicle_media(vehicle_id, PHOTO_FILE_TYPE)
-    vehicle_photos = _media_items(photo_rows)
+    rows = fan_out(
+        legal_docs=partial(list_vehicle_media, vehicle_id, "legal_doc"),
+        photo_rows=partial(list_vehicle_media, vehicle_id, PHOTO_FILE_TYPE),
+        status=partial(get_status, vehicle_id),
+    )
+    legal_docs = _media_filenames(rows["legal_docs"])
+    vehicle_photos = _media_items(rows["photo_rows"])
     has_primary_photo = any(item["is_primary"] for item in vehicle_photos)
-    status = get_status(vehicle_id) or {}
+    status = rows["status"] or {}
     master_data = _load_master_data()
 
     return render_template(
@@ -845,57 +827,66 @@ def vehicle_new():
             flash(_t("vehicle_edit.messages.vin_exists"), "warning")
             return redirect(url_for("ui.vehicle_new", lang=request.args.get("lang")))
 
-        legal_dir, photo_dir = _vehicle_image_dirs(vin)
-        new_legal = _save_uploads(request.files.getlist("legal_doc_files"), legal_dir)
-        new_photos = _save_uploads(request.files.getlist("vehicle_photo_files"), photo_dir)
-
-        payload["updated_by"] = get_current_user().user_id
-        create_vehicle(payload)
-        created = get_vehicle_by_vin(vin)
-        if created:
-            ensure_vehicle_qr(created["id"])
-            if payload.get("etc_type") == "none":
-                status_payload["has_etc_card"] = "0"
-            if status_payload:
-                status_payload["updated_by"] = get_current_user().user_id
-                upsert_status(created["id"], status_payload)
+        legal_files = request.files.getlist("legal_doc_files")
+        photo_files = request.files.getlist("vehicle_photo_files")
+        new_legal = _upload_names(legal_files)
+        new_photos = _upload_names(photo_files)
+
+        with transaction():
+
+            payload["updated_by"] = get_current_user().user_id
+            create_vehicle(payload)
+            created = get_vehicle_by_vin(vin)
+            if created:
+                ensure_vehicle_qr(created["id"])
+                if payload.get("etc_type") == "none":
+                    status_payload["has_etc_card"] = "0"
+                if status_payload:
+                    status_payload["updated_by"] = get_current_user().user_id
+                    upsert_status(created["id"], status_payload)
+                    _audit_changes(
+                        "vehicle_status",
+                        {"vehicle_id": created["id"]},
+                        {},
+                        status_payload,
+                        created["id"],
+                        "insert",
+                        "新增 vehicle_status",
+                    )
+                create_vehicle_media(
+                    created["id"],
+                    "legal_doc",
+                    _media_rel_paths(vin, "legal_doc", new_legal),
+                    get_current_user().user_id,
+                )
+                create_vehicle_media(
+                    created["id"],
+                    PHOTO_FILE_TYPE,
+                    _media_rel_paths(vin, PHOTO_DIR_CATEGORY, new_photos),
+                    get_current_user().user_id,
+                )
+                log_vehicle_action(
+                    created["id"],
+                    actor=get_current_user().username,
+                    action_type="vehicle_create",
+                    action_detail={"vin": vin, "legal": new_legal, "photos": new_photos},
+                    source_module="vehicle_new",
+                )
                 _audit_changes(
-                    "vehicle_status",
-                    {"vehicle_id": created["id"]},
+                    "vehicle",
+                    {"id": created["id"]},
                     {},
-                    status_payload,
+                    payload,
                     created["id"],
                     "insert",
-                    "新增 vehicle_status",
+                    "新增 vehicle",
                 )
-            create_vehicle_media(
-                created["id"],
-                "legal_doc",
-                _media_rel_paths(vin, "legal_doc", new_legal),
-                get_current_user().user_id,
-            )
-            create_vehicle_media(
-                created["id"],
-                PHOTO_FILE_TYPE,
-                _media_rel_paths(vin, PHOTO_DIR_CATEGORY, new_photos),
-                get_current_user().user_id,
-            )
-            log_vehicle_action(
-                created["id"],
-                actor=get_current_user().username,
-                action_type="vehicle_create",
-                action_detail={"vin": vin, "legal": new_legal, "photos": new_photos},
-                source_module="vehicle_new",
-            )
-            _audit_changes(
-                "vehicle",
-                {"id": created["id"]},
-                {},
-                payload,
-                created["id"],
-                "insert",
-                "新增 vehicle",
-            )
+        # 文件在提交之后才落盘
+        legal_dir, photo_dir = _vehicle_image_dirs(vin)
+        _save_uploads(legal_files, legal_dir)
+        _save_uploads(photo_files, photo_dir)
+        create_derivatives(photo_dir, new_photos)
+        if created:
             return redirect(url_for("ui.vehicle_detail", vehicle_id=created["id"], lang=request.args.get("lang")))
         return redirect(url_for("ui.vehicle_list", lang=request.args.get("lang")))
 
@@ -0,0 +1,38 @@
+# app/db/backends.py
+"""
+Connection backends behind ConnectionPool.
+
+A backend has a `name` and `connect(**cfg)` returning a connection that
+speaks the part of the mysql-connector API the data layer uses:
+cursor(dictionary=, buffered=, prepared=), commit / rollback /
+start_transaction, in_transaction, reset_session, unread_result /
+consume_results and close. Errors are raised as mysql.connector.errors
+classes so repositories handle every backend the same way.
+"""
+import mysql.connector
+
+
+class MySQLBackend:
+    name = "mysql"
+
+    def connect(self, **cfg):
+        return mysql.connector.connect(**cfg)
+
+
+_BACKENDS = {"mysql": MySQLBackend()}
+
+
+def register_backend(backend):
+    _BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(name: str):
+    if name not in _BACKENDS and name == "sqlite":
+        # 本地替身按需加载，生产环境不会导入 sqlite3 适配层
+        from .sqlite_standin import SQLiteBackend
+        register_backend(SQLiteBackend())
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown database backend: {name!r}") from None
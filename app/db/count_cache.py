@@ -0,0 +1,116 @@
+# app/db/count_cache.py
+import time
+import threading
+
+from .mysql import _load_settings, fetch_one, on_write
+
+COUNT_CACHE_DEFAULTS = {
+    # 其他 worker 的写入本进程看不到，TTL 是跨进程陈旧的上限（0 = 不缓存）
+    "count_cache_ttl_s": 30.0,
+    # 无筛选条件的总数改用 information_schema.tables.table_rows 估算
+    "count_estimate": False,
+}
+
+_ESTIMATE_SQL = """
+SELECT table_rows
+FROM information_schema.tables
+WHERE table_schema = DATABASE() AND table_name = %s
+"""
+
+# 关键字筛选的组合不受控，超过上限时整体清空
+MAX_ENTRIES = 1024
+
+_LOCK = threading.Lock()
+_ENTRIES = {}
+_GENERATIONS = {}
+_settings = None
+
+
+class Count(int):
+    """An int total that remembers whether it is an estimate."""
+
+    approximate = False
+
+    def __new__(cls, value, approximate=False):
+        count = super().__new__(cls, value)
+        count.approximate = approximate
+        return count
+
+
+def _get_settings():
+    global _settings
+    if _settings is None:
+        _settings = _load_settings(COUNT_CACHE_DEFAULTS)
+    return _settings
+
+
+def normalize_filters(filters) -> tuple:
+    """Stable cache key for a filter dict: empty values dropped, keys sorted, values stripped."""
+    items = []
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        value = str(value).strip()
+        if value:
+            items.append((key, value))
+    return tuple(sorted(items))
+
+
+def _stamp(tables):
+    return tuple(_GENERATIONS.get(table, 0) for table in tables)
+
+
+def _estimate(table):
+    try:
+        row = fetch_one(_ESTIMATE_SQL, (table,))
+    except Exception:
+        return None
+    value = row.get("table_rows") if row else None
+    return Count(int(value), approximate=True) if value is not None else None
+
+
+def cached_count(name: str, compute, tables, filters=None, estimate_table: str | None = None) -> Count:
+    """
+    Total for `name` under `filters`, cached until a write to any of `tables`
+    commits (or count_cache_ttl_s passes). `compute` runs the exact COUNT.
+    With count_estimate on, unfiltered totals come from the row estimate of
+    `estimate_table` instead, flagged approximate.
+    """
+    settings = _get_settings()
+    tables = tuple(sorted(tables))
+    filter_key = normalize_filters(filters)
+    key = (name, filter_key)
+    ttl = settings["count_cache_ttl_s"]
+
+    with _LOCK:
+        stamp = _stamp(tables)
+        entry = _ENTRIES.get(key)
+    if entry is not None and entry[1] == stamp and entry[2] > time.monotonic():
+        return entry[0]
+
+    total = None
+    if estimate_table and settings["count_estimate"] and not filter_key:
+        total = _estimate(estimate_table)
+    if total is None:
+        total = Count(compute())
+
+    if ttl > 0:
+        with _LOCK:
+            # 计算期间若有写入提交，stamp 已过期，不缓存这个结果
+            if _stamp(tables) == stamp:
+                if len(_ENTRIES) >= MAX_ENTRIES:
+                    _ENTRIES.clear()
+                _ENTRIES[key] = (total, stamp, time.monotonic() + ttl)
+    return total
+
+
+@on_write
+def invalidate_tables(tables):
+    with _LOCK:
+        for table in tables:
+            _GENERATIONS[table] = _GENERATIONS.get(table, 0) + 1
+
+
+def clear():
+    with _LOCK:
+        _ENTRIES.clear()
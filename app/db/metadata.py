@@ -0,0 +1,94 @@
+# app/db/metadata.py
+import threading
+
+from .mysql import fetch_all, primary_reads
+from . import sql_registry
+
+_LOCK = threading.Lock()
+_SCHEMA = None
+_LISTENERS = []
+
+# 一次取回当前库的全部表 / 视图及其列
+_LOAD_SQL = """
+SELECT t.table_name AS table_name,
+       t.table_type AS table_type,
+       c.column_name AS column_name
+FROM information_schema.tables t
+LEFT JOIN information_schema.columns c
+  ON c.table_schema = t.table_schema
+ AND c.table_name = t.table_name
+WHERE t.table_schema = DATABASE()
+ORDER BY t.table_name, c.ordinal_position
+"""
+
+
+class SchemaMetadata:
+    """Snapshot of the current database's tables, views and their columns."""
+
+    __slots__ = ("tables", "views")
+
+    def __init__(self, rows):
+        self.tables = {}
+        self.views = set()
+        for row in rows:
+            name = row["table_name"]
+            columns = self.tables.setdefault(name, [])
+            if row["column_name"] is not None:
+                columns.append(row["column_name"])
+            if row["table_type"] == "VIEW":
+                self.views.add(name)
+
+
+def load() -> SchemaMetadata:
+    """(Re)load the snapshot with one information_schema query, always from the primary."""
+    global _SCHEMA
+    with primary_reads():
+        rows = fetch_all(_LOAD_SQL)
+    schema = SchemaMetadata(rows)
+    with _LOCK:
+        _SCHEMA = schema
+    return schema
+
+
+def _schema() -> SchemaMetadata:
+    schema = _SCHEMA
+    if schema is None:
+        with _LOCK:
+            schema = _SCHEMA
+        if schema is None:
+            schema = load()
+    return schema
+
+
+def has_table(name: str) -> bool:
+    """True for base tables and views."""
+    return name in _schema().tables
+
+
+def is_view(name: str) -> bool:
+    return name in _schema().views
+
+
+def columns(name: str) -> list[str]:
+    """Column names in ordinal order; empty for unknown tables."""
+    return list(_schema().tables.get(name, ()))
+
+
+def on_invalidate(callback):
+    """Register a zero-arg callback run by invalidate() (e.g. to drop derived caches)."""
+    _LISTENERS.append(callback)
+    return callback
+
+
+def invalidate():
+    """
+    Drop the snapshot after DDL (migrations call this); the next lookup
+    reloads it. Compiled registry SQL, which embeds column lists and
+    view names, is dropped with it.
+    """
+    global _SCHEMA
+    with _LOCK:
+        _SCHEMA = None
+    sql_registry.invalidate()
+    for callback in list(_LISTENERS):
+        callback()
@@ -0,0 +1,189 @@
+# app/db/migrations.py
+import logging
+import threading
+import time
+
+import click
+from flask.cli import AppGroup
+from mysql.connector import errorcode
+from mysql.connector.errors import ProgrammingError
+
+from . import metadata
+from .mysql import _load_settings, execute, fetch_one, get_conn, primary_reads
+from .schema import MIGRATIONS
+
+log = logging.getLogger(__name__)
+
+MIGRATE_DEFAULTS = {
+    # 启动时发现版本落后则直接迁移（仅建议开发环境开启）
+    "auto_migrate": False,
+    # 等待其他进程释放迁移锁的秒数
+    "migrate_lock_timeout": 60,
+}
+
+SCHEMA_WATCH_DEFAULTS = {
+    # 每隔多少秒查一次 schema_version 账本；别的进程执行过迁移时，丢弃本进程的表结构快照和已编译 SQL
+    "schema_check_interval_s": 30.0,
+}
+
+_LOCK_NAME = "vehicle_management.schema_migrate"
+
+_WATCH_LOCK = threading.Lock()
+_seen_version = None
+_next_check = 0.0
+_watch_settings = None
+
+_SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT NOT NULL PRIMARY KEY,
+    name VARCHAR(128) NOT NULL,
+    applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version() -> int:
+    """Highest applied version from the ledger; 0 before the first migration."""
+    with primary_reads():
+        try:
+            row = fetch_one("SELECT MAX(version) AS version FROM schema_version")
+        except ProgrammingError as exc:
+            if exc.errno == errorcode.ER_NO_SUCH_TABLE:
+                return 0
+            raise
+    return int(row["version"] or 0) if row else 0
+
+
+def migrate(target: int | None = None) -> list:
+    """
+    Applies pending MIGRATIONS in order up to `target` (default: latest) and
+    records each in schema_version. A MySQL named lock serialises concurrent
+    runs (several workers / a rolling deploy). Returns [(version, name), ...]
+    of the steps applied.
+    """
+    target = latest_version() if target is None else target
+    timeout = int(_load_settings(MIGRATE_DEFAULTS)["migrate_lock_timeout"])
+    # GET_LOCK 属于会话级锁：用单独的连接持有，不受请求连接 reset 影响
+    lock_conn = get_conn()
+    # 即使 RELEASE_LOCK 失败，归还时也要 reset 掉会话上的锁
+    lock_conn.mark_dirty()
+    cur = lock_conn.cursor()
+    try:
+        cur.execute("SELECT GET_LOCK(%s, %s)", (_LOCK_NAME, timeout))
+        (got,) = cur.fetchone()
+        if got != 1:
+            raise RuntimeError(f"Timed out waiting for migration lock {_LOCK_NAME!r}")
+        try:
+            execute(_SCHEMA_VERSION_DDL)
+            applied = []
+            with primary_reads():
+                done = current_version()
+                for version, name, step in MIGRATIONS:
+                    if version <= done or version > target:
+                        continue
+                    log.info("Applying schema migration %s %s", version, name)
+                    step()
+                    execute(
+                        "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                        (version, name),
+                    )
+                    applied.append((version, name))
+            if applied:
+                metadata.invalidate()
+                _remember(current_version())
+            return applied
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+            cur.fetchall()
+    finally:
+        cur.close()
+        lock_conn.close()
+
+
+db_cli = AppGroup("db", help="Database schema migrations.")
+
+
+@db_cli.command("migrate")
+@click.option("--to", "target", type=int, default=None, help="Stop at this version (default: latest).")
+def migrate_command(target):
+    """Apply pending schema migrations."""
+    applied = migrate(target)
+    for version, name in applied:
+        click.echo(f"applied {version} {name}")
+    click.echo(f"schema version: {current_version()} (latest {latest_version()})")
+
+
+@db_cli.command("version")
+def version_command():
+    """Show the applied and latest schema versions."""
+    click.echo(f"schema version: {current_version()} (latest {latest_version()})")
+
+
+def _remember(version: int):
+    global _seen_version, _next_check
+    with _WATCH_LOCK:
+        _seen_version = version
+        _next_check = time.monotonic() + _watch_settings_get()["schema_check_interval_s"]
+
+
+def _watch_settings_get():
+    global _watch_settings
+    if _watch_settings is None:
+        _watch_settings = _load_settings(SCHEMA_WATCH_DEFAULTS)
+    return _watch_settings
+
+
+def refresh_if_migrated() -> bool:
+    """
+    Re-reads the schema_version ledger at most every schema_check_interval_s
+    seconds. When another process has applied migrations since this one last
+    looked, drops the schema snapshot and the compiled registry SQL (which
+    bake in e.g. vehicle_read vs v_vehicle_i18n) so they are rebuilt. Returns
+    True when they were dropped.
+    """
+    global _seen_version, _next_check
+    with _WATCH_LOCK:
+        now = time.monotonic()
+        if now < _next_check:
+            return False
+        _next_check = now + _watch_settings_get()["schema_check_interval_s"]
+    version = current_version()
+    with _WATCH_LOCK:
+        seen, _seen_version = _seen_version, version
+    if seen is None or seen == version:
+        return False
+    log.info("Schema version moved from %s to %s; reloading schema metadata.", seen, version)
+    metadata.invalidate()
+    return True
+
+
+def check_schema(app):
+    """Startup check: one ledger query; migrates only when auto_migrate is on."""
+    version, latest = current_version(), latest_version()
+    _remember(version)
+    if version >= latest:
+        return
+    if _load_settings(MIGRATE_DEFAULTS)["auto_migrate"]:
+        migrate()
+        app.logger.info("Database schema migrated from %s to %s.", version, latest)
+    else:
+        app.logger.warning(
+            "Database schema is at version %s, code expects %s; run `flask db migrate`.",
+            version,
+            latest,
+        )
+
+
+def init_app(app):
+    app.cli.add_command(db_cli)
+
+    @app.before_request
+    def _watch_schema_version():
+        try:
+            refresh_if_migrated()
+        except Exception:
+            log.warning("Could not check the schema version", exc_info=True)
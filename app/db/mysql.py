@@ -1,74 +1,891 @@
 # app/db/mysql.py
 import os
+import re
+import time
+import threading
 import configparser
-import mysql.connector
-from mysql.connector import pooling
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from flask import g, has_app_context, has_request_context, request, session
+from mysql.connector.errors import PoolError
+
+from .backends import get_backend
+from .sql_registry import Query, sql_text
+from . import query_stats
+from .query_stats import timed
 
 _POOL = None
+_REPLICA_POOL = None
+_REPLICA_STICKY_S = 0.0
+_POOL_LOCK = threading.Lock()
+_FAN_OUT_EXECUTOR = None
 
-def _load_db_cfg():
+POOL_DEFAULTS = {
+    "pool_size": 5,
+    "pool_max_overflow": 10,
+    "pool_timeout": 30.0,
+    "request_scoped_conn": True,
+    # always | dirty（仅在会话状态被改动过时 reset）| never
+    "pool_reset_session": "dirty",
+    # 空闲超过该秒数的连接借出前先 ping 一次（0 = 每次都 ping）
+    "pool_ping_after_idle_s": 30.0,
+    # 物理连接的最长寿命，超过后归还时关闭、借出时替换（0 = 不限）
+    "pool_max_lifetime_s": 3600.0,
+}
+
+RESET_POLICIES = ("always", "dirty", "never")
+
+BACKEND_DEFAULTS = {
+    # mysql | sqlite（本地替身，见 app/db/sqlite_standin.py）
+    "backend": "mysql",
+    # sqlite 库文件；:memory: 为进程内共享内存库
+    "sqlite_path": ":memory:",
+}
+
+INSTRUMENT_DEFAULTS = {
+    "slow_query_ms": 200.0,
+    "server_timing": True,
+    "sql_debug_footer": False,
+}
+
+REPLICA_DEFAULTS = {
+    # 写入后的若干秒内（跨重定向）该会话的读仍走主库
+    "replica_sticky_s": 5.0,
+}
+
+_G_CONN = "_db_conn"
+_G_REPLICA_CONN = "_db_replica_conn"
+_G_WROTE = "_db_wrote"
+_SESSION_PRIMARY_UNTIL = "_db_primary_until"
+_local = threading.local()
+_WRITE_LISTENERS = []
+
+# insert_many 每条多行 INSERT 最多携带的行数
+INSERT_CHUNK_SIZE = 500
+
+# fetch_iter 每次 fetchmany 的行数
+FETCH_ITER_CHUNK_SIZE = 500
+
+# fan_out 线程池的最大并发（每个并发任务各占一个预留的池连接）
+FAN_OUT_MAX_WORKERS = 8
+
+# 会改变会话状态、需要在归还时 reset 的语句
+_RE_SESSION_STATE = re.compile(
+    r"^\s*(?:SET\s|USE\s|LOCK\s+TABLES|CREATE\s+TEMPORARY|PREPARE\s)|GET_LOCK\s*\(|@\w+\s*:=",
+    re.I,
+)
+
+# 写语句的目标表（多表 UPDATE / DELETE 只取第一张）
+_RE_WRITE_TABLE = re.compile(
+    r"^\s*(?:INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+IGNORE)?|DELETE\s+FROM)\s+`?(\w+)`?",
+    re.I,
+)
+
+# 借用等待时间直方图的桶上限（毫秒），最后一个桶为 +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def _db_section(name: str = "database"):
     ini_path = os.environ.get("DB_INI_PATH", os.path.join(os.getcwd(), "env.ini"))
     cp = configparser.ConfigParser()
     if not os.path.exists(ini_path):
         raise FileNotFoundError(f"env.ini not found: {ini_path}")
 
     cp.read(ini_path, encoding="utf-8")
-    if "database" not in cp:
-        raise KeyError("Missing [database] section in env.ini")
+    if name not in cp:
+        raise KeyError(f"Missing [{name}] section in env.ini")
+    return cp[name]
+
 
-    db = cp["database"]
+def _load_db_cfg():
+    backend = _load_settings(BACKEND_DEFAULTS)
+    if backend["backend"] != "mysql":
+        return {"backend": backend["backend"], "database": backend["sqlite_path"]}
+    db = _db_section()
     return {
+        "backend": "mysql",
         "host": db.get("host", "").strip(),
         "port": int((db.get("port", "") or "3306").strip()),
         "database": db.get("name", "").strip(),
         "user": db.get("user", "").strip(),
         "password": db.get("password", "").strip(),
         "charset": (db.get("charset", "") or "utf8mb4").strip(),
+        # 请求内复用同一连接时，不能让读语句留下未结束的隐式事务快照
+        "autocommit": True,
     }
 
+
+def _load_replica_cfg():
+    """
+    Optional read replica: env.ini [database_replica] (or DB_REPLICA_HOST /
+    DB_REPLICA_PORT). Keys left out fall back to the primary's [database]
+    values. Returns None when no replica host is configured.
+    """
+    try:
+        replica = _db_section("database_replica")
+    except (FileNotFoundError, KeyError):
+        replica = {}
+    host = os.environ.get("DB_REPLICA_HOST") or (replica.get("host", "") or "").strip()
+    if not host:
+        return None
+    cfg = _load_db_cfg()
+    if cfg["backend"] != "mysql":
+        return None
+    cfg["host"] = host
+    port = os.environ.get("DB_REPLICA_PORT") or (replica.get("port", "") or "").strip()
+    if port:
+        cfg["port"] = int(port)
+    for key, cfg_key in (("name", "database"), ("user", "user"), ("password", "password")):
+        value = (replica.get(key, "") or "").strip()
+        if value:
+            cfg[cfg_key] = value
+    return cfg
+
+
+def _load_settings(defaults: dict) -> dict:
+    """
+    Env vars (DB_<KEY>) win over the same keys in env.ini [database],
+    which win over `defaults`; values are coerced to the default's type.
+    """
+    try:
+        db = _db_section()
+    except (FileNotFoundError, KeyError):
+        db = {}
+    cfg = {}
+    for key, default in defaults.items():
+        raw = os.environ.get(f"DB_{key.upper()}") or (db.get(key, "") or "").strip()
+        if not raw:
+            cfg[key] = default
+        elif isinstance(default, bool):
+            cfg[key] = raw.lower() in {"1", "true", "yes", "on"}
+        else:
+            cfg[key] = type(default)(raw)
+    return cfg
+
+
+def _load_pool_cfg():
+    """
+    Pool settings: DB_POOL_SIZE / DB_POOL_MAX_OVERFLOW / DB_POOL_TIMEOUT /
+    DB_REQUEST_SCOPED_CONN / DB_POOL_RESET_SESSION / DB_POOL_PING_AFTER_IDLE_S /
+    DB_POOL_MAX_LIFETIME_S, see _load_settings for precedence.
+    """
+    cfg = _load_settings(POOL_DEFAULTS)
+    cfg["pool_size"] = max(int(cfg["pool_size"]), 1)
+    cfg["pool_max_overflow"] = max(int(cfg["pool_max_overflow"]), 0)
+    cfg["pool_timeout"] = max(float(cfg["pool_timeout"]), 0.0)
+    cfg["pool_reset_session"] = cfg["pool_reset_session"].strip().lower()
+    if cfg["pool_reset_session"] not in RESET_POLICIES:
+        raise ValueError(
+            f"pool_reset_session must be one of {', '.join(RESET_POLICIES)}: {cfg['pool_reset_session']!r}"
+        )
+    cfg["pool_ping_after_idle_s"] = max(float(cfg["pool_ping_after_idle_s"]), 0.0)
+    cfg["pool_max_lifetime_s"] = max(float(cfg["pool_max_lifetime_s"]), 0.0)
+    return cfg
+
+
+class PooledConnection:
+    """
+    Thin proxy over a raw backend (mysql-connector compatible) connection.
+    close() does not close the socket, it gives the connection back to the pool.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._dirty = False
+
+    def mark_dirty(self):
+        """Session state was changed (SET, temp tables, locks...): reset it on release."""
+        self._dirty = True
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw, self._dirty)
+
+    @property
+    def statement_cache(self) -> dict:
+        """Prepared cursors kept alive on this physical connection, by query name."""
+        if self._raw is None:
+            raise PoolError("Connection already returned to the pool")
+        return self._pool._statement_cache(self._raw)
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise PoolError("Connection already returned to the pool")
+        return getattr(self._raw, name)
+
+
+class ConnectionPool:
+    """
+    Fixed core of `pool_size` connections plus up to `pool_max_overflow`
+    short-lived extras. When everything is in use, borrowers wait up to
+    `pool_timeout` seconds for a connection to come back before PoolError.
+
+    Sessions are reset on release per `pool_reset_session` ("dirty" only
+    resets connections flagged by mark_dirty(); an open transaction is just
+    rolled back). Connections idle longer than `pool_ping_after_idle_s` are
+    pinged before being handed out, and connections older than
+    `pool_max_lifetime_s` are replaced.
+    """
+
+    def __init__(
+        self,
+        pool_size,
+        pool_max_overflow,
+        pool_timeout,
+        request_scoped_conn=True,
+        pool_reset_session="dirty",
+        pool_ping_after_idle_s=30.0,
+        pool_max_lifetime_s=3600.0,
+        backend="mysql",
+        **cfg,
+    ):
+        self.pool_size = pool_size
+        self.max_overflow = pool_max_overflow
+        self.timeout = pool_timeout
+        self.request_scoped = request_scoped_conn
+        self.reset_policy = pool_reset_session
+        self.ping_after_idle = pool_ping_after_idle_s
+        self.max_lifetime = pool_max_lifetime_s
+        self._backend = get_backend(backend)
+        self._cfg = cfg
+        self._cond = threading.Condition()
+        self._idle = []
+        self._total = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._peak_in_use = 0
+        self._borrows = 0
+        self._timeouts = 0
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._statements = {}
+        # id(raw) -> 建立时间（monotonic）；空闲列表里存 (raw, 归还时间)
+        self._born = {}
+        self._resets = 0
+        self._pings = 0
+        self._stale = 0
+        self._recycled = 0
+
+    def _statement_cache(self, raw):
+        return self._statements.setdefault(id(raw), {})
+
+    def _connect(self):
+        raw = self._backend.connect(**self._cfg)
+        self._born[id(raw)] = time.monotonic()
+        return raw
+
+    def _discard(self, raw):
+        self._statements.pop(id(raw), None)
+        self._born.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _expired(self, raw, now):
+        return self.max_lifetime > 0 and now - self._born.get(id(raw), now) > self.max_lifetime
+
+    def _checkout(self, raw, idle_since):
+        """
+        Validates an idle connection before handing it out; returns None when
+        it was discarded (too old, or failed the ping) and needs replacing.
+        """
+        now = time.monotonic()
+        if self._expired(raw, now):
+            self._recycled += 1
+            self._discard(raw)
+            return None
+        if now - idle_since >= self.ping_after_idle:
+            self._pings += 1
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                # 服务端已断开（wait_timeout、重启、网络中断）
+                self._stale += 1
+                self._discard(raw)
+                return None
+        return raw
+
+    def get_connection(self, block: bool = True):
+        """
+        Borrow a connection, waiting up to `pool_timeout` when all are in use.
+        With block=False returns None at once instead of waiting.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        raw = None
+        with self._cond:
+            waiting = False
+            try:
+                while True:
+                    if self._idle:
+                        raw, idle_since = self._idle.pop()
+                        break
+                    if self._total < self.pool_size + self.max_overflow:
+                        self._total += 1
+                        break
+                    if not block:
+                        return None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolError(
+                            f"Connection pool exhausted: {self._in_use} in use, "
+                            f"waited {self.timeout:.1f}s"
+                        )
+                    if not waiting:
+                        waiting = True
+                        self._waiters += 1
+                    self._cond.wait(remaining)
+            finally:
+                if waiting:
+                    self._waiters -= 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._record_wait((time.monotonic() - started) * 1000)
+
+        if raw is not None:
+            # 槽位已计入 _total / _in_use，校验失败时原地换一条新连接
+            raw = self._checkout(raw, idle_since)
+        if raw is None:
+            try:
+                raw = self._connect()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return PooledConnection(self, raw)
+
+    def _record_wait(self, wait_ms):
+        # caller holds self._cond
+        self._borrows += 1
+        self._wait_total_ms += wait_ms
+        self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+        for index, upper in enumerate(WAIT_BUCKETS_MS):
+            if wait_ms <= upper:
+                self._wait_buckets[index] += 1
+                return
+        self._wait_buckets[-1] += 1
+
+    def _release(self, raw, dirty=False):
+        healthy = True
+        try:
+            if getattr(raw, "unread_result", False):
+                raw.consume_results()
+            if self.reset_policy == "always" or (dirty and self.reset_policy == "dirty"):
+                # COM_RESET_CONNECTION 会释放服务端的 prepared statements
+                self._statements.pop(id(raw), None)
+                raw.reset_session()
+                self._resets += 1
+            elif raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            healthy = False
+        if healthy and self._expired(raw, time.monotonic()):
+            healthy = False
+            self._recycled += 1
+        with self._cond:
+            self._in_use -= 1
+            if healthy and len(self._idle) < self.pool_size:
+                self._idle.append((raw, time.monotonic()))
+                raw = None
+            else:
+                self._total -= 1
+            self._cond.notify()
+        if raw is not None:
+            self._discard(raw)
+
+    def stats(self):
+        with self._cond:
+            histogram = {f"le_{upper}ms": count for upper, count in zip(WAIT_BUCKETS_MS, self._wait_buckets)}
+            histogram["le_inf"] = self._wait_buckets[-1]
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "timeout_s": self.timeout,
+                "reset_policy": self.reset_policy,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "total": self._total,
+                "overflow": max(self._total - self.pool_size, 0),
+                "waiters": self._waiters,
+                "peak_in_use": self._peak_in_use,
+                "borrows": self._borrows,
+                "timeouts": self._timeouts,
+                "resets": self._resets,
+                "pings": self._pings,
+                "stale_dropped": self._stale,
+                "recycled": self._recycled,
+                "wait_ms_total": round(self._wait_total_ms, 3),
+                "wait_ms_max": round(self._wait_max_ms, 3),
+                "wait_ms_histogram": histogram,
+            }
+
+
 def init_pool():
     global _POOL
     if _POOL is not None:
         return _POOL
 
-    cfg = _load_db_cfg()
-    # mysql-connector 使用 connection pool
-    _POOL = pooling.MySQLConnectionPool(
-        pool_name="ac_pool",
-        pool_size=5,
-        pool_reset_session=True,
-        **cfg,
-    )
+    with _POOL_LOCK:
+        if _POOL is None:
+            cfg = _load_db_cfg()
+            _POOL = ConnectionPool(**_load_pool_cfg(), **cfg)
     return _POOL
 
+
+def init_replica_pool():
+    """Pool for the read replica, or None when no replica is configured."""
+    global _REPLICA_POOL, _REPLICA_STICKY_S
+    if _REPLICA_POOL is not None:
+        return _REPLICA_POOL or None
+
+    with _POOL_LOCK:
+        if _REPLICA_POOL is None:
+            cfg = _load_replica_cfg()
+            if cfg is None:
+                # 记住“未配置”，避免每次读都重新解析 env.ini
+                _REPLICA_POOL = False
+            else:
+                _REPLICA_STICKY_S = max(float(_load_settings(REPLICA_DEFAULTS)["replica_sticky_s"]), 0.0)
+                _REPLICA_POOL = ConnectionPool(**_load_pool_cfg(), **cfg)
+    return _REPLICA_POOL or None
+
+
+def pool_stats():
+    """
+    Live pool counters; empty dict until the first connection is requested.
+    The replica pool's counters, when one is in use, are nested under "replica".
+    """
+    if _POOL is None:
+        return {}
+    stats = _POOL.stats()
+    if _REPLICA_POOL:
+        stats["replica"] = _REPLICA_POOL.stats()
+    return stats
+
+
 def get_conn():
     pool = init_pool()
     return pool.get_connection()
 
-def fetch_all(sql: str, params=None):
-    conn = get_conn()
+
+def _pinned_conn(pool, key: str):
+    """
+    Inside an app/request context the first DB call pins one pooled connection
+    (per pool) on flask.g; every later call in the same request reuses it
+    until teardown.
+    """
+    conn = g.get(key)
+    if conn is None:
+        conn = pool.get_connection()
+        setattr(g, key, conn)
+    return conn
+
+
+def _mark_write():
+    """
+    Read-your-writes: once a request writes, its remaining reads go to the
+    primary, and so do the session's reads for replica_sticky_s seconds
+    (covers the redirect after a POST).
+    """
+    if not has_app_context():
+        return
+    setattr(g, _G_WROTE, True)
+    if has_request_context() and init_replica_pool() is not None and _REPLICA_STICKY_S:
+        session[_SESSION_PRIMARY_UNTIL] = time.time() + _REPLICA_STICKY_S
+
+
+def on_write(callback):
+    """
+    Register callback(tables) run after writes to `tables` (a set of table
+    names) are committed; writes inside transaction() are reported once the
+    block ends, statements that changed no rows are not reported. Used to
+    invalidate caches derived from those tables.
+    """
+    _WRITE_LISTENERS.append(callback)
+    return callback
+
+
+def _written(sql, rowcount):
+    if rowcount == 0:
+        return
+    match = _RE_WRITE_TABLE.match(sql_text(sql))
+    if match is None:
+        return
+    table = match.group(1).lower()
+    if in_transaction():
+        _local.tx_tables.add(table)
+    else:
+        _notify_write({table})
+
+
+def _notify_write(tables):
+    for callback in list(_WRITE_LISTENERS):
+        callback(tables)
+
+
+@contextmanager
+def primary_reads():
+    """Force fetch_one/fetch_all in this block onto the primary (fresh read before a write)."""
+    previous = getattr(_local, "primary_reads", False)
+    _local.primary_reads = True
     try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(sql, params or ())
-        return cur.fetchall()
+        yield
     finally:
-        conn.close()
+        _local.primary_reads = previous
+
 
-def fetch_one(sql: str, params=None):
-    conn = get_conn()
+def _read_pool():
+    """The replica pool if this read may go there, otherwise None (use the primary)."""
+    routed = getattr(_local, "fan_out_pool", None)
+    if routed is not None:
+        # fan_out 工作线程没有请求上下文，沿用发起请求时的路由结果
+        return routed if routed is not _POOL else None
+    if in_transaction() or getattr(_local, "primary_reads", False):
+        return None
+    replica = init_replica_pool()
+    if replica is None:
+        return None
+    if has_app_context() and g.get(_G_WROTE):
+        return None
+    if has_request_context():
+        # 表单提交等写请求里的“先读后写”必须看到最新数据
+        if request.method not in ("GET", "HEAD"):
+            return None
+        until = session.get(_SESSION_PRIMARY_UNTIL)
+        if until is not None:
+            if until > time.time():
+                return None
+            session.pop(_SESSION_PRIMARY_UNTIL, None)
+    return replica
+
+
+@contextmanager
+def _connection(read: bool = False):
+    tx_conn = getattr(_local, "tx_conn", None)
+    if tx_conn is not None:
+        yield tx_conn
+        return
+    pool = _read_pool() if read else None
+    key = _G_REPLICA_CONN
+    if pool is None:
+        pool = init_pool()
+        key = _G_CONN
+    reserved = getattr(_local, "fan_out_conn", None)
+    if reserved is not None and pool is _local.fan_out_pool:
+        # fan_out 工作线程：用发起方预留给它的连接
+        yield reserved
+        return
+    if has_app_context() and pool.request_scoped:
+        yield _pinned_conn(pool, key)
+        return
+    conn = pool.get_connection()
     try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(sql, params or ())
-        return cur.fetchone()
+        yield conn
     finally:
         conn.close()
 
-def execute(sql: str, params=None):
-    conn = get_conn()
+
+def _fan_out_executor():
+    global _FAN_OUT_EXECUTOR
+    if _FAN_OUT_EXECUTOR is None:
+        with _POOL_LOCK:
+            if _FAN_OUT_EXECUTOR is None:
+                _FAN_OUT_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=FAN_OUT_MAX_WORKERS,
+                    thread_name_prefix="db-fan-out",
+                )
+    return _FAN_OUT_EXECUTOR
+
+
+def _run_fanned(fn, pool, conn, stats):
+    _local.fan_out_pool = pool
+    _local.fan_out_conn = conn
     try:
-        cur = conn.cursor()
-        cur.execute(sql, params or ())
-        conn.commit()
-        return cur.rowcount
+        with query_stats.bind(stats):
+            return fn()
     finally:
+        _local.fan_out_pool = None
+        _local.fan_out_conn = None
         conn.close()
+
+
+def _reserve(pool, count: int) -> list:
+    """Up to `count` connections that `pool` can hand out right now, without waiting."""
+    conns = []
+    try:
+        while len(conns) < count:
+            conn = pool.get_connection(block=False)
+            if conn is None:
+                break
+            conns.append(conn)
+    except Exception:
+        for conn in conns:
+            conn.close()
+        raise
+    return conns
+
+
+def fan_out(**calls) -> dict:
+    """
+    Runs independent read-only repository calls concurrently and returns
+    {name: result}. Each call is a zero-arg callable (use functools.partial
+    for arguments), routed to the same pool (replica / primary) the calling
+    request would use; its queries are counted in the caller's request stats.
+
+    Worker threads only get connections the pool can hand out immediately,
+    reserved up front (at most len(calls) - 1); the remaining calls run on
+    the calling thread and its own connection. A request therefore never
+    waits on the pool for its own fan-out, and with the pool busy the calls
+    simply run one after another.
+
+    The first exception raised by any call is re-raised after all finish.
+    Inside a transaction, or from within another fan_out call, the calls just
+    run one after another on the current thread.
+    """
+    if len(calls) < 2 or in_transaction() or getattr(_local, "fan_out_pool", None) is not None:
+        return {name: fn() for name, fn in calls.items()}
+    pool = _read_pool() or init_pool()
+    conns = _reserve(pool, min(len(calls) - 1, FAN_OUT_MAX_WORKERS))
+    if not conns:
+        return {name: fn() for name, fn in calls.items()}
+    stats = query_stats.current_stats()
+    executor = _fan_out_executor()
+    items = list(calls.items())
+    futures = {
+        name: executor.submit(_run_fanned, fn, pool, conn, stats)
+        for (name, fn), conn in zip(items, conns)
+    }
+    results = {}
+    error = None
+    for name, fn in items[len(conns):]:
+        try:
+            results[name] = fn()
+        except Exception as exc:
+            if error is None:
+                error = exc
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as exc:
+            if error is None:
+                error = exc
+    if error is not None:
+        raise error
+    return {name: results[name] for name in calls}
+
+
+def in_transaction() -> bool:
+    return getattr(_local, "tx_conn", None) is not None
+
+
+@contextmanager
+def transaction():
+    """
+    Unit of work: every fetch_*/execute issued inside the block (repositories
+    included) runs on one connection and is committed once on exit, or rolled
+    back if the block raises. Nested transaction() blocks join the outer one.
+    """
+    if in_transaction():
+        yield _local.tx_conn
+        return
+    _mark_write()
+    _local.tx_tables = set()
+    with _connection() as conn:
+        conn.start_transaction()
+        _local.tx_conn = conn
+        try:
+            try:
+                yield conn
+            except BaseException:
+                _local.tx_conn = None
+                conn.rollback()
+                raise
+            _local.tx_conn = None
+            conn.commit()
+            tables = _local.tx_tables
+        finally:
+            # 回滚或提交失败时写入并未生效，不通知监听者
+            _local.tx_tables = set()
+    if tables:
+        _notify_write(tables)
+
+
+def release_request_conn(exc=None):
+    if not has_app_context():
+        return
+    for key in (_G_CONN, _G_REPLICA_CONN):
+        conn = g.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+
+def init_app(app):
+    app.teardown_appcontext(release_request_conn)
+    # 每个请求的查询数 / DB 耗时 / 最慢语句，写入 Server-Timing 与慢查询日志
+    query_stats.init_app(app, **_load_settings(INSTRUMENT_DEFAULTS))
+
+
+@contextmanager
+def _cursor(conn, sql, params, dictionary=False):
+    """
+    Executes `sql` and yields the cursor. Registered prepared Query objects
+    reuse one server-side prepared statement per physical connection; plain
+    SQL text goes through a throwaway buffered cursor.
+    """
+    if isinstance(sql, Query) and sql.prepared:
+        cache = conn.statement_cache
+        key = (sql.name, dictionary)
+        text = sql.sql
+        cached = cache.get(key)
+        if cached is None or cached[0] != text:
+            cached = (text, conn.cursor(prepared=True, dictionary=dictionary))
+            cache[key] = cached
+        cur = cached[1]
+        try:
+            cur.execute(text, tuple(params or ()))
+        except Exception:
+            cache.pop(key, None)
+            raise
+        yield cur
+        return
+    text = sql_text(sql)
+    if _RE_SESSION_STATE.search(text):
+        conn.mark_dirty()
+    cur = conn.cursor(dictionary=dictionary, buffered=True)
+    try:
+        cur.execute(text, params or ())
+        yield cur
+    finally:
+        cur.close()
+
+
+def fetch_all(sql, params=None):
+    with timed(sql), _connection(read=True) as conn, _cursor(conn, sql, params, dictionary=True) as cur:
+        return cur.fetchall()
+
+
+def fetch_one(sql, params=None):
+    with timed(sql), _connection(read=True) as conn, _cursor(conn, sql, params, dictionary=True) as cur:
+        if isinstance(sql, Query) and sql.prepared:
+            # prepared cursors are not buffered: drain before the connection is reused
+            rows = cur.fetchall()
+            return rows[0] if rows else None
+        return cur.fetchone()
+
+
+def fetch_iter(sql, params=None, chunk_size: int = FETCH_ITER_CHUNK_SIZE):
+    """
+    Generator over a large result set. Uses an unbuffered cursor so the server
+    streams rows and they are pulled in fetchmany(chunk_size) chunks; memory
+    stays flat regardless of table size.
+
+    Always runs on its own pooled connection (the replica when reads may go
+    there; never the request-pinned or transaction connection): a half-read
+    streaming result would block every other statement on that connection
+    until it is drained.
+    """
+    pool = _read_pool() or init_pool()
+    conn = pool.get_connection()
+    cur = None
+    try:
+        cur = conn.cursor(dictionary=True, buffered=False)
+        # 只计首包耗时：后续 fetchmany 与调用方的处理交织在一起
+        with timed(sql):
+            cur.execute(sql_text(sql), params or ())
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+            if cur is not None:
+                cur.close()
+        finally:
+            conn.close()
+
+
+def execute(sql, params=None):
+    _mark_write()
+    with timed(sql), _connection() as conn, _cursor(conn, sql, params) as cur:
+        if not in_transaction():
+            conn.commit()
+        rowcount = cur.rowcount
+    _written(sql, rowcount)
+    return rowcount
+
+
+def execute_insert(sql, params=None):
+    """execute() for a single-row INSERT; returns the new row's AUTO_INCREMENT id."""
+    _mark_write()
+    with timed(sql), _connection() as conn, _cursor(conn, sql, params) as cur:
+        if not in_transaction():
+            conn.commit()
+        rowcount, row_id = cur.rowcount, cur.lastrowid
+    _written(sql, rowcount)
+    return row_id
+
+
+def execute_many(sql: str, seq_params):
+    """
+    Runs one statement for every params tuple over a single cursor/round trip
+    batch (mysql-connector folds INSERT ... VALUES into multi-row inserts).
+    Returns the summed rowcount.
+    """
+    seq_params = [tuple(p) for p in seq_params]
+    if not seq_params:
+        return 0
+    _mark_write()
+    with timed(sql), _connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.executemany(sql, seq_params)
+            if not in_transaction():
+                conn.commit()
+            rowcount = cur.rowcount
+        finally:
+            cur.close()
+    _written(sql, rowcount)
+    return rowcount
+
+
+def insert_many(
+    table: str,
+    columns: list[str],
+    rows,
+    literals: dict | None = None,
+    ignore: bool = False,
+    chunk_size: int = INSERT_CHUNK_SIZE,
+):
+    """
+    INSERT [IGNORE] INTO table (columns..., literal columns...)
+    VALUES (%s, ..., <literal sql>), (...), ...
+
+    `rows` are tuples matching `columns`; `literals` maps extra columns to a
+    fixed SQL expression (e.g. {"created_at": "NOW()"}). Rows are sent in
+    chunks of `chunk_size`, all inside one transaction.
+    """
+    rows = [tuple(r) for r in rows]
+    if not rows:
+        return 0
+    literals = literals or {}
+    insert_columns = ", ".join(list(columns) + list(literals.keys()))
+    row_sql = "(" + ", ".join(["%s"] * len(columns) + list(literals.values())) + ")"
+    verb = "INSERT IGNORE" if ignore else "INSERT"
+    total = 0
+    with transaction():
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            sql = f"{verb} INTO {table} ({insert_columns}) VALUES " + ", ".join([row_sql] * len(chunk))
+            total += execute(sql, tuple(value for row in chunk for value in row))
+    return total
@@ -0,0 +1,167 @@
+# app/db/query_stats.py
+import os
+import re
+import sys
+import time
+import logging
+import threading
+import contextlib
+from contextlib import contextmanager
+
+from flask import g, has_app_context, has_request_context
+
+from .sql_registry import sql_text
+
+slow_log = logging.getLogger("app.db.slow")
+
+# 每个请求保留的最慢语句条数
+SLOWEST_KEEP = 5
+
+_G_STATS = "_db_stats"
+_local = threading.local()
+_settings = {"slow_query_ms": 200.0}
+
+_DB_DIR = os.path.dirname(os.path.abspath(__file__))
+_APP_ROOT = os.path.dirname(os.path.dirname(_DB_DIR))
+_SKIP_FILES = {os.path.abspath(contextlib.__file__)}
+
+_RE_COMMENT = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_RE_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s|\?")
+_RE_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_VALUES_ROWS = re.compile(r"(\(\.\.\.\)|\(\?\))(?:\s*,\s*(\(\.\.\.\)|\(\?\)))+")
+_RE_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql) -> str:
+    """
+    Collapses a statement to its shape: literals and placeholders become ?,
+    IN lists and multi-row VALUES collapse to (...), whitespace is squeezed.
+    """
+    text = _RE_COMMENT.sub(" ", sql_text(sql))
+    text = _RE_STRING.sub("?", text)
+    text = _RE_NUMBER.sub("?", text)
+    text = _RE_PLACEHOLDER.sub("?", text)
+    text = _RE_IN_LIST.sub("(...)", text)
+    text = _RE_VALUES_ROWS.sub("(...)", text)
+    return _RE_SPACE.sub(" ", text).strip()
+
+
+def _call_site() -> str:
+    """First frame outside app/db (and contextlib): the repository / view that issued the query."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if not filename.startswith(_DB_DIR) and filename not in _SKIP_FILES:
+            return f"{os.path.relpath(filename, _APP_ROOT)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryStats:
+    """Per-request counters: statement count, total DB time and the slowest statements."""
+
+    __slots__ = ("count", "total_ms", "slowest", "started", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest = []
+        self.started = time.perf_counter()
+        # fan_out 的工作线程会并发写入同一个请求的统计
+        self._lock = threading.Lock()
+
+    def add(self, sql, elapsed_ms: float, site: str):
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            slowest = self.slowest
+            if len(slowest) < SLOWEST_KEEP or elapsed_ms > slowest[-1]["ms"]:
+                slowest.append({"ms": elapsed_ms, "sql": sql, "site": site})
+                slowest.sort(key=lambda item: item["ms"], reverse=True)
+                del slowest[SLOWEST_KEEP:]
+
+    def report(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000.0, 3),
+            "slowest": [
+                {"ms": round(item["ms"], 3), "sql": normalize_sql(item["sql"]), "site": item["site"]}
+                for item in self.slowest
+            ],
+        }
+
+    def server_timing(self) -> str:
+        elapsed_ms = (time.perf_counter() - self.started) * 1000.0
+        return (
+            f'db;desc="{self.count} queries";dur={self.total_ms:.1f}, '
+            f"app;dur={elapsed_ms:.1f}"
+        )
+
+
+def current_stats():
+    stats = getattr(_local, "stats", None)
+    if stats is not None:
+        return stats
+    if has_app_context():
+        return g.get(_G_STATS)
+    return None
+
+
+@contextmanager
+def bind(stats):
+    """Attribute queries run by this (worker) thread to another request's stats."""
+    previous = getattr(_local, "stats", None)
+    _local.stats = stats
+    try:
+        yield
+    finally:
+        _local.stats = previous
+
+
+def record(sql, elapsed_ms: float):
+    stats = current_stats()
+    slow = elapsed_ms >= _settings["slow_query_ms"]
+    if stats is None and not slow:
+        return
+    site = _call_site()
+    if stats is not None:
+        stats.add(sql, elapsed_ms, site)
+    if slow:
+        slow_log.warning("slow query %.1fms at %s: %s", elapsed_ms, site, normalize_sql(sql))
+
+
+@contextmanager
+def timed(sql):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(sql, (time.perf_counter() - started) * 1000.0)
+
+
+def init_app(app, slow_query_ms: float = 200.0, server_timing: bool = True, sql_debug_footer: bool = False):
+    _settings["slow_query_ms"] = float(slow_query_ms)
+
+    @app.before_request
+    def _start_query_stats():
+        setattr(g, _G_STATS, QueryStats())
+
+    if server_timing:
+        @app.after_request
+        def _server_timing_header(response):
+            stats = g.get(_G_STATS)
+            if stats is not None:
+                response.headers.add("Server-Timing", stats.server_timing())
+            return response
+
+    def _sql_debug_report():
+        stats = g.get(_G_STATS) if has_request_context() else None
+        return stats.report() if stats is not None else None
+
+    @app.context_processor
+    def _inject_sql_debug():
+        # 渲染到页脚时才取报告，包含模板渲染过程中发出的查询
+        return {"sql_debug": _sql_debug_report if sql_debug_footer else None}
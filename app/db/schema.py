@@ -1,16 +1,6 @@
 from werkzeug.security import generate_password_hash
 
-from .mysql import execute, fetch_one
-
-
-def ensure_schema():
-    _create_tables()
-    _create_views()
-    _seed_roles()
-    _seed_role_permissions()
-    _seed_users()
-    _seed_customers()
-    _seed_field_permissions()
+from .mysql import execute, fetch_all, fetch_one, insert_many
 
 
 def _create_tables():
@@ -410,19 +400,11 @@ def _seed_roles():
         ("engineer", "工程师", "エンジニア", "Engineer"),
         ("admin", "管理员", "管理者", "Administrator"),
     ]
-    for code, name_cn, name_jp, desc in roles:
-        execute(
-            """
-            INSERT IGNORE INTO role (role_code, name_cn, name_jp, description)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (code, name_cn, name_jp, desc),
-        )
+    insert_many("role", ["role_code", "name_cn", "name_jp", "description"], roles, ignore=True)
 
 
-def _role_id(role_code: str):
-    row = fetch_one("SELECT id FROM role WHERE role_code = %s", (role_code,))
-    return row["id"] if row else None
+def _role_ids() -> dict:
+    return {row["role_code"]: row["id"] for row in fetch_all("SELECT id, role_code FROM role")}
 
 
 def _seed_role_permissions():
@@ -450,18 +432,21 @@ def _seed_role_permissions():
         ],
     }
 
+    role_ids = _role_ids()
+    rows = []
     for role_code, perms in role_permissions.items():
-        role_id = _role_id(role_code)
+        role_id = role_ids.get(role_code)
         if not role_id:
             continue
         for module_name, permission_type in perms:
-            execute(
-                """
-                INSERT IGNORE INTO role_permission (role_id, module_name, permission_type, allow_flag)
-                VALUES (%s, %s, %s, 1)
-                """,
-                (role_id, module_name, permission_type),
-            )
+            rows.append((role_id, module_name, permission_type))
+    insert_many(
+        "role_permission",
+        ["role_id", "module_name", "permission_type"],
+        rows,
+        literals={"allow_flag": "1"},
+        ignore=True,
+    )
 
 
 def _seed_users():
@@ -470,18 +455,21 @@ def _seed_users():
         ("engineer", "工程师", "engineer", "Engineer123!"),
         ("user", "普通用户", "user", "User123!"),
     ]
+    role_ids = _role_ids()
+    rows = []
     for role_code, full_name, username, password in default_users:
-        role_id = _role_id(role_code)
+        role_id = role_ids.get(role_code)
         if not role_id:
             continue
         password_hash = generate_password_hash(password)
-        execute(
-            """
-            INSERT IGNORE INTO `user` (username, password_hash, role_id, full_name, is_active)
-            VALUES (%s, %s, %s, %s, 1)
-            """,
-            (username, password_hash, role_id, full_name),
-        )
+        rows.append((username, password_hash, role_id, full_name))
+    insert_many(
+        "`user`",
+        ["username", "password_hash", "role_id", "full_name"],
+        rows,
+        literals={"is_active": "1"},
+        ignore=True,
+    )
 
 
 def _seed_customers():
@@ -499,23 +487,16 @@ def _seed_customers():
         )
         row = fetch_one("SELECT id FROM customer WHERE customer_no = %s", (customer_no,))
         if row:
-            execute(
-                """
-                INSERT IGNORE INTO customer_auth_identity
-                  (customer_id, identity_type, identifier, is_primary, verified_at)
-                VALUES (%s, 'email', %s, 1, NOW())
-                """,
-                (row["id"], email),
-            )
+            identities = [(row["id"], "email", email)]
             if phone:
-                execute(
-                    """
-                    INSERT IGNORE INTO customer_auth_identity
-                      (customer_id, identity_type, identifier, is_primary, verified_at)
-                    VALUES (%s, 'phone', %s, 1, NOW())
-                    """,
-                    (row["id"], phone),
-                )
+                identities.append((row["id"], "phone", phone))
+            insert_many(
+                "customer_auth_identity",
+                ["customer_id", "identity_type", "identifier"],
+                identities,
+                literals={"is_primary": "1", "verified_at": "NOW()"},
+                ignore=True,
+            )
 
 
 def _seed_field_permissions():
@@ -536,21 +517,22 @@ def _seed_field_permissions():
     ]
 
     role_order = ["user", "engineer", "admin"]
+    role_ids = _role_ids()
+    rows = []
     for table_name, field_name, level, editable, description in rules:
         start_index = role_order.index(_min_role_for_level(level))
         access_level = 20 if editable else 10
         for role_code in role_order[start_index:]:
-            role_id = _role_id(role_code)
+            role_id = role_ids.get(role_code)
             if not role_id:
                 continue
-            execute(
-                """
-                INSERT IGNORE INTO vehicle_field_permission
-                (role_id, table_name, field_name, access_level, description)
-                VALUES (%s, %s, %s, %s, %s)
-                """,
-                (role_id, table_name, field_name, access_level, description),
-            )
+            rows.append((role_id, table_name, field_name, access_level, description))
+    insert_many(
+        "vehicle_field_permission",
+        ["role_id", "table_name", "field_name", "access_level", "description"],
+        rows,
+        ignore=True,
+    )
 
 
 def _min_role_for_level(level: str) -> str:
@@ -559,3 +541,94 @@ def _min_role_for_level(level: str) -> str:
     if level == "advanced":
         return "engineer"
     return "admin"
+
+
+def _create_job_run():
+    # 定时任务账本：每个任务最近一次执行 / 成功的时间（app/jobs.py）
+    execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_run (
+            job_name VARCHAR(64) NOT NULL PRIMARY KEY,
+            last_run_at DATETIME NULL,
+            last_success_at DATETIME NULL,
+            last_status VARCHAR(16) NULL,
+            last_message VARCHAR(255) NULL,
+            duration_ms INT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """
+    )
+
+
+def _create_master_data_version():
+    # 主数据版本号：任何 worker 修改主数据后递增，各进程据此判断缓存是否过期（app/repositories/master_data_cache.py）
+    execute(
+        """
+        CREATE TABLE IF NOT EXISTS master_data_version (
+            id TINYINT NOT NULL PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """
+    )
+    execute("INSERT IGNORE INTO master_data_version (id, version) VALUES (1, 0)")
+
+
+def _create_vehicle_version():
+    # 每辆车的变更标记：车辆 / 状态 / 价格 / 图片 / QR 写入时在同一事务里递增，详情页的 ETag 只比较它
+    execute(
+        """
+        CREATE TABLE IF NOT EXISTS vehicle_version (
+            vehicle_id INT NOT NULL PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """
+    )
+    execute("INSERT IGNORE INTO vehicle_version (vehicle_id, version) SELECT id, 1 FROM vehicle")
+
+
+# vehicle_read 的行来源：i18n 视图的全部列 + 当前状态（app/repositories/vehicle_read_repo.py 负责维护）
+VEHICLE_READ_SELECT = """
+SELECT
+  v.*,
+  vs.status,
+  vs.mileage,
+  vs.fuel_level,
+  vs.location_desc,
+  vs.inspection_due_yyyymm,
+  vs.insurance_due_date,
+  vs.has_etc_card
+FROM v_vehicle_i18n v
+LEFT JOIN vehicle_status vs ON vs.vehicle_id = v.id
+"""
+
+
+def rebuild_vehicle_read():
+    """
+    (Re)creates vehicle_read from VEHICLE_READ_SELECT. Later migrations that
+    add vehicle / vehicle_status columns or change v_vehicle_i18n append a
+    step calling this so the read model picks the new columns up.
+    """
+    execute("DROP TABLE IF EXISTS vehicle_read")
+    execute(f"CREATE TABLE vehicle_read AS {VEHICLE_READ_SELECT}")
+    execute("CREATE UNIQUE INDEX uq_vehicle_read_id ON vehicle_read (id)")
+    execute("CREATE INDEX idx_vehicle_read_vin ON vehicle_read (vin)")
+    execute("CREATE INDEX idx_vehicle_read_brand_model ON vehicle_read (brand_id, model_id)")
+    execute("CREATE INDEX idx_vehicle_read_status ON vehicle_read (status)")
+
+
+# 有序迁移步骤 (version, name, step)，由 schema_version 账本记录已执行的版本。
+# 只在末尾追加新步骤，不要修改已发布步骤的编号；前几步均为幂等的 baseline，
+# 在已有数据库上首次执行也是安全的。
+MIGRATIONS = [
+    (1, "create_tables", _create_tables),
+    (2, "create_views", _create_views),
+    (3, "seed_roles", _seed_roles),
+    (4, "seed_role_permissions", _seed_role_permissions),
+    (5, "seed_users", _seed_users),
+    (6, "seed_customers", _seed_customers),
+    (7, "seed_field_permissions", _seed_field_permissions),
+    (8, "create_job_run", _create_job_run),
+    (9, "create_vehicle_read", rebuild_vehicle_read),
+    (10, "create_master_data_version", _create_master_data_version),
+    (11, "create_vehicle_version", _create_vehicle_version),
+]
@@ -0,0 +1,74 @@
+# app/db/sql_registry.py
+import threading
+
+_QUERIES = {}
+_LOCK = threading.RLock()
+
+
+class Query:
+    """
+    A repository query declared once by name. The final SQL text is built by
+    `builder` on first use (or by compile_all() at startup) and reused after
+    that; fetch_one/fetch_all/execute accept a Query anywhere they accept SQL
+    text and run prepared ones through a per-connection prepared cursor.
+    """
+
+    __slots__ = ("name", "prepared", "_builder", "_sql")
+
+    def __init__(self, name: str, builder, prepared: bool = True):
+        self.name = name
+        self.prepared = prepared
+        self._builder = builder
+        self._sql = None
+
+    @property
+    def sql(self) -> str:
+        sql = self._sql
+        if sql is None:
+            with _LOCK:
+                if self._sql is None:
+                    built = self._builder() if callable(self._builder) else self._builder
+                    self._sql = built.strip()
+                sql = self._sql
+        return sql
+
+    def invalidate(self):
+        self._sql = None
+
+    def __str__(self):
+        return self.sql
+
+    def __repr__(self):
+        return f"<Query {self.name}>"
+
+
+def query(name: str, builder, prepared: bool = True) -> Query:
+    """
+    Get-or-declare a named query. `builder` is SQL text or a zero-arg callable
+    returning it; callables may depend on schema introspection and are only
+    evaluated when the query is first compiled.
+    """
+    existing = _QUERIES.get(name)
+    if existing is not None:
+        return existing
+    with _LOCK:
+        existing = _QUERIES.get(name)
+        if existing is None:
+            existing = Query(name, builder, prepared)
+            _QUERIES[name] = existing
+    return existing
+
+
+def compile_all():
+    for q in list(_QUERIES.values()):
+        q.sql
+
+
+def invalidate():
+    """Drop compiled SQL (e.g. after schema changes); it is rebuilt on next use."""
+    for q in list(_QUERIES.values()):
+        q.invalidate()
+
+
+def sql_text(sql) -> str:
+    return sql.sql if isinstance(sql, Query) else sql
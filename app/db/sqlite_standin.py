@@ -0,0 +1,521 @@
+# app/db/sqlite_standin.py
+"""
+SQLite stand-in for MySQL (DB_BACKEND=sqlite), for benchmarks and tests on
+machines without a MySQL server.
+
+translate() rewrites the MySQL dialect the repositories use: %s
+placeholders, INSERT IGNORE, ON DUPLICATE KEY UPDATE / VALUES(col),
+CREATE OR REPLACE VIEW (v_vehicle_i18n), MySQL CREATE TABLE options and
+inline KEY / ENUM / AUTO_INCREMENT, and information_schema lookups (served
+by per-connection temp views). NOW(), DATABASE(), GET_LOCK() and friends
+are registered as SQL functions.
+"""
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from mysql.connector import errorcode, errors
+
+_MEMORY_URI = "file:vehicle_standin?mode=memory&cache=shared"
+
+# 由外部维护、不在 MIGRATIONS 里的核心表（见 doc/db_schema.md），替身库首次连接时创建。
+# `user` 按线上结构（含 is_deleted / expired_at）先建，迁移里的 IF NOT EXISTS 会跳过它。
+BOOTSTRAP_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS `user` (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(64) NOT NULL UNIQUE,
+        password_hash VARCHAR(255) NOT NULL,
+        role_id INT NOT NULL,
+        full_name VARCHAR(128),
+        is_active TINYINT(1) NOT NULL DEFAULT 1,
+        is_deleted TINYINT(1) NOT NULL DEFAULT 0,
+        expired_at DATETIME DEFAULT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_user_role_id (role_id),
+        CONSTRAINT fk_user_role FOREIGN KEY (role_id) REFERENCES role(id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS md_brand (
+      id int NOT NULL AUTO_INCREMENT,
+      brand_code varchar(32) NOT NULL,
+      name_jp varchar(64) NOT NULL,
+      name_cn varchar(64) NOT NULL,
+      is_active tinyint(1) NOT NULL DEFAULT '1',
+      sort_order int NOT NULL DEFAULT '0',
+      updated_at timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+      PRIMARY KEY (id),
+      UNIQUE KEY uq_brand_code (brand_code)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS md_model (
+      id int NOT NULL AUTO_INCREMENT,
+      brand_id int NOT NULL,
+      model_code varchar(64) NOT NULL,
+      name_jp varchar(64) NOT NULL,
+      name_cn varchar(64) NOT NULL,
+      is_active tinyint(1) NOT NULL DEFAULT '1',
+      sort_order int NOT NULL DEFAULT '0',
+      updated_at timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+      PRIMARY KEY (id),
+      UNIQUE KEY uq_brand_model_code (brand_id, model_code),
+      KEY idx_model_brand (brand_id, is_active, sort_order),
+      CONSTRAINT fk_model_brand FOREIGN KEY (brand_id) REFERENCES md_brand (id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS md_color (
+      id int NOT NULL AUTO_INCREMENT,
+      color_code varchar(32) NOT NULL,
+      name_jp varchar(32) NOT NULL,
+      name_cn varchar(32) NOT NULL,
+      is_active tinyint(1) NOT NULL DEFAULT '1',
+      sort_order int NOT NULL DEFAULT '0',
+      updated_at timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+      PRIMARY KEY (id),
+      UNIQUE KEY uq_color_code (color_code)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS md_enum (
+      id int NOT NULL AUTO_INCREMENT,
+      enum_type varchar(32) NOT NULL,
+      enum_code varchar(32) NOT NULL,
+      name_jp varchar(64) NOT NULL,
+      name_cn varchar(64) NOT NULL,
+      is_active tinyint(1) NOT NULL DEFAULT '1',
+      sort_order int NOT NULL DEFAULT '0',
+      updated_at timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+      PRIMARY KEY (id),
+      UNIQUE KEY uq_enum (enum_type, enum_code),
+      KEY idx_enum_type (enum_type, is_active, sort_order)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vehicle (
+      id int NOT NULL AUTO_INCREMENT,
+      brand_id int NOT NULL,
+      model_id int NOT NULL,
+      color_id int DEFAULT NULL,
+      model_year_ad smallint unsigned DEFAULT NULL,
+      plate_no varchar(64) DEFAULT NULL,
+      vin varchar(64) NOT NULL,
+      type_designation_code varchar(64) DEFAULT NULL,
+      classification_number varchar(32) DEFAULT NULL,
+      engine_code varchar(32) DEFAULT NULL,
+      engine_layout_code varchar(32) DEFAULT NULL,
+      displacement_cc int unsigned DEFAULT NULL,
+      fuel_type_code varchar(32) DEFAULT NULL,
+      drive_type_code varchar(32) DEFAULT NULL,
+      transmission varchar(32) DEFAULT NULL,
+      ownership_type varchar(32) DEFAULT NULL,
+      owner_id bigint unsigned DEFAULT NULL,
+      driver_id bigint unsigned DEFAULT NULL,
+      garage_store_id int DEFAULT NULL,
+      purchase_date date DEFAULT NULL,
+      purchase_price bigint unsigned DEFAULT NULL,
+      legal_doc varchar(255) DEFAULT NULL,
+      vehicle_photo varchar(255) DEFAULT NULL,
+      ext_json json DEFAULT NULL,
+      note text,
+      created_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      updated_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+      updated_by int DEFAULT NULL,
+      etc_type enum('none','etc1','etc2') NOT NULL DEFAULT 'none',
+      PRIMARY KEY (id),
+      UNIQUE KEY uk_vehicle_vin (vin),
+      KEY idx_vehicle_plate_no (plate_no),
+      KEY idx_vehicle_brand_id (brand_id),
+      KEY idx_vehicle_model_id (model_id),
+      KEY idx_vehicle_garage_store_id (garage_store_id),
+      CONSTRAINT fk_vehicle_brand FOREIGN KEY (brand_id) REFERENCES md_brand (id),
+      CONSTRAINT fk_vehicle_color FOREIGN KEY (color_id) REFERENCES md_color (id),
+      CONSTRAINT fk_vehicle_model FOREIGN KEY (model_id) REFERENCES md_model (id),
+      CONSTRAINT fk_vehicle_garage_store FOREIGN KEY (garage_store_id) REFERENCES store (id) ON DELETE SET NULL ON UPDATE CASCADE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vehicle_status (
+      vehicle_id int NOT NULL,
+      status varchar(32) DEFAULT NULL,
+      mileage int DEFAULT NULL,
+      fuel_level int DEFAULT NULL,
+      location_desc varchar(255) DEFAULT NULL,
+      update_time datetime DEFAULT NULL,
+      updated_by int DEFAULT NULL,
+      inspection_due_yyyymm int unsigned DEFAULT NULL,
+      insurance_due_date date DEFAULT NULL,
+      has_etc_card tinyint(1) NOT NULL DEFAULT '0',
+      PRIMARY KEY (vehicle_id),
+      KEY idx_inspection_due_yyyymm (inspection_due_yyyymm),
+      KEY idx_insurance_due_date (insurance_due_date),
+      CONSTRAINT fk_vehicle_status_vehicle FOREIGN KEY (vehicle_id) REFERENCES vehicle (id) ON DELETE CASCADE ON UPDATE CASCADE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vehicle_media (
+      id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+      vehicle_id INT NOT NULL,
+      uploaded_by INT NOT NULL,
+      file_type ENUM('photo','legal_doc') NOT NULL,
+      file_path VARCHAR(255) NOT NULL,
+      is_primary tinyint(1) NOT NULL DEFAULT '0',
+      uploaded_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (id),
+      KEY idx_vf_vehicle_type (vehicle_id, file_type),
+      CONSTRAINT fk_vf_vehicle FOREIGN KEY (vehicle_id) REFERENCES vehicle(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+# information_schema 的最小替身：表 / 列 / 视图
+_INFORMATION_SCHEMA_VIEWS = [
+    """
+    CREATE TEMP VIEW IF NOT EXISTS is_tables AS
+    SELECT 'main' AS table_schema,
+           name AS table_name,
+           CASE type WHEN 'view' THEN 'VIEW' ELSE 'BASE TABLE' END AS table_type,
+           NULL AS table_rows
+    FROM sqlite_master
+    WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'
+    """,
+    """
+    CREATE TEMP VIEW IF NOT EXISTS is_columns AS
+    SELECT 'main' AS table_schema,
+           m.name AS table_name,
+           p.name AS column_name,
+           p.cid + 1 AS ordinal_position,
+           lower(p.type) AS data_type,
+           lower(p.type) AS column_type,
+           CASE WHEN p."notnull" THEN 'NO' ELSE 'YES' END AS is_nullable
+    FROM sqlite_master m, pragma_table_info(m.name) p
+    WHERE m.type IN ('table', 'view') AND m.name NOT LIKE 'sqlite_%'
+    """,
+    """
+    CREATE TEMP VIEW IF NOT EXISTS is_views AS
+    SELECT 'main' AS table_schema, name AS table_name
+    FROM sqlite_master
+    WHERE type = 'view'
+    """,
+]
+
+_I = re.I | re.S
+_RE_CREATE_TABLE = re.compile(r"^CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s*\((.*)\)[^)]*$", _I)
+_RE_CREATE_VIEW = re.compile(r"^CREATE\s+OR\s+REPLACE\s+VIEW\s+`?(\w+)`?\s+AS\s+(.*)$", _I)
+_RE_ALTER_ADD_INDEX = re.compile(r"^ALTER\s+TABLE\s+`?(\w+)`?\s+ADD\s+(UNIQUE\s+)?(?:KEY|INDEX)\s+`?(\w+)`?\s*(\(.*\))$", _I)
+_RE_ALTER_ADD_CONSTRAINT = re.compile(r"^ALTER\s+TABLE\s+\S+\s+ADD\s+(CONSTRAINT|FOREIGN\s+KEY)\b", _I)
+_RE_INDEX_ITEM = re.compile(r"^(UNIQUE\s+)?(?:KEY|INDEX)\s+`?(\w+)`?\s*(\(.*\))$", _I)
+_RE_COLUMN_ITEM = re.compile(r"^`?(\w+)`?\s+(.*)$", _I)
+_RE_ENUM = re.compile(r"\b(?:ENUM|SET)\s*\((?:[^()']|'(?:[^'\\]|\\.|'')*')*\)", re.I)
+_RE_COLUMN_NOISE = re.compile(
+    r"\bUNSIGNED\b|\bON\s+UPDATE\s+CURRENT_TIMESTAMP\b|\bCOMMENT\s+'(?:[^'\\]|\\.|'')*'"
+    r"|\b(?:CHARACTER\s+SET|COLLATE)\s+\w+",
+    re.I,
+)
+_RE_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I)
+_RE_VALUES_REF = re.compile(r"\bVALUES\s*\(\s*`?(\w+)`?\s*\)", re.I)
+_RE_INFORMATION_SCHEMA = re.compile(r"\binformation_schema\.(tables|columns|views)\b", re.I)
+_RE_INSERT_IGNORE = re.compile(r"^INSERT\s+IGNORE\b", re.I)
+
+
+def _split_top_level(body: str) -> list[str]:
+    items, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(body):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            items.append(body[start:i])
+            start = i + 1
+    items.append(body[start:])
+    return [item.strip() for item in items if item.strip()]
+
+
+def _create_table(match) -> list[str]:
+    if_not_exists, table, body = match.group(1) or "", match.group(2), match.group(3)
+    columns, constraints, indexes = [], [], []
+    autoincrement = None
+    primary_key = None
+    for item in _split_top_level(body):
+        index = _RE_INDEX_ITEM.match(item)
+        if index:
+            if index.group(1):
+                constraints.append(f"UNIQUE {index.group(3)}")
+            else:
+                indexes.append(f"CREATE INDEX IF NOT EXISTS {table}__{index.group(2)} ON {table} {index.group(3)}")
+            continue
+        head = item.upper()
+        if head.startswith("PRIMARY KEY"):
+            primary_key = item
+            continue
+        if head.startswith(("CONSTRAINT", "FOREIGN KEY", "CHECK", "UNIQUE")):
+            constraints.append(item)
+            continue
+        name, definition = _RE_COLUMN_ITEM.match(item).groups()
+        if re.search(r"\bAUTO_INCREMENT\b", definition, re.I):
+            autoincrement = name
+            columns.append(f"{name} INTEGER PRIMARY KEY AUTOINCREMENT")
+            continue
+        definition = _RE_ENUM.sub("TEXT", definition)
+        definition = _RE_COLUMN_NOISE.sub("", definition)
+        columns.append(f"{name} {' '.join(definition.split())}")
+    if primary_key and not autoincrement:
+        constraints.insert(0, primary_key.replace("`", ""))
+    create = f"CREATE TABLE {if_not_exists}{table} (\n  " + ",\n  ".join(columns + constraints) + "\n)"
+    return [create] + indexes
+
+
+@lru_cache(maxsize=2048)
+def translate(sql: str) -> tuple:
+    """MySQL statement -> tuple of SQLite statements (possibly empty)."""
+    text = sql.strip().rstrip(";").strip().replace("%s", "?")
+
+    match = _RE_CREATE_TABLE.match(text)
+    if match:
+        return tuple(_create_table(match))
+    match = _RE_CREATE_VIEW.match(text)
+    if match:
+        return (f"DROP VIEW IF EXISTS {match.group(1)}", f"CREATE VIEW {match.group(1)} AS {match.group(2)}")
+    match = _RE_ALTER_ADD_INDEX.match(text)
+    if match:
+        unique = "UNIQUE " if match.group(2) else ""
+        table, name, cols = match.group(1), match.group(3), match.group(4)
+        return (f"CREATE {unique}INDEX IF NOT EXISTS {table}__{name} ON {table} {cols}",)
+    if _RE_ALTER_ADD_CONSTRAINT.match(text):
+        # SQLite 不支持事后追加约束，替身库里直接忽略
+        return ()
+
+    text = _RE_INSERT_IGNORE.sub("INSERT OR IGNORE", text)
+    match = _RE_ON_DUPLICATE.search(text)
+    if match:
+        updates = _RE_VALUES_REF.sub(r"excluded.\1", text[match.end():])
+        text = text[:match.start()] + "ON CONFLICT DO UPDATE SET" + updates
+    text = _RE_INFORMATION_SCHEMA.sub(r"temp.is_\1", text)
+    return (text,)
+
+
+@contextmanager
+def _mysql_errors():
+    try:
+        yield
+    except sqlite3.IntegrityError as exc:
+        errno = errorcode.ER_DUP_ENTRY if "UNIQUE" in str(exc) else errorcode.ER_NO_REFERENCED_ROW_2
+        raise errors.IntegrityError(msg=str(exc), errno=errno) from exc
+    except sqlite3.OperationalError as exc:
+        message = str(exc)
+        if message.startswith("no such table"):
+            raise errors.ProgrammingError(msg=message, errno=errorcode.ER_NO_SUCH_TABLE) from exc
+        if message.startswith("no such column"):
+            raise errors.ProgrammingError(msg=message, errno=errorcode.ER_BAD_FIELD_ERROR) from exc
+        if "syntax error" in message:
+            raise errors.ProgrammingError(msg=message, errno=errorcode.ER_PARSE_ERROR) from exc
+        raise errors.OperationalError(msg=message) from exc
+    except sqlite3.Error as exc:
+        raise errors.DatabaseError(msg=str(exc)) from exc
+
+
+def _parse_datetime(value: bytes):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _parse_date(value: bytes):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+def _parse_decimal(value: bytes):
+    try:
+        return Decimal(value.decode())
+    except ArithmeticError:
+        return value.decode()
+
+
+sqlite3.register_adapter(datetime, lambda v: v.strftime("%Y-%m-%d %H:%M:%S"))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DATETIME", _parse_datetime)
+sqlite3.register_converter("TIMESTAMP", _parse_datetime)
+sqlite3.register_converter("DATE", _parse_date)
+sqlite3.register_converter("DECIMAL", _parse_decimal)
+
+
+class SQLiteCursor:
+    """Buffered cursor with mysql-connector's fetch / dictionary behaviour."""
+
+    def __init__(self, raw, dictionary: bool):
+        self._raw = raw
+        self._dictionary = dictionary
+        self._rows = []
+        self._pos = 0
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+    @property
+    def column_names(self):
+        return tuple(col[0] for col in self.description or ())
+
+    def _load(self, cur):
+        self.description = cur.description
+        self.lastrowid = cur.lastrowid
+        if cur.description:
+            names = [col[0] for col in cur.description]
+            rows = cur.fetchall()
+            self._rows = [dict(zip(names, row)) for row in rows] if self._dictionary else rows
+            self.rowcount = len(self._rows)
+        else:
+            self._rows = []
+            self.rowcount = cur.rowcount
+        self._pos = 0
+
+    def execute(self, sql, params=()):
+        params = tuple(params or ())
+        statements = translate(sql)
+        if not statements:
+            self._rows, self.rowcount, self.description = [], 0, None
+            return
+        with _mysql_errors():
+            for statement in statements:
+                cur = self._raw.execute(statement, params if "?" in statement else ())
+            self._load(cur)
+
+    def executemany(self, sql, seq_params):
+        statements = translate(sql)
+        if not statements:
+            return
+        with _mysql_errors():
+            cur = self._raw.executemany(statements[-1], [tuple(p) for p in seq_params])
+            self._load(cur)
+
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchmany(self, size: int = 1):
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def close(self):
+        self._rows = []
+
+
+class SQLiteConnection:
+    unread_result = False
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._raw.in_transaction
+
+    def cursor(self, dictionary: bool = False, buffered=None, prepared: bool = False):
+        return SQLiteCursor(self._raw, dictionary)
+
+    def start_transaction(self):
+        with _mysql_errors():
+            self._raw.execute("BEGIN")
+
+    def commit(self):
+        if self._raw.in_transaction:
+            with _mysql_errors():
+                self._raw.commit()
+
+    def rollback(self):
+        if self._raw.in_transaction:
+            self._raw.rollback()
+
+    def reset_session(self):
+        self.rollback()
+
+    def consume_results(self):
+        pass
+
+    def ping(self, reconnect: bool = False, attempts: int = 1, delay: int = 0):
+        with _mysql_errors():
+            self._raw.execute("SELECT 1")
+
+    def is_connected(self) -> bool:
+        return True
+
+    def close(self):
+        self._raw.close()
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bootstrapped = set()
+        # 共享内存库在最后一个连接关闭时消失，保留一个常驻连接
+        self._keepalive = {}
+
+    def _open(self, database: str):
+        memory = database in ("", ":memory:")
+        raw = sqlite3.connect(
+            _MEMORY_URI if memory else database,
+            uri=memory,
+            timeout=5.0,
+            isolation_level=None,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        raw.execute("PRAGMA foreign_keys = ON")
+        if not memory:
+            raw.execute("PRAGMA journal_mode = WAL")
+        raw.create_function("NOW", 0, _now)
+        raw.create_function("CURDATE", 0, lambda: date.today().isoformat())
+        raw.create_function("DATABASE", 0, lambda: "main")
+        raw.create_function("GET_LOCK", 2, lambda name, timeout: 1)
+        raw.create_function("RELEASE_LOCK", 1, lambda name: 1)
+        raw.create_function("JSON_UNQUOTE", 1, lambda value: value)
+        for ddl in _INFORMATION_SCHEMA_VIEWS:
+            raw.execute(ddl)
+        return raw, memory
+
+    def connect(self, database: str = ":memory:", **_ignored):
+        raw, memory = self._open(database)
+        with self._lock:
+            if memory and database not in self._keepalive:
+                self._keepalive[database] = self._open(database)[0]
+            if database not in self._bootstrapped:
+                conn = SQLiteConnection(raw)
+                cur = conn.cursor()
+                for ddl in BOOTSTRAP_DDL:
+                    cur.execute(ddl)
+                self._bootstrapped.add(database)
+        return SQLiteConnection(raw)
@@ -0,0 +1,88 @@
+# app/http_cache.py
+"""
+Conditional GET for rendered pages. A route derives a validator from the
+change markers of what it shows (see vehicle_version_repo) plus the
+viewer: language, signed-in user / customer and their permissions, since
+those change the HTML for the same URL. A matching If-None-Match is
+answered with 304 before the page's own queries and template render.
+"""
+import hashlib
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app, request, session
+
+from .security.customers import get_current_customer
+from .security.field_permissions import FieldPermissionService
+from .security.permissions import PermissionService
+from .security.users import get_current_user
+
+Validator = namedtuple("Validator", "etag last_modified")
+
+
+def request_lang() -> str:
+    # 与 context processor 的取值顺序一致
+    return request.args.get("lang") or session.get("lang") or current_app.config.get("APP_DEFAULT_LANG", "jp")
+
+
+def viewer_key() -> tuple:
+    """Everything about the viewer that the shared layout and permission macros render."""
+    user = get_current_user()
+    customer = get_current_customer()
+    return (
+        request_lang(),
+        (user.is_authenticated, user.user_id, user.username, user.full_name, user.role_code),
+        (customer.is_authenticated, customer.customer_id, customer.display_name),
+        PermissionService(user).fingerprint(),
+        FieldPermissionService(user).fingerprint(),
+    )
+
+
+def _last_modified(values):
+    stamps = [value for value in values if isinstance(value, datetime)]
+    if not stamps:
+        return None
+    # DB 时间是服务器本地时间（naive），按本地时区转换
+    return max(stamps).astimezone()
+
+
+def page_validator(versions: dict, *parts):
+    """
+    Validator for the current page from a change-marker dict `versions` and
+    any other hashable `parts` it renders; None when the page must not be
+    revalidated (flash messages are pending and render only once, or a
+    marker is missing because its migration has not run yet).
+    """
+    if session.get("_flashes") or any(value is None for value in versions.values()):
+        return None
+    raw = repr((request.endpoint, request.view_args, viewer_key(), sorted(versions.items()), parts))
+    return Validator(
+        hashlib.sha1(raw.encode("utf-8")).hexdigest(),
+        _last_modified(versions.values()),
+    )
+
+
+def _with_headers(response, validator):
+    response.set_etag(validator.etag, weak=True)
+    if validator.last_modified is not None:
+        response.last_modified = validator.last_modified
+    # 按会话区分的页面：只许浏览器缓存，每次使用前都要校验
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+    return response
+
+
+def not_modified(validator):
+    """A 304 response when the client already holds `validator`'s version, else None."""
+    if validator is None or not request.if_none_match.contains_weak(validator.etag):
+        return None
+    return _with_headers(current_app.response_class(status=304), validator)
+
+
+def conditional(body, validator):
+    """Response for a freshly rendered `body`, carrying `validator` when there is one."""
+    response = current_app.make_response(body)
+    if validator is not None and response.status_code == 200:
+        _with_headers(response, validator)
+    return response
@@ -0,0 +1,193 @@
+# app/jobs.py
+import time
+import logging
+import threading
+from datetime import date, datetime
+
+import click
+from flask.cli import AppGroup
+
+from .db.migrations import refresh_if_migrated
+from .db.mysql import _load_settings, execute, fetch_all, fetch_one, get_conn, primary_reads
+
+log = logging.getLogger(__name__)
+
+JOB_DEFAULTS = {
+    # web 进程内的后台线程定时执行到期任务；关闭后改用 cron 调 `flask jobs run`
+    "job_scheduler": True,
+    # 后台线程检查到期任务的间隔秒数
+    "job_poll_s": 300.0,
+    "inspection_sweep_interval_s": 86400.0,
+}
+
+_LOCK_PREFIX = "vehicle_management.job."
+_JOBS = {}
+_scheduler_started = False
+_scheduler_lock = threading.Lock()
+
+
+class Job:
+    __slots__ = ("name", "func", "interval_key")
+
+    def __init__(self, name, func, interval_key):
+        self.name = name
+        self.func = func
+        self.interval_key = interval_key
+
+    def interval_s(self) -> float:
+        return float(_load_settings(JOB_DEFAULTS)[self.interval_key])
+
+
+def job(name: str, interval_key: str):
+    """Register a periodic job; its interval is the JOB_DEFAULTS setting `interval_key`."""
+    def decorator(func):
+        _JOBS[name] = Job(name, func, interval_key)
+        return func
+    return decorator
+
+
+@job("inspection_sweep", "inspection_sweep_interval_s")
+def sweep_overdue_inspections():
+    """Marks vehicles whose inspection month has passed as inactive."""
+    from .repositories.vehicle_repo import set_inactive_for_overdue_inspections
+
+    today = date.today()
+    changed = set_inactive_for_overdue_inspections(today.year * 100 + today.month)
+    return f"{changed} vehicle(s) set inactive"
+
+
+def _record(name, started_at, ok, message, duration_ms):
+    now = datetime.now()
+    execute(
+        """
+        INSERT INTO job_run (job_name, last_run_at, last_success_at, last_status, last_message, duration_ms)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            last_run_at = VALUES(last_run_at),
+            last_success_at = COALESCE(VALUES(last_success_at), last_success_at),
+            last_status = VALUES(last_status),
+            last_message = VALUES(last_message),
+            duration_ms = VALUES(duration_ms)
+        """,
+        (name, started_at, now if ok else None, "ok" if ok else "error", (message or "")[:255], duration_ms),
+    )
+
+
+def run_job(name: str, force: bool = False) -> bool:
+    """
+    Runs job `name` if its interval has passed since the last successful run
+    (or `force`). A MySQL named lock makes it a no-op while another worker is
+    running the same job. Returns True when the job ran.
+    """
+    job_def = _JOBS[name]
+    # GET_LOCK 是会话级锁，用单独的连接持有
+    lock_conn = get_conn()
+    lock_conn.mark_dirty()
+    cur = lock_conn.cursor()
+    try:
+        cur.execute("SELECT GET_LOCK(%s, 0)", (_LOCK_PREFIX + name,))
+        (got,) = cur.fetchone()
+        if got != 1:
+            return False
+        try:
+            with primary_reads():
+                row = fetch_one("SELECT last_success_at FROM job_run WHERE job_name = %s", (name,))
+            last_success = row["last_success_at"] if row else None
+            if (
+                not force
+                and last_success is not None
+                and (datetime.now() - last_success).total_seconds() < job_def.interval_s()
+            ):
+                return False
+
+            started_at = datetime.now()
+            started = time.perf_counter()
+            try:
+                message = job_def.func()
+                ok = True
+            except Exception as exc:
+                log.exception("Job %s failed", name)
+                message, ok = f"{type(exc).__name__}: {exc}", False
+            _record(name, started_at, ok, message, int((time.perf_counter() - started) * 1000))
+            return True
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_PREFIX + name,))
+            cur.fetchall()
+    finally:
+        cur.close()
+        lock_conn.close()
+
+
+def run_due_jobs() -> list[str]:
+    """Runs every registered job that is due; returns the names that ran."""
+    ran = []
+    for name in _JOBS:
+        try:
+            if run_job(name):
+                ran.append(name)
+        except Exception:
+            log.exception("Could not run job %s", name)
+    return ran
+
+
+def _scheduler_loop(poll_s: float):
+    while True:
+        try:
+            refresh_if_migrated()
+        except Exception:
+            log.warning("Could not check the schema version", exc_info=True)
+        run_due_jobs()
+        time.sleep(poll_s)
+
+
+def start_scheduler():
+    """Starts the background job thread once per process."""
+    global _scheduler_started
+    with _scheduler_lock:
+        if _scheduler_started:
+            return
+        _scheduler_started = True
+    poll_s = max(float(_load_settings(JOB_DEFAULTS)["job_poll_s"]), 1.0)
+    threading.Thread(target=_scheduler_loop, args=(poll_s,), name="job-scheduler", daemon=True).start()
+
+
+jobs_cli = AppGroup("jobs", help="Periodic maintenance jobs.")
+
+
+@jobs_cli.command("run")
+@click.argument("names", nargs=-1)
+@click.option("--force", is_flag=True, help="Run even if the interval has not passed.")
+def run_command(names, force):
+    """Run due jobs (or only NAMES)."""
+    for name in names or list(_JOBS):
+        if name not in _JOBS:
+            raise click.BadParameter(f"unknown job {name!r}", param_hint="NAMES")
+        click.echo(f"{name}: {'ran' if run_job(name, force=force) else 'skipped'}")
+
+
+@jobs_cli.command("status")
+def status_command():
+    """Show when each job last ran."""
+    with primary_reads():
+        rows = {row["job_name"]: row for row in fetch_all("SELECT * FROM job_run")}
+    for name in _JOBS:
+        row = rows.get(name)
+        if row is None:
+            click.echo(f"{name}: never run")
+        else:
+            click.echo(
+                f"{name}: last run {row['last_run_at']} ({row['last_status']}, {row['duration_ms']} ms), "
+                f"last success {row['last_success_at']}: {row['last_message']}"
+            )
+
+
+def init_app(app):
+    app.cli.add_command(jobs_cli)
+    if not _load_settings(JOB_DEFAULTS)["job_scheduler"]:
+        return
+
+    # 第一个请求时才启动：`flask db` 等 CLI 命令与 reloader 父进程不会跑任务
+    @app.before_request
+    def _start_job_scheduler():
+        if not _scheduler_started:
+            start_scheduler()
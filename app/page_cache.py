@@ -0,0 +1,124 @@
+# app/page_cache.py
+"""
+Rendered-page cache for public portal pages. Entries are keyed on the
+endpoint, its view args and query string, the language and the signed-in
+user / customer, so every visitor gets exactly the HTML they would have
+been rendered. Entries carry tags; invalidate(*tags) drops the tagged ones
+and committed writes to the tables in TABLE_TAGS call it automatically.
+"""
+import time
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, session
+
+from .db.mysql import _load_settings, on_write
+
+PAGE_CACHE_DEFAULTS = {
+    # 0 = 不缓存；其他 worker 的写入本进程看不到，TTL 是跨进程陈旧的上限
+    "page_cache_ttl_s": 60.0,
+    "page_cache_max_entries": 512,
+}
+
+VEHICLES = "vehicles"
+PRICING = "pricing"
+MEDIA = "media"
+
+# 写入这些表后失效对应标签的页面
+TABLE_TAGS = {
+    "vehicle": VEHICLES,
+    "vehicle_status": VEHICLES,
+    "vehicle_read": VEHICLES,
+    "md_brand": VEHICLES,
+    "md_model": VEHICLES,
+    "rental_vehicle_pricing": PRICING,
+    "vehicle_media": MEDIA,
+}
+
+_LOCK = threading.Lock()
+_ENTRIES = OrderedDict()
+_GENERATIONS = {}
+_settings = None
+
+
+def _get_settings():
+    global _settings
+    if _settings is None:
+        _settings = _load_settings(PAGE_CACHE_DEFAULTS)
+    return _settings
+
+
+def _lang() -> str:
+    # 与 context processor 的取值顺序一致
+    return request.args.get("lang") or session.get("lang") or current_app.config.get("APP_DEFAULT_LANG", "jp")
+
+
+def _key(lang):
+    args = tuple(sorted((k, v) for k, v in request.args.items(multi=True) if k != "lang"))
+    view_args = tuple(sorted((request.view_args or {}).items()))
+    return (request.endpoint, view_args, args, lang, session.get("user_id"), session.get("customer_id"))
+
+
+def _stamp(tags):
+    return tuple(_GENERATIONS.get(tag, 0) for tag in tags)
+
+
+def cached_page(*tags):
+    """
+    Cache the decorated view's rendered HTML for page_cache_ttl_s seconds.
+    `tags` name the data the page shows (VEHICLES / PRICING / MEDIA); pages
+    without tags only expire by TTL.
+    """
+    tags = tuple(sorted(tags))
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            settings = _get_settings()
+            # 待显示的 flash 消息只渲染一次，不走缓存
+            if settings["page_cache_ttl_s"] <= 0 or session.get("_flashes"):
+                return view(*args, **kwargs)
+
+            lang = _lang()
+            key = _key(lang)
+            with _LOCK:
+                stamp = _stamp(tags)
+                entry = _ENTRIES.get(key)
+                if entry is not None and entry[1] == stamp and entry[2] > time.monotonic():
+                    _ENTRIES.move_to_end(key)
+                    # 命中时模板不渲染，补上 context processor 对会话语言的写入
+                    session["lang"] = lang
+                    return entry[0]
+
+            body = view(*args, **kwargs)
+            if isinstance(body, str):
+                with _LOCK:
+                    # 渲染期间有写入提交，stamp 已过期，不缓存这个结果
+                    if _stamp(tags) == stamp:
+                        _ENTRIES[key] = (body, stamp, time.monotonic() + settings["page_cache_ttl_s"])
+                        _ENTRIES.move_to_end(key)
+                        while len(_ENTRIES) > settings["page_cache_max_entries"]:
+                            _ENTRIES.popitem(last=False)
+            return body
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(*tags):
+    """Drop cached pages tagged with any of `tags` (every page when no tag is given)."""
+    with _LOCK:
+        if not tags:
+            _ENTRIES.clear()
+            return
+        for tag in tags:
+            _GENERATIONS[tag] = _GENERATIONS.get(tag, 0) + 1
+
+
+@on_write
+def _invalidate_on_write(tables):
+    tags = {TABLE_TAGS[table] for table in tables if table in TABLE_TAGS}
+    if tags:
+        invalidate(*tags)
@@ -1,7 +1,8 @@
 import json
 from typing import Any, Optional
 
-from ..db.mysql import execute, fetch_all, fetch_one
+from ..db.count_cache import cached_count
+from ..db.mysql import execute, fetch_all, fetch_one, insert_many
 
 
 def create_audit_log(
@@ -24,9 +25,32 @@ def create_audit_log(
         return
 
 
+def create_audit_logs(entries: list[tuple]):
+    """
+    Batch variant of create_audit_log; entries are
+    (vehicle_id, actor, actor_id, action_type, action_detail) tuples.
+    """
+    rows = [
+        (vehicle_id, actor, actor_id, action_type, json.dumps(detail, ensure_ascii=False, default=str))
+        for vehicle_id, actor, actor_id, action_type, detail in entries
+    ]
+    try:
+        insert_many(
+            "audit_log",
+            ["vehicle_id", "actor", "actor_id", "action_type", "action_detail"],
+            rows,
+            literals={"created_at": "NOW()"},
+        )
+    except Exception:
+        return
+
+
 def count_audit_logs() -> int:
-    row = fetch_one("SELECT COUNT(*) AS total FROM audit_log")
-    return int(row["total"]) if row else 0
+    def _count():
+        row = fetch_one("SELECT COUNT(*) AS total FROM audit_log")
+        return int(row["total"]) if row else 0
+
+    return cached_count("audit_log.all", _count, ("audit_log",), estimate_table="audit_log")
 
 
 def list_audit_logs(limit: int, offset: int):
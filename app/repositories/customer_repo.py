@@ -1,6 +1,8 @@
 from typing import Optional
 
+from ..db.count_cache import cached_count
 from ..db.mysql import fetch_all, fetch_one, execute
+from ..db.sql_registry import query
 
 
 def list_customers(page: int = 1, per_page: int = 20):
@@ -35,17 +37,20 @@ def list_customers(page: int = 1, per_page: int = 20):
 
 
 def count_customers() -> int:
-    row = fetch_one("SELECT COUNT(*) AS total FROM customer")
-    return int(row["total"]) if row else 0
+    def _count():
+        row = fetch_one("SELECT COUNT(*) AS total FROM customer")
+        return int(row["total"]) if row else 0
+
+    return cached_count("customer.all", _count, ("customer",), estimate_table="customer")
 
 
 def get_customer_by_id(customer_id: int) -> Optional[dict]:
     return fetch_one(
-        """
+        query("customer.get_by_id", """
         SELECT id, customer_no, customer_type, display_name, full_name, status, last_login_at
         FROM customer
         WHERE id = %s
-        """,
+        """),
         (customer_id,),
     )
 
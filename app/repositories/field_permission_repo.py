@@ -1,26 +1,37 @@
-from ..db.mysql import fetch_all, fetch_one, execute
+from ..db.mysql import fetch_all, fetch_iter, fetch_one, execute
+from ..db.sql_registry import query
 
 CATALOG_TABLES_SQL = "('vehicle', 'vehicle_status', 'vehicle_qr', 'user', 'role')"
 
 
 def list_field_permissions(role_id: int):
     return fetch_all(
-        "SELECT id, table_name, field_name, access_level, description\n"
-        "FROM vehicle_field_permission\n"
-        "WHERE role_id = %s\n"
-        "ORDER BY table_name, field_name",
+        query(
+            "vehicle_field_permission.list",
+            "SELECT id, table_name, field_name, access_level, description\n"
+            "FROM vehicle_field_permission\n"
+            "WHERE role_id = %s\n"
+            "ORDER BY table_name, field_name",
+        ),
         (role_id,),
     )
 
 
+_FIELD_PERMISSIONS_ADMIN_SQL = (
+    "SELECT vfp.id, vfp.role_id, r.role_code, r.name_cn, r.name_jp,\n"
+    "       vfp.table_name, vfp.field_name, vfp.access_level, vfp.description\n"
+    "FROM vehicle_field_permission vfp\n"
+    "JOIN role r ON vfp.role_id = r.id\n"
+    "ORDER BY r.role_code, vfp.table_name, vfp.field_name"
+)
+
+
 def list_field_permissions_admin():
-    return fetch_all(
-        "SELECT vfp.id, vfp.role_id, r.role_code, r.name_cn, r.name_jp,\n"
-        "       vfp.table_name, vfp.field_name, vfp.access_level, vfp.description\n"
-        "FROM vehicle_field_permission vfp\n"
-        "JOIN role r ON vfp.role_id = r.id\n"
-        "ORDER BY r.role_code, vfp.table_name, vfp.field_name"
-    )
+    return fetch_all(_FIELD_PERMISSIONS_ADMIN_SQL)
+
+
+def iter_field_permissions_admin():
+    return fetch_iter(_FIELD_PERMISSIONS_ADMIN_SQL)
 
 
 def field_permission_exists(role_id: int, table_name: str, field_name: str) -> bool:
@@ -43,14 +54,15 @@ def list_field_catalog():
 
 def refresh_field_catalog():
     execute(
-        "DELETE fc FROM field_catalog fc\n"
-        "LEFT JOIN information_schema.columns ic\n"
-        "  ON fc.table_name = ic.table_name\n"
-        "  AND fc.field_name = ic.column_name\n"
-        "  AND ic.table_schema = DATABASE()\n"
-        "WHERE fc.table_name IN " + CATALOG_TABLES_SQL + "\n"
-        "  AND fc.field_name <> '__TABLE__'\n"
-        "  AND ic.column_name IS NULL",
+        "DELETE FROM field_catalog\n"
+        "WHERE table_name IN " + CATALOG_TABLES_SQL + "\n"
+        "  AND field_name <> '__TABLE__'\n"
+        "  AND NOT EXISTS (\n"
+        "    SELECT 1 FROM information_schema.columns ic\n"
+        "    WHERE ic.table_schema = DATABASE()\n"
+        "      AND ic.table_name = field_catalog.table_name\n"
+        "      AND ic.column_name = field_catalog.field_name\n"
+        "  )",
     )
     execute(
         "INSERT INTO field_catalog (table_name, field_name, data_type, is_nullable)\n"
@@ -0,0 +1,218 @@
+# app/repositories/master_data_cache.py
+"""
+Per-process snapshot of the master data (brands / models / colors / enums /
+active stores): the raw rows plus, per UI language, the select option lists
+and id -> label maps built from them. The version is a counter row in the
+master_data_version table: invalidate() (and any committed write to the
+master data tables) bumps it, and every worker compares it with its
+snapshot's on get(), once per request. master_data_ttl_s still bounds
+staleness after edits made outside the app.
+"""
+import time
+import threading
+
+from flask import g, has_app_context
+
+from app.db import metadata
+from app.db.mysql import _load_settings, execute, fetch_one, on_write, primary_reads
+from app.repositories.master_data_repo import list_brands, list_models, list_colors, list_enums
+from app.repositories.store_repo import list_stores
+
+MASTER_DATA_DEFAULTS = {
+    # 绕过应用直接改库时，本进程最迟这么久重新加载
+    "master_data_ttl_s": 300.0,
+}
+
+_VERSION_TABLE = "master_data_version"
+_G_DB_VERSION = "_master_data_db_version"
+
+_TABLES = {"md_brand", "md_model", "md_color", "md_enum", "store"}
+
+# 页面语言 -> 标签里先显示的名称列
+_NAME_ORDER = {
+    "jp": ("name_jp", "name_cn"),
+    "cn": ("name_cn", "name_jp"),
+}
+DEFAULT_LANG = "jp"
+
+ENUM_TYPES = ("engine_layout", "fuel_type", "drive_type")
+
+_LOCK = threading.Lock()
+_SNAPSHOT = None
+_VERSION = 0
+_settings = None
+
+
+def _get_settings():
+    global _settings
+    if _settings is None:
+        _settings = _load_settings(MASTER_DATA_DEFAULTS)
+    return _settings
+
+
+def _name_label(row, lang) -> str:
+    first, second = _NAME_ORDER.get(lang, _NAME_ORDER[DEFAULT_LANG])
+    return f"{row[first]} / {row[second]}"
+
+
+class MasterData:
+    """One loaded version of the master data; option lists are built once per language."""
+
+    __slots__ = ("version", "rows", "expires", "_built", "_lock")
+
+    def __init__(self, version, rows, expires):
+        self.version = version
+        self.rows = rows
+        self.expires = expires
+        self._built = {}
+        self._lock = threading.Lock()
+
+    def _build(self, lang):
+        brand_labels = {row["id"]: _name_label(row, lang) for row in self.rows["brands"]}
+        model_labels = {}
+        model_options = []
+        for row in self.rows["models"]:
+            label = f"{brand_labels.get(row['brand_id'], '-')} - {_name_label(row, lang)}"
+            model_labels[row["id"]] = label
+            model_options.append(
+                {
+                    "value": row["id"],
+                    "label": label,
+                    "is_active": bool(row.get("is_active", 1)),
+                    "brand_id": row["brand_id"],
+                }
+            )
+        color_labels = {row["id"]: _name_label(row, lang) for row in self.rows["colors"]}
+        store_labels = {row["id"]: row["name"] for row in self.rows["stores"]}
+
+        enum_groups = {enum_type: [] for enum_type in ENUM_TYPES}
+        enum_labels = {}
+        for row in self.rows["enums"]:
+            label = _name_label(row, lang)
+            enum_labels[(row["enum_type"], row["enum_code"])] = label
+            enum_groups.setdefault(row["enum_type"], []).append(
+                {"value": row["enum_code"], "label": label, "is_active": bool(row.get("is_active", 1))}
+            )
+
+        options = {
+            "brands": [
+                {"value": row["id"], "label": brand_labels[row["id"]], "is_active": bool(row.get("is_active", 1))}
+                for row in self.rows["brands"]
+            ],
+            "models": model_options,
+            "colors": [
+                {"value": row["id"], "label": color_labels[row["id"]], "is_active": bool(row.get("is_active", 1))}
+                for row in self.rows["colors"]
+            ],
+            "stores": [
+                {"value": row["id"], "label": row["name"], "is_active": True}
+                for row in self.rows["stores"]
+            ],
+            **enum_groups,
+        }
+        labels = {
+            "brands": brand_labels,
+            "models": model_labels,
+            "colors": color_labels,
+            "stores": store_labels,
+            "enums": enum_labels,
+        }
+        return options, labels
+
+    def _for_lang(self, lang):
+        lang = lang if lang in _NAME_ORDER else DEFAULT_LANG
+        built = self._built.get(lang)
+        if built is None:
+            with self._lock:
+                built = self._built.get(lang)
+                if built is None:
+                    built = self._built[lang] = self._build(lang)
+        return built
+
+    def options(self, lang=None) -> dict:
+        """Select options keyed brands / models / colors / stores / <enum_type>. Shared; do not mutate."""
+        return self._for_lang(lang)[0]
+
+    def labels(self, kind: str, lang=None) -> dict:
+        """id -> label for `kind`; enums are keyed by (enum_type, enum_code)."""
+        return self._for_lang(lang)[1][kind]
+
+
+def _load(version):
+    # 与版本号一样从主库读，避免副本延迟把旧数据记在新版本号下
+    with primary_reads():
+        rows = {
+            "brands": list_brands(),
+            "models": list_models(),
+            "colors": list_colors(),
+            "enums": list_enums(),
+            "stores": list_stores(),
+        }
+    return MasterData(version, rows, time.monotonic() + _get_settings()["master_data_ttl_s"])
+
+
+def _db_version():
+    """The shared version counter, read at most once per request; None before its migration has run."""
+    if has_app_context() and _G_DB_VERSION in g:
+        return g.get(_G_DB_VERSION)
+    value = None
+    if metadata.has_table(_VERSION_TABLE):
+        with primary_reads():
+            row = fetch_one(f"SELECT version FROM {_VERSION_TABLE} WHERE id = 1")
+        value = row["version"] if row else None
+    if has_app_context():
+        setattr(g, _G_DB_VERSION, value)
+    return value
+
+
+def _current_version():
+    return (_db_version(), _VERSION)
+
+
+def get() -> MasterData:
+    """The current master data snapshot, loading it if the version moved or the TTL passed."""
+    global _SNAPSHOT
+    version = _current_version()
+    snapshot = _SNAPSHOT
+    if snapshot is not None and snapshot.version == version and snapshot.expires > time.monotonic():
+        return snapshot
+    snapshot = _load(version)
+    with _LOCK:
+        # 加载期间本进程又有写入：本次结果照常返回，但不留作缓存
+        if version[1] == _VERSION:
+            _SNAPSHOT = snapshot
+    return snapshot
+
+
+def rows(kind: str) -> list:
+    return get().rows[kind]
+
+
+def options(lang=None) -> dict:
+    return get().options(lang)
+
+
+def labels(kind: str, lang=None) -> dict:
+    return get().labels(kind, lang)
+
+
+def version() -> tuple:
+    return _current_version()
+
+
+def invalidate():
+    """Bumps the shared and local versions; every worker reloads on its next read."""
+    global _VERSION, _SNAPSHOT
+    with _LOCK:
+        _VERSION += 1
+        _SNAPSHOT = None
+    if metadata.has_table(_VERSION_TABLE):
+        execute(f"UPDATE {_VERSION_TABLE} SET version = version + 1 WHERE id = 1")
+    if has_app_context():
+        g.pop(_G_DB_VERSION, None)
+
+
+@on_write
+def _invalidate_on_write(tables):
+    if tables & _TABLES:
+        invalidate()
@@ -1,5 +1,6 @@
 # app/repositories/master_data_repo.py
-from app.db.mysql import fetch_all, fetch_one, execute
+from app.db.mysql import fetch_all, fetch_one, execute, transaction
+from app.repositories import vehicle_read_repo
 
 
 def list_brands():
@@ -52,7 +53,10 @@ def update_brand(brand_id: int, brand_code: str, name_cn: str, name_jp: str, is_
     SET brand_code = %s, name_cn = %s, name_jp = %s, is_active = %s
     WHERE id = %s
     """
-    return execute(sql, (brand_code, name_cn, name_jp, 1 if is_active else 0, brand_id))
+    with transaction():
+        changed = execute(sql, (brand_code, name_cn, name_jp, 1 if is_active else 0, brand_id))
+        vehicle_read_repo.refresh_referencing("brand_id", brand_id)
+    return changed
 
 
 def deactivate_brand(brand_id: int):
@@ -74,7 +78,10 @@ def update_model(model_id: int, brand_id: int, model_code: str, name_cn: str, na
     SET brand_id = %s, model_code = %s, name_cn = %s, name_jp = %s, is_active = %s
     WHERE id = %s
     """
-    return execute(sql, (brand_id, model_code, name_cn, name_jp, 1 if is_active else 0, model_id))
+    with transaction():
+        changed = execute(sql, (brand_id, model_code, name_cn, name_jp, 1 if is_active else 0, model_id))
+        vehicle_read_repo.refresh_referencing("model_id", model_id)
+    return changed
 
 
 def deactivate_model(model_id: int):
@@ -96,7 +103,10 @@ def update_color(color_id: int, color_code: str, name_cn: str, name_jp: str, is_
     SET color_code = %s, name_cn = %s, name_jp = %s, is_active = %s
     WHERE id = %s
     """
-    return execute(sql, (color_code, name_cn, name_jp, 1 if is_active else 0, color_id))
+    with transaction():
+        changed = execute(sql, (color_code, name_cn, name_jp, 1 if is_active else 0, color_id))
+        vehicle_read_repo.refresh_referencing("color_id", color_id)
+    return changed
 
 
 def deactivate_color(color_id: int):
@@ -109,7 +119,15 @@ def create_enum(enum_type: str, enum_code: str, name_cn: str, name_jp: str, is_a
     INSERT INTO md_enum (enum_type, enum_code, name_cn, name_jp, is_active)
     VALUES (%s, %s, %s, %s, %s)
     """
-    return execute(sql, (enum_type, enum_code, name_cn, name_jp, 1 if is_active else 0))
+    with transaction():
+        changed = execute(sql, (enum_type, enum_code, name_cn, name_jp, 1 if is_active else 0))
+        # 已在使用的代码补上标签
+        vehicle_read_repo.refresh_enum(enum_type, enum_code)
+    return changed
+
+
+def _enum_key(enum_id: int):
+    return fetch_one("SELECT enum_type, enum_code FROM md_enum WHERE id = %s", (enum_id,))
 
 
 def update_enum(enum_id: int, enum_type: str, enum_code: str, name_cn: str, name_jp: str, is_active: bool):
@@ -118,9 +136,21 @@ def update_enum(enum_id: int, enum_type: str, enum_code: str, name_cn: str, name
     SET enum_type = %s, enum_code = %s, name_cn = %s, name_jp = %s, is_active = %s
     WHERE id = %s
     """
-    return execute(sql, (enum_type, enum_code, name_cn, name_jp, 1 if is_active else 0, enum_id))
+    with transaction():
+        old = _enum_key(enum_id)
+        changed = execute(sql, (enum_type, enum_code, name_cn, name_jp, 1 if is_active else 0, enum_id))
+        # 改了类型 / 代码时，旧代码的车辆也要重新取标签
+        if old and (old["enum_type"], old["enum_code"]) != (enum_type, enum_code):
+            vehicle_read_repo.refresh_enum(old["enum_type"], old["enum_code"])
+        vehicle_read_repo.refresh_enum(enum_type, enum_code)
+    return changed
 
 
 def deactivate_enum(enum_id: int):
     sql = "UPDATE md_enum SET is_active = 0 WHERE id = %s"
-    return execute(sql, (enum_id,))
+    with transaction():
+        changed = execute(sql, (enum_id,))
+        key = _enum_key(enum_id)
+        if key:
+            vehicle_read_repo.refresh_enum(key["enum_type"], key["enum_code"])
+    return changed
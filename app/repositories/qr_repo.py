@@ -1,17 +1,18 @@
 # app/repositories/qr_repo.py
 import uuid
 
-from app.db.mysql import fetch_one, execute
+from app.db.mysql import fetch_one, execute, transaction
+from app.repositories import vehicle_read_repo, vehicle_version_repo
 
 def get_vehicle_by_qr_slug(qr_slug: str):
     """
     Requires table: vehicle_qr (qr_slug UNIQUE, vehicle_id FK).
     If you haven't created vehicle_qr yet, see the fallback option below.
     """
-    sql = """
+    sql = f"""
     SELECT v.*
     FROM vehicle_qr q
-    JOIN v_vehicle_i18n v ON v.id = q.vehicle_id
+    JOIN {vehicle_read_repo.source()} v ON v.id = q.vehicle_id
     WHERE q.qr_slug = %s AND q.is_active = 1
     """
     try:
@@ -50,11 +51,13 @@ def ensure_vehicle_qr(vehicle_id: int):
     if existing and existing.get("qr_slug"):
         return existing["qr_slug"]
     qr_slug = uuid.uuid4().hex[:12]
-    execute(
-        """
-        INSERT INTO vehicle_qr (vehicle_id, qr_slug, is_active)
-        VALUES (%s, %s, 1)
-        """,
-        (vehicle_id, qr_slug),
-    )
+    with transaction():
+        execute(
+            """
+            INSERT INTO vehicle_qr (vehicle_id, qr_slug, is_active)
+            VALUES (%s, %s, 1)
+            """,
+            (vehicle_id, qr_slug),
+        )
+        vehicle_version_repo.bump([vehicle_id])
     return qr_slug
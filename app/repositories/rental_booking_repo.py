@@ -1,6 +1,8 @@
 import json
 
-from app.db.mysql import fetch_all, fetch_one, execute
+from app.db.mysql import fetch_all, fetch_iter, fetch_one, execute
+from app.db.sql_registry import query
+from app.repositories import vehicle_read_repo
 
 
 def create_rental_booking(
@@ -56,50 +58,55 @@ def create_rental_booking(
     )
 
 
+_RENTAL_BOOKINGS_SQL = query("rental_booking.list", lambda: f"""
+SELECT
+  rb.id,
+  rb.vehicle_id,
+  rb.customer_id,
+  rb.start_date,
+  rb.end_date,
+  rb.pickup_method,
+  rb.pickup_store_id,
+  rb.pickup_address,
+  rb.pickup_lat,
+  rb.pickup_lng,
+  rb.dropoff_method,
+  rb.dropoff_store_id,
+  rb.dropoff_address,
+  rb.dropoff_lat,
+  rb.dropoff_lng,
+  rb.price_snapshot,
+  rb.access_token,
+  rb.status,
+  rb.created_at,
+  c.customer_no,
+  c.display_name,
+  c.full_name,
+  v.vin,
+  v.brand_cn,
+  v.brand_jp,
+  v.model_cn,
+  v.model_jp,
+  v.model_year_ad,
+  v.store_name
+FROM rental_booking rb
+JOIN customer c ON c.id = rb.customer_id
+JOIN {vehicle_read_repo.source()} v ON v.id = rb.vehicle_id
+ORDER BY rb.created_at DESC
+""")
+
+
 def list_rental_bookings():
-    return fetch_all(
-        """
-        SELECT
-          rb.id,
-          rb.vehicle_id,
-          rb.customer_id,
-          rb.start_date,
-          rb.end_date,
-          rb.pickup_method,
-          rb.pickup_store_id,
-          rb.pickup_address,
-          rb.pickup_lat,
-          rb.pickup_lng,
-          rb.dropoff_method,
-          rb.dropoff_store_id,
-          rb.dropoff_address,
-          rb.dropoff_lat,
-          rb.dropoff_lng,
-          rb.price_snapshot,
-          rb.access_token,
-          rb.status,
-          rb.created_at,
-          c.customer_no,
-          c.display_name,
-          c.full_name,
-          v.vin,
-          v.brand_cn,
-          v.brand_jp,
-          v.model_cn,
-          v.model_jp,
-          v.model_year_ad,
-          v.store_name
-        FROM rental_booking rb
-        JOIN customer c ON c.id = rb.customer_id
-        JOIN v_vehicle_i18n v ON v.id = rb.vehicle_id
-        ORDER BY rb.created_at DESC
-        """
-    )
+    return fetch_all(_RENTAL_BOOKINGS_SQL)
+
+
+def iter_rental_bookings():
+    return fetch_iter(_RENTAL_BOOKINGS_SQL)
 
 
 def get_booking_by_token(access_token: str):
     return fetch_one(
-        """
+        f"""
         SELECT
           rb.*,
           v.vin,
@@ -110,7 +117,7 @@ def get_booking_by_token(access_token: str):
           v.model_year_ad,
           v.store_name
         FROM rental_booking rb
-        JOIN v_vehicle_i18n v ON v.id = rb.vehicle_id
+        JOIN {vehicle_read_repo.source()} v ON v.id = rb.vehicle_id
         WHERE rb.access_token = %s
         """,
         (access_token,),
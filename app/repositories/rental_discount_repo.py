@@ -1,9 +1,10 @@
 from app.db.mysql import fetch_all, execute
+from app.repositories import vehicle_read_repo
 
 
 def list_rental_discount_rules():
     return fetch_all(
-        """
+        f"""
         SELECT
           r.id,
           r.vehicle_id,
@@ -21,7 +22,7 @@ def list_rental_discount_rules():
           v.model_jp,
           v.model_year_ad
         FROM rental_longterm_discount_rule r
-        JOIN v_vehicle_i18n v ON v.id = r.vehicle_id
+        JOIN {vehicle_read_repo.source()} v ON v.id = r.vehicle_id
         ORDER BY r.vehicle_id, r.priority, r.min_days
         """
     )
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from app.repositories.customer_repo import get_customer_by_id
-from app.repositories.vehicle_repo import get_vehicle_i18n
+from app.repositories.vehicle_repo import get_vehicle_projection
 
 _VIRTUAL_REQUESTS: list[dict] = []
 _NEXT_REQUEST_ID = 1
@@ -19,7 +19,7 @@ def create_rental_request(
     note: str | None,
 ):
     global _NEXT_REQUEST_ID
-    vehicle = get_vehicle_i18n(vehicle_id) or {}
+    vehicle = get_vehicle_projection(vehicle_id, "booking") or {}
     customer = get_customer_by_id(customer_id) or {}
     request_data = {
         "id": _NEXT_REQUEST_ID,
@@ -1,9 +1,10 @@
 from ..db.mysql import fetch_all, fetch_one, execute
+from ..db.sql_registry import query
 
 
 def get_user_by_username(username: str):
     return fetch_one(
-        """
+        query("user.get_by_username", """
         SELECT u.id, u.username, u.password_hash, u.full_name, u.is_active,
                u.is_deleted, u.expired_at,
                r.id AS role_id, r.role_code, r.name_cn, r.name_jp
@@ -12,14 +13,14 @@ def get_user_by_username(username: str):
         WHERE u.username = %s
           AND u.is_deleted = 0
           AND (u.expired_at IS NULL OR u.expired_at > NOW())
-        """,
+        """),
         (username,),
     )
 
 
 def get_user_by_id(user_id: int):
     return fetch_one(
-        """
+        query("user.get_by_id", """
         SELECT u.id, u.username, u.password_hash, u.full_name, u.is_active,
                u.is_deleted, u.expired_at,
                r.id AS role_id, r.role_code, r.name_cn, r.name_jp
@@ -28,7 +29,7 @@ def get_user_by_id(user_id: int):
         WHERE u.id = %s
           AND u.is_deleted = 0
           AND (u.expired_at IS NULL OR u.expired_at > NOW())
-        """,
+        """),
         (user_id,),
     )
 
@@ -2,42 +2,27 @@ from typing import Optional
 
 import mysql.connector
 
-from app.db.mysql import fetch_all, execute
-
-_MEDIA_TABLE_AVAILABLE: Optional[bool] = None
-_MEDIA_COLUMNS: Optional[set[str]] = None
+from app.db import metadata
+from app.db.mysql import fetch_all, execute, insert_many, transaction
+from app.db.sql_registry import query
+from app.repositories import vehicle_version_repo
 
 
 def _vehicle_media_table_exists() -> bool:
-    global _MEDIA_TABLE_AVAILABLE
-    if _MEDIA_TABLE_AVAILABLE is not None:
-        return _MEDIA_TABLE_AVAILABLE
     try:
-        row = fetch_all("SHOW TABLES LIKE %s", ("vehicle_media",))
-        _MEDIA_TABLE_AVAILABLE = bool(row)
+        return metadata.has_table("vehicle_media")
     except mysql.connector.Error:
-        _MEDIA_TABLE_AVAILABLE = False
-    return _MEDIA_TABLE_AVAILABLE
+        return False
 
 
 def _vehicle_media_columns() -> set[str]:
-    global _MEDIA_COLUMNS
-    if _MEDIA_COLUMNS is not None:
-        return _MEDIA_COLUMNS
-    if not _vehicle_media_table_exists():
-        _MEDIA_COLUMNS = set()
-        return _MEDIA_COLUMNS
     try:
-        rows = fetch_all("SHOW COLUMNS FROM vehicle_media")
-        _MEDIA_COLUMNS = {row["Field"] for row in rows}
+        return set(metadata.columns("vehicle_media"))
     except mysql.connector.Error:
-        _MEDIA_COLUMNS = set()
-    return _MEDIA_COLUMNS
+        return set()
 
 
-def list_vehicle_media(vehicle_id: int, file_type: str):
-    if not _vehicle_media_table_exists():
-        return []
+def _list_vehicle_media_sql():
     columns = ["id", "vehicle_id", "file_type", "file_path"]
     available = _vehicle_media_columns()
     if "is_primary" in available:
@@ -45,68 +30,74 @@ def list_vehicle_media(vehicle_id: int, file_type: str):
     for optional in ["description", "uploaded_by", "uploaded_at"]:
         if optional in available:
             columns.append(optional)
-    return fetch_all(
-        """
+    return """
         SELECT {columns}
         FROM vehicle_media
         WHERE vehicle_id = %s AND file_type = %s
         ORDER BY id
-        """.format(columns=", ".join(columns)),
-        (vehicle_id, file_type),
-    )
+        """.format(columns=", ".join(columns))
 
 
-def create_vehicle_media(vehicle_id: int, file_type: str, file_paths: list[str], uploaded_by: Optional[int]):
+_LIST_VEHICLE_MEDIA = query("vehicle_media.list", _list_vehicle_media_sql)
+
+
+def list_vehicle_media(vehicle_id: int, file_type: str):
     if not _vehicle_media_table_exists():
+        return []
+    return fetch_all(_LIST_VEHICLE_MEDIA, (vehicle_id, file_type))
+
+
+def create_vehicle_media(vehicle_id: int, file_type: str, file_paths: list[str], uploaded_by: Optional[int]):
+    if not _vehicle_media_table_exists() or not file_paths:
         return 0
     available = _vehicle_media_columns()
     columns = ["vehicle_id", "file_type", "file_path"]
-    value_placeholders = ["%s", "%s", "%s"]
     include_uploaded_by = "uploaded_by" in available
-    include_uploaded_at = "uploaded_at" in available
     if include_uploaded_by:
         columns.append("uploaded_by")
-        value_placeholders.append("%s")
+    rows = []
     for path in file_paths:
         params = [vehicle_id, file_type, path]
         if include_uploaded_by:
             params.append(uploaded_by)
-        placeholders = ", ".join(value_placeholders)
-        values_sql = f"{placeholders}{', NOW()' if include_uploaded_at else ''}"
-        insert_columns = ", ".join(columns + (["uploaded_at"] if include_uploaded_at else []))
-        execute(
-            f"""
-            INSERT INTO vehicle_media ({insert_columns})
-            VALUES ({values_sql})
-            """,
-            tuple(params),
-        )
+        rows.append(params)
+    literals = {"uploaded_at": "NOW()"} if "uploaded_at" in available else None
+    with transaction():
+        changed = insert_many("vehicle_media", columns, rows, literals=literals)
+        vehicle_version_repo.bump([vehicle_id])
+    return changed
 
 
 def delete_vehicle_media(vehicle_id: int, file_type: str, file_paths: list[str]):
-    if not _vehicle_media_table_exists():
+    if not _vehicle_media_table_exists() or not file_paths:
         return 0
-    for path in file_paths:
-        execute(
-            """
+    placeholders = ", ".join(["%s"] * len(file_paths))
+    with transaction():
+        changed = execute(
+            f"""
             DELETE FROM vehicle_media
-            WHERE vehicle_id = %s AND file_type = %s AND file_path = %s
+            WHERE vehicle_id = %s AND file_type = %s AND file_path IN ({placeholders})
             """,
-            (vehicle_id, file_type, path),
+            (vehicle_id, file_type, *file_paths),
         )
+        if changed:
+            vehicle_version_repo.bump([vehicle_id])
+    return changed
 
 
 def update_vehicle_media_paths(vehicle_id: int, old_prefix: str, new_prefix: str):
     if not _vehicle_media_table_exists():
         return 0
-    execute(
-        """
-        UPDATE vehicle_media
-        SET file_path = REPLACE(file_path, %s, %s)
-        WHERE vehicle_id = %s
-        """,
-        (old_prefix, new_prefix, vehicle_id),
-    )
+    with transaction():
+        execute(
+            """
+            UPDATE vehicle_media
+            SET file_path = REPLACE(file_path, %s, %s)
+            WHERE vehicle_id = %s
+            """,
+            (old_prefix, new_prefix, vehicle_id),
+        )
+        vehicle_version_repo.bump([vehicle_id])
 
 
 def set_primary_vehicle_media(vehicle_id: int, file_type: str, file_path: str):
@@ -115,19 +106,22 @@ def set_primary_vehicle_media(vehicle_id: int, file_type: str, file_path: str):
     available = _vehicle_media_columns()
     if "is_primary" not in available:
         return 0
-    execute(
-        """
-        UPDATE vehicle_media
-        SET is_primary = 0
-        WHERE vehicle_id = %s AND file_type = %s
-        """,
-        (vehicle_id, file_type),
-    )
-    return execute(
-        """
-        UPDATE vehicle_media
-        SET is_primary = 1
-        WHERE vehicle_id = %s AND file_type = %s AND file_path = %s
-        """,
-        (vehicle_id, file_type, file_path),
-    )
+    with transaction():
+        execute(
+            """
+            UPDATE vehicle_media
+            SET is_primary = 0
+            WHERE vehicle_id = %s AND file_type = %s
+            """,
+            (vehicle_id, file_type),
+        )
+        changed = execute(
+            """
+            UPDATE vehicle_media
+            SET is_primary = 1
+            WHERE vehicle_id = %s AND file_type = %s AND file_path = %s
+            """,
+            (vehicle_id, file_type, file_path),
+        )
+        vehicle_version_repo.bump([vehicle_id])
+    return changed
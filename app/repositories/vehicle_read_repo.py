@@ -0,0 +1,92 @@
+# app/repositories/vehicle_read_repo.py
+"""
+vehicle_read: one row per vehicle with the i18n labels (brand / model /
+color / enums / store) and the current status already resolved, so list
+and detail reads are single-table lookups instead of the eight-way
+v_vehicle_i18n join. vehicle_repo refreshes the affected rows inside the
+same transaction as every vehicle / status write, and master_data_repo
+refreshes the vehicles that reference an edited brand / model / color /
+enum row (refresh_referencing / refresh_enum), so a failed refresh rolls
+the write back instead of leaving stale rows.
+"""
+from app.db import metadata
+from app.db.mysql import execute, transaction
+from app.db.schema import VEHICLE_READ_SELECT
+
+READ_TABLE = "vehicle_read"
+
+# vehicle 上引用主数据 / 门店的列
+REFERENCE_COLUMNS = ("brand_id", "model_id", "color_id", "garage_store_id")
+
+# md_enum.enum_type -> vehicle 上存放代码的列
+ENUM_COLUMNS = {
+    "engine_layout": "engine_layout_code",
+    "fuel_type": "fuel_type_code",
+    "drive_type": "drive_type_code",
+}
+
+
+def available() -> bool:
+    try:
+        return metadata.has_table(READ_TABLE)
+    except Exception:
+        return False
+
+
+def source() -> str:
+    """Table to read resolved vehicle rows from: vehicle_read once migrated, else the i18n view."""
+    return READ_TABLE if available() else "v_vehicle_i18n"
+
+
+def _columns_sql():
+    # 按 vehicle_read 现有的列名插入：vehicle 新增列在下一次 rebuild 前不会打乱列序
+    return ", ".join(metadata.columns(READ_TABLE))
+
+
+def _refresh(where_sql: str, params: tuple) -> int:
+    if not available():
+        return 0
+    columns_sql = _columns_sql()
+    with transaction():
+        execute(f"DELETE FROM {READ_TABLE} {where_sql}", params)
+        return execute(
+            f"""
+            INSERT INTO {READ_TABLE} ({columns_sql})
+            SELECT {columns_sql}
+            FROM ({VEHICLE_READ_SELECT}) src
+            {where_sql}
+            """,
+            params,
+        )
+
+
+def refresh(vehicle_ids=None, vin: str | None = None) -> int:
+    """
+    Re-derives the vehicle_read rows for `vehicle_ids` (or the vehicle with
+    `vin`; every vehicle when neither is given). Rows whose vehicle is gone
+    are removed. Returns the number of rows written.
+    """
+    if vehicle_ids is not None:
+        vehicle_ids = list(vehicle_ids)
+        if not vehicle_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(vehicle_ids))
+        return _refresh(f"WHERE id IN ({placeholders})", tuple(vehicle_ids))
+    if vin is not None:
+        return _refresh("WHERE vin = %s", (vin,))
+    return _refresh("", ())
+
+
+def refresh_referencing(column: str, value) -> int:
+    """Re-derives the rows of vehicles whose REFERENCE_COLUMNS `column` is `value`."""
+    if column not in REFERENCE_COLUMNS:
+        raise ValueError(f"Not a vehicle reference column: {column}")
+    return _refresh(f"WHERE {column} = %s", (value,))
+
+
+def refresh_enum(enum_type: str, enum_code: str) -> int:
+    """Re-derives the rows of vehicles using md_enum (`enum_type`, `enum_code`)."""
+    column = ENUM_COLUMNS.get(enum_type)
+    if column is None:
+        return 0
+    return _refresh(f"WHERE {column} = %s", (enum_code,))
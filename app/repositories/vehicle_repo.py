@@ -1,5 +1,14 @@
 # app/repositories/vehicle_repo.py
-from app.db.mysql import fetch_all, fetch_one, execute
+import time
+import threading
+
+from app.db import metadata
+from app.db.count_cache import Count, cached_count
+from app.db.mysql import _load_settings, fetch_all, fetch_one, execute, execute_insert, on_write, transaction
+from app.db.sql_registry import query
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.repositories import vehicle_read_repo, vehicle_version_repo
+from app.repositories.vehicle_search_repo import search_brand_model
 
 VEHICLE_COLUMNS = [
     "id",
@@ -29,20 +38,13 @@ VEHICLE_COLUMNS = [
     "etc_type",
 ]
 
-_VEHICLE_COLUMN_CACHE = None
-_VEHICLE_VIEW_CACHE = None
-_VEHICLE_STATUS_CACHE = None
-
 
 def _available_columns():
-    global _VEHICLE_COLUMN_CACHE
-    if _VEHICLE_COLUMN_CACHE is None:
-        try:
-            rows = fetch_all("SHOW COLUMNS FROM vehicle")
-            _VEHICLE_COLUMN_CACHE = {row["Field"] for row in rows}
-        except Exception:
-            _VEHICLE_COLUMN_CACHE = set(VEHICLE_COLUMNS)
-    return [c for c in VEHICLE_COLUMNS if c in _VEHICLE_COLUMN_CACHE]
+    try:
+        present = set(metadata.columns("vehicle"))
+    except Exception:
+        present = set(VEHICLE_COLUMNS)
+    return [c for c in VEHICLE_COLUMNS if c in present]
 
 
 def _select_columns():
@@ -53,102 +55,217 @@ def _select_columns():
 
 
 def _vehicle_view_name():
-    global _VEHICLE_VIEW_CACHE
-    if _VEHICLE_VIEW_CACHE is None:
-        try:
-            row = fetch_one(
-                """
-                SELECT table_name
-                FROM information_schema.views
-                WHERE table_schema = DATABASE()
-                  AND table_name = 'v_vehicle_i18n'
-                """
-            )
-            _VEHICLE_VIEW_CACHE = "v_vehicle_i18n" if row else "vehicle"
-        except Exception:
-            _VEHICLE_VIEW_CACHE = "vehicle"
-    return _VEHICLE_VIEW_CACHE
+    """vehicle_read (labels + status, one table) > v_vehicle_i18n > bare vehicle."""
+    if vehicle_read_repo.available():
+        return vehicle_read_repo.READ_TABLE
+    try:
+        return "v_vehicle_i18n" if metadata.is_view("v_vehicle_i18n") else "vehicle"
+    except Exception:
+        return "vehicle"
 
 
-def _vehicle_status_available():
-    global _VEHICLE_STATUS_CACHE
-    if _VEHICLE_STATUS_CACHE is None:
-        try:
-            row = fetch_one(
-                """
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = DATABASE()
-                  AND table_name = 'vehicle_status'
-                """
-            )
-            _VEHICLE_STATUS_CACHE = bool(row)
-        except Exception:
-            _VEHICLE_STATUS_CACHE = False
-    return _VEHICLE_STATUS_CACHE
+def _has_labels(table_name: str) -> bool:
+    return table_name in (vehicle_read_repo.READ_TABLE, "v_vehicle_i18n")
 
 
-def list_vehicles(filters=None, page=1, per_page=20):
-    filters = filters or {}
-    brand_keyword = (filters.get("brand") or "").strip()
-    status = (filters.get("status") or "").strip()
+def _status_join(table_name: str, outer: bool = True):
+    """(join sql, alias) exposing the vehicle_status columns as <alias>.column."""
+    if table_name == vehicle_read_repo.READ_TABLE:
+        return "", "v"
+    return f"{'LEFT JOIN' if outer else 'JOIN'} vehicle_status vs ON vs.vehicle_id = v.id", "vs"
+
+
+def _vehicle_status_available():
+    try:
+        return metadata.has_table("vehicle_status")
+    except Exception:
+        return False
+
 
+def _list_vehicles_sql(shape, count: bool, seek=None) -> str:
+    brand_slots, model_slots, status_filter = shape
     table_name = _vehicle_view_name()
+    status_join, s = _status_join(table_name)
     if _vehicle_status_available():
-        base_sql = f"FROM {table_name} v LEFT JOIN vehicle_status vs ON vs.vehicle_id = v.id"
-        status_select = "vs.status"
-        fuel_select = "vs.fuel_level"
+        base_sql = f"FROM {table_name} v {status_join}"
+        status_select = f"{s}.status"
+        fuel_select = f"{s}.fuel_level"
     else:
         base_sql = f"FROM {table_name} v"
         status_select = "NULL AS status"
         fuel_select = "NULL AS fuel_level"
 
     where_clauses = []
-    params = []
-    if brand_keyword and table_name == "v_vehicle_i18n":
-        like_value = f"%{brand_keyword}%"
-        where_clauses.append(
-            "("
-            "v.brand_cn LIKE %s OR v.brand_jp LIKE %s OR v.brand_code LIKE %s "
-            "OR v.model_cn LIKE %s OR v.model_jp LIKE %s OR v.model_code LIKE %s"
-            ")"
-        )
-        params.extend([like_value] * 6)
-    if status and _vehicle_status_available():
-        where_clauses.append("vs.status = %s")
-        params.append(status)
-
+    # 品牌 / 车型关键字先由 n-gram 索引解析成 id，再走 brand_id / model_id 索引
+    keyword_clauses = []
+    if brand_slots:
+        keyword_clauses.append(f"v.brand_id IN ({', '.join(['%s'] * brand_slots)})")
+    if model_slots:
+        keyword_clauses.append(f"v.model_id IN ({', '.join(['%s'] * model_slots)})")
+    if keyword_clauses:
+        where_clauses.append(f"({' OR '.join(keyword_clauses)})")
+    if status_filter:
+        where_clauses.append(f"{s}.status = %s")
+
+    if count:
+        where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+        return f"SELECT COUNT(1) as total {base_sql} {where_sql}"
+
+    # keyset 分页：列表按 id 倒序，after = 更旧的一页，before = 更新的一页（倒着取再翻转）
+    if seek == "after":
+        where_clauses.append("v.id < %s")
+    elif seek == "before":
+        where_clauses.append("v.id > %s")
     where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+    order = "ASC" if seek == "before" else "DESC"
 
-    count_sql = f"SELECT COUNT(1) as total {base_sql} {where_sql}"
-    total_row = fetch_one(count_sql, tuple(params))
-    total = total_row["total"] if total_row else 0
-
-    offset = max(page - 1, 0) * per_page
-    if table_name == "v_vehicle_i18n":
-        select_fields = f"""
-          v.id, v.plate_no, v.vin, v.type_designation_code,
-          v.purchase_price, v.model_year_ad, v.garage_store_id,
-          v.brand_cn, v.brand_jp, v.model_cn, v.model_jp, v.color_cn, v.color_jp,
-          {status_select},
-          {fuel_select}
-        """
-    else:
-        select_fields = f"""
-          v.id, v.plate_no, v.vin, v.type_designation_code,
-          v.purchase_price, v.model_year_ad, v.garage_store_id,
-          {status_select},
-          {fuel_select}
-        """
-    sql = f"""
+    select_fields = f"""
+      {_projection_fields("card", table_name)},
+      {status_select},
+      {fuel_select}
+    """
+    return f"""
     SELECT {select_fields}
     {base_sql}
     {where_sql}
-    ORDER BY v.id DESC
-    LIMIT %s OFFSET %s
+    ORDER BY v.id {order}
+    LIMIT %s
+    """
+
+
+def _list_key(shape) -> str:
+    brand_slots, model_slots, status_filter = shape
+    return f"vehicle.list[brands={brand_slots},models={model_slots},status={int(status_filter)}]"
+
+
+def _list_vehicles_count_query(shape):
+    return query(f"{_list_key(shape)}.count", lambda: _list_vehicles_sql(shape, count=True))
+
+
+def _list_vehicles_page_query(shape, seek=None):
+    return query(
+        f"{_list_key(shape)}.{seek or 'first'}",
+        lambda: _list_vehicles_sql(shape, count=False, seek=seek),
+    )
+
+
+def _in_slots(ids) -> int:
+    # IN 列表长度按 2 的幂取整（不足处重复最后一个 id），注册表里的语句形状保持有限
+    return 1 << (len(ids) - 1).bit_length() if ids else 0
+
+
+def _padded(ids, slots):
+    return list(ids) + [ids[-1]] * (slots - len(ids)) if ids else []
+
+
+def _list_filter_params(filters):
+    """
+    (shape, params, matches_nothing) for the list queries. shape is
+    (brand IN slots, model IN slots, status filter on); matches_nothing is
+    True when the brand / model keyword hit no master data at all.
+    """
+    filters = filters or {}
+    brand_keyword = (filters.get("brand") or "").strip()
+    status = (filters.get("status") or "").strip()
+
+    brand_ids, model_ids = [], []
+    if brand_keyword:
+        try:
+            brand_ids, model_ids = search_brand_model(brand_keyword)
+        except Exception:
+            # 没有品牌 / 车型主数据时忽略关键字
+            brand_keyword = ""
+    status_filter = bool(status) and _vehicle_status_available()
+
+    shape = (_in_slots(brand_ids), _in_slots(model_ids), status_filter)
+    params = _padded(brand_ids, shape[0]) + _padded(model_ids, shape[1])
+    if status_filter:
+        params.append(status)
+    return shape, params, bool(brand_keyword) and not brand_ids and not model_ids
+
+
+# 列表总数依赖的表：写入任意一张都会让缓存的总数失效
+_LIST_COUNT_TABLES = ("vehicle", "vehicle_status", "vehicle_read", "md_brand", "md_model", "md_color")
+
+
+def count_vehicles(filters=None) -> int:
+    """Cached list total (see app.db.count_cache); may be an estimate when unfiltered."""
+    shape, params, matches_nothing = _list_filter_params(filters)
+    if matches_nothing:
+        return Count(0)
+
+    def _count():
+        total_row = fetch_one(_list_vehicles_count_query(shape), tuple(params))
+        return total_row["total"] if total_row else 0
+
+    return cached_count(
+        "vehicle.list",
+        _count,
+        _LIST_COUNT_TABLES,
+        filters={
+            "brand": (filters or {}).get("brand") if shape[0] or shape[1] else None,
+            "status": (filters or {}).get("status") if shape[2] else None,
+        },
+        estimate_table="vehicle",
+    )
+
+
+def _parse_list_cursor(cursor):
+    position = decode_cursor(cursor) or {}
+    seek = position.get("d")
+    seek_id = position.get("id")
+    page = position.get("p")
+    if seek not in ("after", "before") or not isinstance(seek_id, int):
+        return None, None, 1
+    return seek, seek_id, page if isinstance(page, int) and page > 1 else 1
+
+
+def list_vehicles(filters=None, per_page=20, cursor=None, with_total=True):
+    """
+    One page of the vehicle list, newest first. Pages seek on v.id instead of
+    using OFFSET, so a deep page costs the same as the first one.
+
+    `cursor` is a token from a previous call's cursors (None = first page).
+    Returns (rows, total, cursors): cursors holds the "next" / "prev" tokens
+    (None at either end) and the 1-based "page" number; total is None when
+    `with_total` is False.
     """
-    rows = fetch_all(sql, tuple(params + [per_page, offset]))
-    return rows, total
+    shape, params, matches_nothing = _list_filter_params(filters)
+    if matches_nothing:
+        return [], (Count(0) if with_total else None), {"page": 1, "next": None, "prev": None}
+    seek, seek_id, page = _parse_list_cursor(cursor)
+
+    rows = []
+    has_more = False
+    if seek is not None:
+        # 多取一行判断这个方向上是否还有下一页
+        rows = fetch_all(
+            _list_vehicles_page_query(shape, seek),
+            tuple(params + [seek_id, per_page + 1]),
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if seek == "before":
+            rows.reverse()
+    if seek is None or not rows or (seek == "before" and not has_more):
+        # 第一页；游标指向的行已被删光、或往前翻到了开头时也回到第一页
+        seek, page = None, 1
+        rows = fetch_all(
+            _list_vehicles_page_query(shape),
+            tuple(params + [per_page + 1]),
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+
+    has_next = has_more if seek != "before" else True
+    has_prev = seek is not None
+    cursors = {
+        "page": page,
+        "next": encode_cursor({"d": "after", "id": rows[-1]["id"], "p": page + 1}) if rows and has_next else None,
+        "prev": encode_cursor({"d": "before", "id": rows[0]["id"], "p": page - 1}) if rows and has_prev else None,
+    }
+    total = count_vehicles(filters) if with_total else None
+    return rows, total, cursors
 
 
 def get_status_counts():
@@ -169,44 +286,37 @@ def get_status_counts():
     return counts
 
 
-def get_vehicle_i18n(vehicle_id: int):
-    table_name = _vehicle_view_name()
-    sql = f"""
+_GET_VEHICLE_I18N = query(
+    "vehicle.get_i18n",
+    lambda: f"""
     SELECT *
-    FROM {table_name}
+    FROM {_vehicle_view_name()}
     WHERE id = %s
-    """
-    r = fetch_one(sql, (vehicle_id,))
-    if not r:
-        return None
-    return r
+    """,
+)
 
-def get_vehicle(vehicle_id: int):
-    sql = f"""
+_GET_VEHICLE = query(
+    "vehicle.get",
+    lambda: f"""
     SELECT {_select_columns()}
     FROM vehicle
     WHERE id = %s
-    """
-    r = fetch_one(sql, (vehicle_id,))
-    if not r:
-        return None
-    return r
+    """,
+)
 
-
-def get_vehicle_by_vin(vin: str):
-    sql = f"""
+_GET_VEHICLE_BY_VIN = query(
+    "vehicle.get_by_vin",
+    lambda: f"""
     SELECT {_select_columns()}
     FROM vehicle
     WHERE vin = %s
-    """
-    r = fetch_one(sql, (vin,))
-    if not r:
-        return None
-    return r
+    """,
+)
 
-def get_status(vehicle_id: int):
-    # 你若还没建 vehicle_status 表，可以先建空表或注释这段
-    sql = """
+# 你若还没建 vehicle_status 表，可以先建空表或注释这段
+_GET_STATUS = query(
+    "vehicle_status.get",
+    """
     SELECT status,
            mileage,
            fuel_level,
@@ -217,8 +327,133 @@ def get_status(vehicle_id: int):
            has_etc_card
     FROM vehicle_status
     WHERE vehicle_id = %s
+    """,
+)
+
+
+def get_vehicle_i18n(vehicle_id: int):
+    r = fetch_one(_GET_VEHICLE_I18N, (vehicle_id,))
+    if not r:
+        return None
+    return r
+
+def get_vehicle(vehicle_id: int):
+    r = fetch_one(_GET_VEHICLE, (vehicle_id,))
+    if not r:
+        return None
+    return r
+
+
+def get_vehicle_by_vin(vin: str):
+    r = fetch_one(_GET_VEHICLE_BY_VIN, (vin,))
+    if not r:
+        return None
+    return r
+
+def get_status(vehicle_id: int):
+    return fetch_one(_GET_STATUS, (vehicle_id,))
+
+
+# 命名投影：调用方只取自己要渲染的列，不再对 i18n 视图 SELECT *
+VEHICLE_PROJECTIONS = {
+    # 列表卡片
+    "card": (
+        "id", "plate_no", "vin", "type_designation_code", "purchase_price", "model_year_ad",
+        "garage_store_id", "brand_cn", "brand_jp", "model_cn", "model_jp", "color_cn", "color_jp",
+    ),
+    # 门户租车详情 / QR 详情页
+    "detail": (
+        "id", "vin", "plate_no", "model_year_ad", "garage_store_id", "store_name",
+        "brand_cn", "brand_jp", "model_cn", "model_jp", "note",
+    ),
+    # 租车下单算价：只需车辆所在门店
+    "pricing": ("id", "garage_store_id"),
+    # 租车申请里记录的车辆摘要
+    "booking": ("id", "vin", "brand_cn", "brand_jp", "model_cn", "model_jp", "model_year_ad"),
+}
+
+PROJECTION_CACHE_DEFAULTS = {
+    # 各投影按车辆 id 缓存的秒数（0 = 不缓存）；本进程内的写入会立即让缓存失效
+    "vehicle_card_cache_ttl_s": 30.0,
+    "vehicle_detail_cache_ttl_s": 30.0,
+    "vehicle_pricing_cache_ttl_s": 60.0,
+    "vehicle_booking_cache_ttl_s": 0.0,
+}
+
+_PROJECTION_TABLES = {
+    "vehicle", "vehicle_read", "md_brand", "md_model", "md_color", "md_enum", "store",
+}
+_PROJECTION_MAX_ENTRIES = 4096
+_PROJECTION_LOCK = threading.Lock()
+_projection_cache = {}
+_projection_generation = 0
+_projection_settings = None
+
+
+def _projection_fields(name: str, table_name: str, alias: str = "v") -> str:
+    """`alias.column` list for projection `name`, minus the columns `table_name` lacks (e.g. labels on bare vehicle)."""
+    columns = VEHICLE_PROJECTIONS[name]
+    try:
+        present = set(metadata.columns(table_name))
+    except Exception:
+        present = set()
+    if present:
+        columns = [c for c in columns if c in present]
+    return ", ".join(f"{alias}.{c}" for c in columns)
+
+
+def _projection_query(name: str):
+    return query(
+        f"vehicle.get_{name}",
+        lambda: f"""
+        SELECT {_projection_fields(name, _vehicle_view_name())}
+        FROM {_vehicle_view_name()} v
+        WHERE v.id = %s
+        """,
+    )
+
+
+_GET_VEHICLE_PROJECTIONS = {name: _projection_query(name) for name in VEHICLE_PROJECTIONS}
+
+
+def get_vehicle_projection(vehicle_id: int, projection: str, cached: bool = True):
+    """
+    The VEHICLE_PROJECTIONS[`projection`] columns of one vehicle, or None.
+    Served from a per-projection cache for vehicle_<projection>_cache_ttl_s
+    seconds; writes to the vehicle / label tables drop it. Pages that send
+    an ETag pass cached=False: other workers' writes do not reach this
+    cache, and a stale row must not be stamped with a fresh validator.
     """
-    return fetch_one(sql, (vehicle_id,))
+    global _projection_settings
+    if _projection_settings is None:
+        _projection_settings = _load_settings(PROJECTION_CACHE_DEFAULTS)
+    ttl = _projection_settings[f"vehicle_{projection}_cache_ttl_s"] if cached else 0
+    key = (projection, vehicle_id)
+
+    with _PROJECTION_LOCK:
+        generation = _projection_generation
+        entry = _projection_cache.get(key) if ttl > 0 else None
+    if entry is not None and entry[1] > time.monotonic():
+        return dict(entry[0]) if entry[0] else None
+
+    row = fetch_one(_GET_VEHICLE_PROJECTIONS[projection], (vehicle_id,))
+    if ttl > 0:
+        with _PROJECTION_LOCK:
+            # 查询期间有写入提交时不缓存
+            if _projection_generation == generation:
+                if len(_projection_cache) >= _PROJECTION_MAX_ENTRIES:
+                    _projection_cache.clear()
+                _projection_cache[key] = (row, time.monotonic() + ttl)
+    return dict(row) if row else None
+
+
+@on_write
+def _invalidate_projections(tables):
+    global _projection_generation
+    if tables & _PROJECTION_TABLES:
+        with _PROJECTION_LOCK:
+            _projection_cache.clear()
+            _projection_generation += 1
 
 
 def upsert_status(vehicle_id: int, payload: dict):
@@ -251,7 +486,11 @@ def upsert_status(vehicle_id: int, payload: dict):
     VALUES ({placeholders})
     ON DUPLICATE KEY UPDATE {updates}
     """
-    return execute(sql, tuple([vehicle_id] + values))
+    with transaction():
+        changed = execute(sql, tuple([vehicle_id] + values))
+        vehicle_read_repo.refresh([vehicle_id])
+        vehicle_version_repo.bump([vehicle_id])
+    return changed
 
 def update_vehicle(vehicle_id: int, payload: dict):
     fields = [c for c in _available_columns() if c != "id"]
@@ -266,7 +505,11 @@ def update_vehicle(vehicle_id: int, payload: dict):
     sets.append("updated_at = NOW()")
     params.append(vehicle_id)
     sql = f"UPDATE vehicle SET {', '.join(sets)} WHERE id = %s"
-    return execute(sql, tuple(params))
+    with transaction():
+        changed = execute(sql, tuple(params))
+        vehicle_read_repo.refresh([vehicle_id])
+        vehicle_version_repo.bump([vehicle_id])
+    return changed
 
 
 def create_vehicle(payload: dict):
@@ -281,7 +524,11 @@ def create_vehicle(payload: dict):
         return 0
     placeholders = ", ".join(["%s"] * len(values))
     sql = f"INSERT INTO vehicle ({', '.join(values)}) VALUES ({placeholders})"
-    return execute(sql, tuple(params))
+    with transaction():
+        vehicle_id = execute_insert(sql, tuple(params))
+        vehicle_read_repo.refresh([vehicle_id])
+        vehicle_version_repo.bump([vehicle_id])
+    return 1
 
 
 def delete_vehicles(vehicle_ids: list[int]):
@@ -289,27 +536,50 @@ def delete_vehicles(vehicle_ids: list[int]):
         return 0
     placeholders = ", ".join(["%s"] * len(vehicle_ids))
     sql = f"DELETE FROM vehicle WHERE id IN ({placeholders})"
-    return execute(sql, tuple(vehicle_ids))
+    with transaction():
+        changed = execute(sql, tuple(vehicle_ids))
+        vehicle_read_repo.refresh(vehicle_ids)
+    return changed
 
 
 def set_inactive_for_overdue_inspections(current_yyyymm: int):
     if not _vehicle_status_available():
         return 0
-    sql = """
-    UPDATE vehicle_status
-    SET status = 'inactive',
-        update_time = NOW(),
-        updated_by = NULL
-    WHERE inspection_due_yyyymm IS NOT NULL
-      AND inspection_due_yyyymm < %s
-      AND (status IS NULL OR status <> 'inactive')
-    """
-    return execute(sql, (current_yyyymm,))
+    with transaction():
+        # 先取出要改的车辆，只刷新这些行
+        rows = fetch_all(
+            """
+            SELECT vehicle_id
+            FROM vehicle_status
+            WHERE inspection_due_yyyymm IS NOT NULL
+              AND inspection_due_yyyymm < %s
+              AND (status IS NULL OR status <> 'inactive')
+            """,
+            (current_yyyymm,),
+        )
+        vehicle_ids = [row["vehicle_id"] for row in rows]
+        if not vehicle_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(vehicle_ids))
+        changed = execute(
+            f"""
+            UPDATE vehicle_status
+            SET status = 'inactive',
+                update_time = NOW(),
+                updated_by = NULL
+            WHERE vehicle_id IN ({placeholders})
+            """,
+            tuple(vehicle_ids),
+        )
+        vehicle_read_repo.refresh(vehicle_ids)
+        vehicle_version_repo.bump(vehicle_ids)
+    return changed
 
 
 def _base_due_query():
+    """(select fields, FROM ... with the status join, status alias) for the due-alert queries."""
     table_name = _vehicle_view_name()
-    if table_name == "v_vehicle_i18n":
+    if _has_labels(table_name):
         select_fields = """
             v.id, v.vin, v.plate_no,
             v.brand_jp, v.brand_cn, v.model_jp, v.model_cn
@@ -326,22 +596,22 @@ def _base_due_query():
             JOIN md_brand b ON b.id = v.brand_id
             JOIN md_model m ON m.id = v.model_id
         """
-    return select_fields, join_sql
+    status_join, s = _status_join(table_name, outer=False)
+    return select_fields, f"{join_sql} {status_join}", s
 
 
 def list_due_inspections(current_yyyymm: int, warn_yyyymm: int):
     if not _vehicle_status_available():
         return []
-    select_fields, join_sql = _base_due_query()
+    select_fields, join_sql, s = _base_due_query()
     sql = f"""
     SELECT {select_fields},
-           vs.inspection_due_yyyymm
+           {s}.inspection_due_yyyymm
     {join_sql}
-    JOIN vehicle_status vs ON vs.vehicle_id = v.id
-    WHERE vs.inspection_due_yyyymm IS NOT NULL
-      AND vs.inspection_due_yyyymm <= %s
-    ORDER BY (vs.inspection_due_yyyymm < %s) DESC,
-             vs.inspection_due_yyyymm ASC
+    WHERE {s}.inspection_due_yyyymm IS NOT NULL
+      AND {s}.inspection_due_yyyymm <= %s
+    ORDER BY ({s}.inspection_due_yyyymm < %s) DESC,
+             {s}.inspection_due_yyyymm ASC
     """
     return fetch_all(sql, (warn_yyyymm, current_yyyymm))
 
@@ -349,15 +619,119 @@ def list_due_inspections(current_yyyymm: int, warn_yyyymm: int):
 def list_due_insurance(current_date, warn_date):
     if not _vehicle_status_available():
         return []
-    select_fields, join_sql = _base_due_query()
+    select_fields, join_sql, s = _base_due_query()
     sql = f"""
     SELECT {select_fields},
-           vs.insurance_due_date
+           {s}.insurance_due_date
     {join_sql}
-    JOIN vehicle_status vs ON vs.vehicle_id = v.id
-    WHERE vs.insurance_due_date IS NOT NULL
-      AND vs.insurance_due_date >= %s
-      AND vs.insurance_due_date <= %s
-    ORDER BY vs.insurance_due_date ASC
+    WHERE {s}.insurance_due_date IS NOT NULL
+      AND {s}.insurance_due_date >= %s
+      AND {s}.insurance_due_date <= %s
+    ORDER BY {s}.insurance_due_date ASC
     """
     return fetch_all(sql, (current_date, warn_date))
+
+
+DASHBOARD_DEFAULTS = {
+    # 仪表盘统计的缓存秒数（0 = 不缓存）；本进程内的写入会立即让缓存失效
+    "dashboard_stats_ttl_s": 30.0,
+}
+
+_DASHBOARD_TABLES = {"vehicle", "vehicle_status", "vehicle_read", "md_brand", "md_model"}
+_DASHBOARD_LOCK = threading.Lock()
+_dashboard_cache = {"key": None, "value": None, "expires": 0.0, "generation": 0}
+_dashboard_settings = None
+
+
+def _dashboard_stats_sql() -> str:
+    if not _vehicle_status_available():
+        return "SELECT 'total' AS kind, COUNT(1) AS total FROM vehicle"
+    select_fields, join_sql, s = _base_due_query()
+    blank_vehicle = "NULL, NULL, NULL, NULL, NULL, NULL, NULL"
+    # 一次往返：总数、状态分布、车检 / 保险提醒按 kind 拼在一个 UNION ALL 里
+    return f"""
+    SELECT 'total' AS kind, NULL AS status, COUNT(1) AS total,
+           NULL AS id, NULL AS vin, NULL AS plate_no,
+           NULL AS brand_jp, NULL AS brand_cn, NULL AS model_jp, NULL AS model_cn,
+           NULL AS inspection_due_yyyymm, NULL AS insurance_due_date
+    FROM vehicle
+    UNION ALL
+    SELECT 'status', status, COUNT(1), {blank_vehicle}, NULL, NULL
+    FROM vehicle_status
+    WHERE status IN ('available', 'rented', 'maintenance')
+    GROUP BY status
+    UNION ALL
+    SELECT 'inspection', NULL, NULL, {select_fields}, {s}.inspection_due_yyyymm, NULL
+    {join_sql}
+    WHERE {s}.inspection_due_yyyymm IS NOT NULL
+      AND {s}.inspection_due_yyyymm <= %s
+    UNION ALL
+    SELECT 'insurance', NULL, NULL, {select_fields}, NULL, {s}.insurance_due_date
+    {join_sql}
+    WHERE {s}.insurance_due_date IS NOT NULL
+      AND {s}.insurance_due_date >= %s
+      AND {s}.insurance_due_date <= %s
+    """
+
+
+_DASHBOARD_STATS = query("vehicle.dashboard_stats", _dashboard_stats_sql)
+
+
+def _load_dashboard_stats(current_yyyymm: int, warn_yyyymm: int, current_date, warn_date) -> dict:
+    params = (warn_yyyymm, current_date, warn_date) if _vehicle_status_available() else ()
+    stats = {
+        "total": 0,
+        "status_counts": {"available": 0, "rented": 0, "maintenance": 0},
+        "due_inspections": [],
+        "due_insurance": [],
+    }
+    for row in fetch_all(_DASHBOARD_STATS, params):
+        kind = row["kind"]
+        if kind == "total":
+            stats["total"] = int(row["total"] or 0)
+        elif kind == "status":
+            stats["status_counts"][row["status"]] = int(row["total"] or 0)
+        elif kind == "inspection":
+            stats["due_inspections"].append(row)
+        elif kind == "insurance":
+            stats["due_insurance"].append(row)
+    # 与 list_due_inspections / list_due_insurance 的排序一致：已过期的在前
+    stats["due_inspections"].sort(
+        key=lambda row: (int(row["inspection_due_yyyymm"]) >= current_yyyymm, int(row["inspection_due_yyyymm"]))
+    )
+    stats["due_insurance"].sort(key=lambda row: row["insurance_due_date"])
+    return stats
+
+
+def get_dashboard_stats(current_yyyymm: int, warn_yyyymm: int, current_date, warn_date) -> dict:
+    """
+    Everything the dashboard shows in one round trip: {"total", "status_counts",
+    "due_inspections", "due_insurance"} (the alert lists have the rows of
+    list_due_inspections / list_due_insurance). Cached for
+    dashboard_stats_ttl_s seconds; treat the result as read-only.
+    """
+    global _dashboard_settings
+    if _dashboard_settings is None:
+        _dashboard_settings = _load_settings(DASHBOARD_DEFAULTS)
+    ttl = _dashboard_settings["dashboard_stats_ttl_s"]
+    key = (current_yyyymm, warn_yyyymm, current_date, warn_date)
+
+    with _DASHBOARD_LOCK:
+        cache = dict(_dashboard_cache)
+    if cache["key"] == key and cache["expires"] > time.monotonic():
+        return cache["value"]
+
+    stats = _load_dashboard_stats(current_yyyymm, warn_yyyymm, current_date, warn_date)
+    if ttl > 0:
+        with _DASHBOARD_LOCK:
+            # 计算期间有写入提交时不缓存
+            if _dashboard_cache["generation"] == cache["generation"]:
+                _dashboard_cache.update(key=key, value=stats, expires=time.monotonic() + ttl)
+    return stats
+
+
+@on_write
+def _invalidate_dashboard_stats(tables):
+    if tables & _DASHBOARD_TABLES:
+        with _DASHBOARD_LOCK:
+            _dashboard_cache.update(key=None, value=None, generation=_dashboard_cache["generation"] + 1)
@@ -0,0 +1,76 @@
+# app/repositories/vehicle_search_repo.py
+import time
+import threading
+
+from app.db.mysql import _load_settings, fetch_all, on_write
+from app.utils.ngram import NgramIndex
+
+SEARCH_DEFAULTS = {
+    # 其他 worker 修改品牌 / 车型后，本进程最迟这么久重建索引
+    "search_index_ttl_s": 300.0,
+}
+
+_INDEX_TABLES = {"md_brand", "md_model"}
+
+_LOCK = threading.Lock()
+_INDEX = None
+_settings = None
+
+
+class _BrandModelIndex:
+    __slots__ = ("brands", "models", "expires")
+
+    def __init__(self, brands, models, expires):
+        self.brands = brands
+        self.models = models
+        self.expires = expires
+
+
+def _get_settings():
+    global _settings
+    if _settings is None:
+        _settings = _load_settings(SEARCH_DEFAULTS)
+    return _settings
+
+
+def _build():
+    brands = fetch_all("SELECT id, brand_code, name_cn, name_jp FROM md_brand")
+    models = fetch_all("SELECT id, model_code, name_cn, name_jp FROM md_model")
+    return _BrandModelIndex(
+        NgramIndex({row["id"]: (row["brand_code"], row["name_cn"], row["name_jp"]) for row in brands}),
+        NgramIndex({row["id"]: (row["model_code"], row["name_cn"], row["name_jp"]) for row in models}),
+        time.monotonic() + _get_settings()["search_index_ttl_s"],
+    )
+
+
+def _index():
+    global _INDEX
+    index = _INDEX
+    if index is None or index.expires <= time.monotonic():
+        with _LOCK:
+            index = _INDEX
+            if index is None or index.expires <= time.monotonic():
+                index = _INDEX = _build()
+    return index
+
+
+def search_brand_model(keyword: str):
+    """
+    Brand ids and model ids whose code / CN / JP name contains `keyword`
+    (case- and width-insensitive). Served from an in-process n-gram index
+    over md_brand / md_model, rebuilt after writes to those tables.
+    """
+    index = _index()
+    return sorted(index.brands.search(keyword)), sorted(index.models.search(keyword))
+
+
+def invalidate():
+    global _INDEX
+    with _LOCK:
+        _INDEX = None
+
+
+@on_write
+def _invalidate_on_write(tables):
+    if tables & _INDEX_TABLES:
+        invalidate()
@@ -52,3 +52,8 @@ class FieldPermissionService:
 
     def can_edit(self, table: str, field: str) -> bool:
         return self.get_access_level(table, field) >= 20
+
+    def fingerprint(self) -> tuple:
+        """Hashable summary of the access levels, for cache validators."""
+        rules = sorted((table, field, int(row.get("access_level") or 0)) for (table, field), row in self._rules.items())
+        return (self.role, tuple(rules))
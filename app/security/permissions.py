@@ -25,3 +25,7 @@ class PermissionService:
         if self.role == "admin":
             return True
         return (module, action) in self._permissions
+
+    def fingerprint(self) -> tuple:
+        """Hashable summary of what can() answers, for cache validators."""
+        return (self.role, tuple(sorted(self._permissions)))
@@ -0,0 +1,20 @@
+import base64
+import json
+
+
+def encode_cursor(position: dict) -> str:
+    """Opaque, URL-safe token for a keyset pagination position."""
+    raw = json.dumps(position, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token) -> dict | None:
+    """Position dict for `token`; None when it is missing or not a cursor we issued."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        position = json.loads(raw.decode("utf-8"))
+    except (ValueError, TypeError):
+        return None
+    return position if isinstance(position, dict) else None
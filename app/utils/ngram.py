@@ -0,0 +1,53 @@
+import unicodedata
+
+
+def normalize_text(text) -> str:
+    """NFKC + casefold: full-width codes and kana forms compare like their plain forms."""
+    return unicodedata.normalize("NFKC", str(text or "")).casefold()
+
+
+def ngrams(text: str, n: int = 2) -> set[str]:
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NgramIndex:
+    """
+    In-memory bigram inverted index over short texts (CJK names, codes).
+    search() intersects the posting lists of the keyword's bigrams, then
+    checks the surviving candidates for the whole substring, so results
+    match `LIKE '%keyword%'` on any of a document's texts.
+    """
+
+    def __init__(self, documents: dict):
+        # documents: key -> iterable of texts
+        self._texts = {}
+        self._postings = {}
+        self._chars = {}
+        for key, texts in documents.items():
+            normalized = [t for t in (normalize_text(text) for text in texts) if t]
+            self._texts[key] = normalized
+            for text in normalized:
+                for gram in ngrams(text):
+                    self._postings.setdefault(gram, set()).add(key)
+                for char in text:
+                    self._chars.setdefault(char, set()).add(key)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def search(self, keyword) -> set:
+        keyword = normalize_text(keyword).strip()
+        if not keyword:
+            return set(self._texts)
+        if len(keyword) == 1:
+            return set(self._chars.get(keyword, ()))
+
+        candidates = None
+        # 先从最短的倒排表开始求交集
+        for posting in sorted((self._postings.get(gram, set()) for gram in ngrams(keyword)), key=len):
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                return set()
+        return {key for key in candidates if any(keyword in text for text in self._texts[key])}
@@ -0,0 +1,101 @@
+import os
+import logging
+import tempfile
+
+from werkzeug.security import safe_join
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow 未安装时一律返回原图
+    Image = None
+
+log = logging.getLogger(__name__)
+
+# 固定宽度的派生尺寸；模板按图位大小选用最小够用的一档
+IMAGE_SIZES = {
+    "thumb": 320,
+    "medium": 960,
+}
+
+# 派生图放在原图所在目录下，随目录一起搬移（VIN 变更时整个分类目录会被移动）
+DERIVED_DIR = "_derived"
+
+_QUALITY = 82
+
+
+def _format():
+    if Image is not None and features.check("webp"):
+        return "WEBP", "webp"
+    return "JPEG", "jpg"
+
+
+def derivative_path(dir_path: str, filename: str, size: str) -> str | None:
+    """Where the `size` derivative of dir_path/filename lives (None for an unknown size or unsafe name)."""
+    if size not in IMAGE_SIZES:
+        return None
+    _, ext = _format()
+    return safe_join(dir_path, DERIVED_DIR, size, f"{os.path.basename(filename)}.{ext}")
+
+
+def _render(source: str, target: str, width: int):
+    pil_format, _ = _format()
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        if pil_format == "JPEG" or img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if pil_format == "WEBP" and "A" in img.getbands() else "RGB")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # 先写临时文件再替换，并发请求（含同进程的多个线程）不会读到写了一半的图
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, pil_format, quality=_QUALITY)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def ensure_derivative(dir_path: str, filename: str, size: str) -> str | None:
+    """
+    Path of the `size` derivative of dir_path/filename, rendering it first if
+    it is missing or older than the original. None when it cannot be made
+    (unknown size, missing original, not an image, Pillow not installed);
+    callers then serve the original.
+    """
+    if Image is None:
+        return None
+    source = safe_join(dir_path, filename)
+    target = derivative_path(dir_path, filename, size)
+    if source is None or target is None or not os.path.isfile(source):
+        return None
+    try:
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+            return target
+        _render(source, target, IMAGE_SIZES[size])
+        return target
+    except OSError:
+        # 不是图片（如 PDF）或文件损坏
+        return None
+    except Exception:
+        log.warning("Could not render %s derivative of %s", size, source, exc_info=True)
+        return None
+
+
+def create_derivatives(dir_path: str, filenames):
+    """Renders every size for freshly saved uploads."""
+    for name in filenames:
+        for size in IMAGE_SIZES:
+            ensure_derivative(dir_path, name, size)
+
+
+def remove_derivatives(dir_path: str, filenames):
+    for name in filenames:
+        if not name:
+            continue
+        for size in IMAGE_SIZES:
+            path = derivative_path(dir_path, name, size)
+            if path and os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,126 @@
+# app/vehicle_images.py
+"""
+Serving vehicle images from db/image/<vin>/<category>/ for the staff and
+portal image routes. URLs built with vehicle_image_url() carry the content
+hash of the original file (?v=...), so those responses are cached by the
+browser as immutable; when the file changes the hash and URL change with it.
+Unversioned (legacy) URLs get a strong content ETag and are revalidated.
+"""
+import os
+import hashlib
+import threading
+
+from flask import abort, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+from .utils.thumbnails import IMAGE_SIZES, ensure_derivative
+
+PHOTO_DIR_CATEGORY = "vehicle_photo"
+LEGACY_PHOTO_DIR_CATEGORY = "Vehicle_photo"
+IMAGE_CATEGORIES = {"legal_doc", PHOTO_DIR_CATEGORY, LEGACY_PHOTO_DIR_CATEGORY}
+
+# 带版本号的 URL 内容永不变化，缓存一年
+VERSIONED_MAX_AGE_S = 365 * 24 * 3600
+
+_VERSION_MAX_ENTRIES = 8192
+_LOCK = threading.Lock()
+_VERSIONS = {}
+
+
+def _image_base_dir():
+    return os.path.join(os.getcwd(), "db", "image")
+
+
+def _safe_vin(vin: str) -> str:
+    return "".join([c if c.isalnum() or c in ("-", "_") else "_" for c in vin])
+
+
+def image_dir(vin: str, category: str, filename: str) -> str:
+    """Directory holding `filename`; photos may still sit in the legacy-cased directory."""
+    base_dir = os.path.join(_image_base_dir(), _safe_vin(vin))
+    if category == "legal_doc":
+        return os.path.join(base_dir, category)
+    candidate_dirs = [
+        os.path.join(base_dir, PHOTO_DIR_CATEGORY),
+        os.path.join(base_dir, LEGACY_PHOTO_DIR_CATEGORY),
+    ]
+    for candidate in candidate_dirs:
+        if os.path.exists(os.path.join(candidate, filename)):
+            return candidate
+    return candidate_dirs[0]
+
+
+def file_version(path: str) -> str | None:
+    """Short SHA-256 of the file's content, re-hashed only when its mtime / size change."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _LOCK:
+        cached = _VERSIONS.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    version = digest.hexdigest()[:16]
+    with _LOCK:
+        if len(_VERSIONS) >= _VERSION_MAX_ENTRIES:
+            _VERSIONS.clear()
+        _VERSIONS[path] = (signature, version)
+    return version
+
+
+def vehicle_image_url(endpoint: str, vin: str, category: str, filename: str, size: str | None = None) -> str:
+    """URL of an image route for `filename`, versioned with the original's content hash when it exists."""
+    args = {"vin": vin, "category": category, "filename": filename}
+    if size in IMAGE_SIZES:
+        args["size"] = size
+    source = safe_join(image_dir(vin, category, filename), filename)
+    version = file_version(source) if source else None
+    if version:
+        args["v"] = version
+    return url_for(endpoint, **args)
+
+
+def send_vehicle_image(vin: str, category: str, filename: str, public: bool):
+    """
+    Response for an image route: the `size` derivative when requested (and
+    renderable), else the original. A ?v= matching the current content hash
+    is served immutable for a year; anything else must revalidate against
+    the content ETag.
+    """
+    if category not in IMAGE_CATEGORIES:
+        abort(404)
+    dir_path = image_dir(vin, category, filename)
+    source = safe_join(dir_path, filename)
+    version = file_version(source) if source else None
+    if version is None:
+        abort(404)
+
+    size = request.args.get("size")
+    derived = ensure_derivative(dir_path, filename, size) if size else None
+    if derived:
+        serve_dir, serve_name, etag = os.path.dirname(derived), os.path.basename(derived), f"{version}.{size}"
+    else:
+        serve_dir, serve_name, etag = dir_path, filename, version
+
+    if request.args.get("v") == version:
+        response = send_from_directory(serve_dir, serve_name, etag=etag, max_age=VERSIONED_MAX_AGE_S)
+        response.cache_control.immutable = True
+    else:
+        # 无版本号的旧 URL 或已过期的版本号：按内容 ETag 每次校验
+        response = send_from_directory(serve_dir, serve_name, etag=etag, max_age=0)
+        response.cache_control.no_cache = True
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+    return response
+
+
+def init_app(app):
+    app.add_template_global(vehicle_image_url)
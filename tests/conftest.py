@@ -0,0 +1,56 @@
+# tests/conftest.py
+"""
+Tests run against the SQLite stand-in (DB_BACKEND=sqlite), so no MySQL
+server is needed. The environment is set before `app` is imported: the
+connection pool reads its settings on first use.
+"""
+import os
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="vehicle_tests_")
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["DB_SQLITE_PATH"] = os.path.join(_DB_DIR, "standin.db")
+os.environ["DB_JOB_SCHEDULER"] = "0"
+os.environ.pop("DB_AUTO_MIGRATE", None)
+
+
+@pytest.fixture(scope="session")
+def migrated():
+    from app.db.migrations import migrate
+    migrate()
+
+
+@pytest.fixture(scope="session")
+def app(migrated):
+    from app import create_app
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        # 迁移种子里的第一个用户即管理员
+        sess["user_id"] = 1
+    return client
+
+
+@pytest.fixture(scope="session")
+def brand_model(migrated):
+    """(brand_id, model_id) of a master-data pair vehicles in tests can point at."""
+    from app.db.mysql import fetch_one
+    from app.repositories.master_data_repo import create_brand, create_model
+    create_brand("TESTBRAND", "测试品牌", "テストブランド", True)
+    brand_id = fetch_one("SELECT id FROM md_brand WHERE brand_code = %s", ("TESTBRAND",))["id"]
+    create_model(brand_id, "TESTMODEL", "测试车型", "テストモデル", True)
+    model_id = fetch_one("SELECT id FROM md_model WHERE model_code = %s", ("TESTMODEL",))["id"]
+    return brand_id, model_id
@@ -0,0 +1,39 @@
+"""Boots the app on the SQLite stand-in after migrations and requests a few pages."""
+import pytest
+
+from app.db.migrations import current_version, latest_version
+
+
+def test_migrations_reach_latest_version(migrated):
+    assert current_version() == latest_version()
+
+
+def test_url_map_has_no_duplicate_rules(app):
+    seen = set()
+    for rule in app.url_map.iter_rules():
+        key = (rule.rule, tuple(sorted(rule.methods - {"HEAD", "OPTIONS"})))
+        assert key not in seen, rule.rule
+        seen.add(key)
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/portal", "/portal/rentals", "/portal/repair", "/portal/trade", "/portal/customer-login", "/login"],
+)
+def test_public_pages_render(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/dashboard", "/vehicle/list", "/vehicle/new", "/admin/dictionaries", "/admin/users", "/admin/audit-log"],
+)
+def test_staff_pages_render(admin_client, path):
+    response = admin_client.get(path)
+    assert response.status_code == 200
+
+
+def test_staff_pages_require_login(client):
+    response = client.get("/dashboard")
+    assert response.status_code in (302, 401, 403)
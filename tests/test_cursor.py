@@ -0,0 +1,165 @@
+"""Keyset pagination: app/utils/cursor.py and list_vehicles(..., cursor=...)."""
+import base64
+import json
+
+import pytest
+
+from app.db.mysql import fetch_all
+from app.repositories.vehicle_repo import create_vehicle, delete_vehicles, list_vehicles, upsert_status
+from app.utils.cursor import decode_cursor, encode_cursor
+
+PER_PAGE = 4
+
+
+# ---- encode / decode ----
+
+@pytest.mark.parametrize(
+    "position",
+    [
+        {"d": "after", "id": 42, "p": 3},
+        {"d": "before", "id": 1, "p": 1},
+        {"label": "品牌 / ブランド", "nested": {"a": [1, 2]}},
+        {},
+    ],
+)
+def test_round_trip(position):
+    token = encode_cursor(position)
+    assert decode_cursor(token) == position
+
+
+def test_token_is_url_safe_and_unpadded():
+    token = encode_cursor({"d": "after", "id": 10 ** 12, "p": 99, "x": "??>>"})
+    assert "=" not in token
+    assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def test_token_does_not_depend_on_key_order():
+    assert encode_cursor({"d": "after", "id": 5, "p": 2}) == encode_cursor({"p": 2, "id": 5, "d": "after"})
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        None,
+        "",
+        "garbage!!",
+        "%%%",
+        encode_cursor({"d": "after", "id": 5})[:-3] + "~~~",
+        base64.urlsafe_b64encode(b"\xff\xfe\xfd").decode("ascii"),
+        base64.urlsafe_b64encode(b"not json").decode("ascii"),
+        base64.urlsafe_b64encode(json.dumps([1, 2, 3]).encode()).decode("ascii"),
+        base64.urlsafe_b64encode(json.dumps("after").encode()).decode("ascii"),
+    ],
+)
+def test_invalid_tokens_decode_to_none(token):
+    assert decode_cursor(token) is None
+
+
+# ---- list_vehicles ----
+
+@pytest.fixture(scope="module")
+def fleet(brand_model):
+    brand_id, model_id = brand_model
+    # 除 id 外各列都相同：排序键之外全部并列
+    for i in range(PER_PAGE * 3 + 1):
+        create_vehicle({"vin": f"CURSOR{i:04d}", "brand_id": brand_id, "model_id": model_id})
+    for vehicle_id in _all_ids():
+        upsert_status(vehicle_id, {"status": "available" if vehicle_id % 2 else "maintenance"})
+
+
+def _all_ids(where=""):
+    return [
+        row["id"]
+        for row in fetch_all(
+            f"SELECT v.id FROM vehicle v LEFT JOIN vehicle_status vs ON vs.vehicle_id = v.id {where} ORDER BY v.id DESC"
+        )
+    ]
+
+
+def _walk(filters=None):
+    pages = []
+    rows, _, cursors = list_vehicles(filters, per_page=PER_PAGE, with_total=False)
+    pages.append(([row["id"] for row in rows], cursors))
+    while cursors["next"]:
+        rows, _, cursors = list_vehicles(filters, per_page=PER_PAGE, cursor=cursors["next"], with_total=False)
+        pages.append(([row["id"] for row in rows], cursors))
+    return pages
+
+
+def test_next_walks_every_row_once_in_order(fleet):
+    pages = _walk()
+    walked = [vehicle_id for ids, _ in pages for vehicle_id in ids]
+    assert walked == _all_ids()
+    assert [cursors["page"] for _, cursors in pages] == list(range(1, len(pages) + 1))
+    assert all(len(ids) == PER_PAGE for ids, _ in pages[:-1])
+    assert pages[0][1]["prev"] is None
+    assert pages[-1][1]["next"] is None
+
+
+def test_prev_returns_the_same_pages_backwards(fleet):
+    pages = _walk()
+    ids, cursors = pages[-1]
+    for expected_ids, expected_cursors in reversed(pages[:-1]):
+        rows, _, cursors = list_vehicles(per_page=PER_PAGE, cursor=cursors["prev"], with_total=False)
+        assert [row["id"] for row in rows] == expected_ids
+        assert cursors["page"] == expected_cursors["page"]
+    assert cursors["page"] == 1
+    assert cursors["prev"] is None
+
+
+def test_prev_from_a_short_first_page_lands_on_first_page(fleet):
+    first_ids, _ = _walk()[0]
+    # 前面只剩一行、不足一页：回到第一页，而不是只显示那一行
+    token = encode_cursor({"d": "before", "id": first_ids[1], "p": 2})
+    rows, _, cursors = list_vehicles(per_page=PER_PAGE, cursor=token, with_total=False)
+    assert [row["id"] for row in rows] == first_ids
+    assert cursors["page"] == 1 and cursors["prev"] is None
+
+
+def test_filtered_walk_covers_only_matching_rows(fleet):
+    pages = _walk({"status": "available"})
+    walked = [vehicle_id for ids, _ in pages for vehicle_id in ids]
+    assert walked == _all_ids("WHERE vs.status = 'available'")
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "garbage!!",
+        encode_cursor({"d": "sideways", "id": 5, "p": 2}),
+        encode_cursor({"d": "after", "id": "5; DROP TABLE vehicle", "p": 2}),
+        encode_cursor({"d": "after", "p": 2}),
+        encode_cursor(["after", 5]),
+    ],
+)
+def test_invalid_cursor_falls_back_to_first_page(fleet, token):
+    first_ids, first = _walk()[0]
+    rows, _, cursors = list_vehicles(per_page=PER_PAGE, cursor=token, with_total=False)
+    assert [row["id"] for row in rows] == first_ids
+    assert cursors == first
+
+
+def test_tampered_page_number_is_clamped(fleet):
+    ids = _all_ids()
+    token = encode_cursor({"d": "after", "id": ids[PER_PAGE - 1], "p": -7})
+    rows, _, cursors = list_vehicles(per_page=PER_PAGE, cursor=token, with_total=False)
+    assert [row["id"] for row in rows] == ids[PER_PAGE:PER_PAGE * 2]
+    assert cursors["page"] == 1
+
+
+def test_cursor_row_deleted_between_requests(fleet, brand_model):
+    brand_id, model_id = brand_model
+    for vin in ("CURSORGONE1", "CURSORGONE2"):
+        create_vehicle({"vin": vin, "brand_id": brand_id, "model_id": model_id})
+    ids = _all_ids()
+    _, _, cursors = list_vehicles(per_page=1, with_total=False)
+    delete_vehicles([ids[0]])
+    rows, _, _ = list_vehicles(per_page=1, cursor=cursors["next"], with_total=False)
+    assert [row["id"] for row in rows] == [ids[1]]
+
+
+def test_cursor_past_the_last_row_falls_back_to_first_page(fleet):
+    token = encode_cursor({"d": "after", "id": min(_all_ids()), "p": 9})
+    rows, _, cursors = list_vehicles(per_page=PER_PAGE, cursor=token, with_total=False)
+    assert [row["id"] for row in rows] == _all_ids()[:PER_PAGE]
+    assert cursors["page"] == 1
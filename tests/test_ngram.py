@@ -0,0 +1,161 @@
+"""app/utils/ngram.py and the brand / model search built on it."""
+import pytest
+
+from app.db.mysql import fetch_one
+from app.utils.ngram import NgramIndex, ngrams, normalize_text
+
+
+# ---- normalize_text / ngrams ----
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("TOYOTA", "toyota"),
+        ("ＴＯＹＯＴＡ", "toyota"),
+        ("Ｐｒｉｕｓ　Ａ", "prius a"),
+        ("ﾌﾟﾘｳｽ", "プリウス"),
+        ("ｶﾛｰﾗ", "カローラ"),
+        ("丰田", "丰田"),
+        ("Ｘ－１２３", "x-123"),
+        (None, ""),
+        (123, "123"),
+    ],
+)
+def test_normalize_text_folds_case_and_width(raw, expected):
+    assert normalize_text(raw) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("prius", {"pr", "ri", "iu", "us"}),
+        ("プリウス", {"プリ", "リウ", "ウス"}),
+        ("普锐斯", {"普锐", "锐斯"}),
+        ("gr86カローラ", {"gr", "r8", "86", "6カ", "カロ", "ロー", "ーラ"}),
+        ("aaaa", {"aa"}),
+    ],
+)
+def test_bigrams_split_latin_kana_and_kanji(text, expected):
+    assert ngrams(text) == expected
+
+
+def test_text_shorter_than_n_is_its_own_gram():
+    assert ngrams("丰") == {"丰"}
+    assert ngrams("ab", n=3) == {"ab"}
+    assert ngrams("") == set()
+
+
+def test_trigrams():
+    assert ngrams("abcd", n=3) == {"abc", "bcd"}
+
+
+# ---- NgramIndex ----
+
+@pytest.fixture
+def index():
+    return NgramIndex(
+        {
+            1: ("TOYOTA", "丰田", "トヨタ"),
+            2: ("HONDA", "本田", "ホンダ"),
+            3: ("PRIUS", "普锐斯", "プリウス"),
+            4: ("GR86", "", None),
+            5: ("ab", "cd"),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "keyword, expected",
+    [
+        ("toyota", {1}),
+        ("OYO", {1}),
+        ("丰田", {1}),
+        ("田", {1, 2}),
+        ("トヨ", {1}),
+        ("ンダ", {2}),
+        ("プリウス", {3}),
+        ("锐斯", {3}),
+        ("r8", {4}),
+        ("86", {4}),
+    ],
+)
+def test_search_substrings(index, keyword, expected):
+    assert index.search(keyword) == expected
+
+
+@pytest.mark.parametrize(
+    "keyword, expected",
+    [
+        ("ＴＯＹＯＴＡ", {1}),
+        ("Toyota", {1}),
+        ("ﾄﾖﾀ", {1}),
+        ("ﾌﾟﾘｳｽ", {3}),
+        ("ｇｒ８６", {4}),
+        ("  honda  ", {2}),
+    ],
+)
+def test_search_ignores_case_and_width(index, keyword, expected):
+    assert index.search(keyword) == expected
+
+
+def test_single_character_keyword_uses_character_postings(index):
+    # 短于 n 的关键字不能走 bigram 倒排表
+    assert index.search("o") == {1, 2}
+    assert index.search("Ｏ") == {1, 2}
+    assert index.search("ス") == {3}
+    assert index.search("z") == set()
+
+
+def test_blank_keyword_matches_everything(index):
+    assert index.search("") == {1, 2, 3, 4, 5}
+    assert index.search("　 ") == {1, 2, 3, 4, 5}
+    assert index.search(None) == {1, 2, 3, 4, 5}
+
+
+def test_all_bigrams_present_but_not_as_substring():
+    # ab / bc / cd 都在倒排表里命中，但 "abcd" 不是子串
+    assert NgramIndex({1: ("xab abc bcd",)}).search("abcd") == set()
+
+
+def test_match_does_not_span_texts(index):
+    # "ab" 和 "cd" 是同一文档的两个文本，"abcd" 不能跨文本拼接
+    assert index.search("bc") == set()
+    assert index.search("abcd") == set()
+    assert index.search("cd") == {5}
+
+
+def test_empty_texts_are_ignored():
+    index = NgramIndex({1: ("", None), 2: ("a",)})
+    assert len(index) == 2
+    assert index.search("a") == {2}
+
+
+# ---- vehicle_search_repo ----
+
+@pytest.fixture(scope="module")
+def search_master_data(migrated):
+    from app.repositories.master_data_repo import create_brand, create_model
+    create_brand("NGTOYOTA", "丰田汽车", "トヨタ自動車", True)
+    brand_id = fetch_one("SELECT id FROM md_brand WHERE brand_code = %s", ("NGTOYOTA",))["id"]
+    create_model(brand_id, "NGPRIUS", "普锐斯", "プリウス", True)
+    model_id = fetch_one("SELECT id FROM md_model WHERE model_code = %s", ("NGPRIUS",))["id"]
+    return brand_id, model_id
+
+
+def test_search_brand_model(search_master_data):
+    from app.repositories.vehicle_search_repo import search_brand_model
+    brand_id, model_id = search_master_data
+    assert search_brand_model("ngtoyota") == ([brand_id], [])
+    assert search_brand_model("ﾄﾖﾀ自動") == ([brand_id], [])
+    assert search_brand_model("普锐") == ([], [model_id])
+    assert search_brand_model("ＮＧＰＲＩＵＳ") == ([], [model_id])
+    assert search_brand_model("no such brand") == ([], [])
+
+
+def test_search_index_is_rebuilt_after_a_write(search_master_data):
+    from app.repositories.master_data_repo import create_brand
+    from app.repositories.vehicle_search_repo import search_brand_model
+    assert search_brand_model("NGLEXUS") == ([], [])
+    create_brand("NGLEXUS", "雷克萨斯", "レクサス", True)
+    brand_id = fetch_one("SELECT id FROM md_brand WHERE brand_code = %s", ("NGLEXUS",))["id"]
+    assert search_brand_model("ﾚｸｻｽ") == ([brand_id], [])
@@ -0,0 +1,118 @@
+"""translate(): MySQL dialect -> SQLite statements."""
+import sqlite3
+
+from app.db.sqlite_standin import translate
+
+
+def test_placeholders_become_qmarks():
+    assert translate("SELECT id FROM vehicle WHERE vin = %s AND id > %s") == (
+        "SELECT id FROM vehicle WHERE vin = ? AND id > ?",
+    )
+
+
+def test_trailing_semicolon_and_whitespace_are_stripped():
+    assert translate("  SELECT 1;  ") == ("SELECT 1",)
+
+
+def test_insert_ignore():
+    assert translate("INSERT IGNORE INTO role (code) VALUES (%s)") == (
+        "INSERT OR IGNORE INTO role (code) VALUES (?)",
+    )
+
+
+def test_on_duplicate_key_update_with_values_refs():
+    (sql,) = translate(
+        "INSERT INTO rental_pricing (vehicle_id, daily_price) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE daily_price = VALUES(daily_price), updated_at = NOW()"
+    )
+    assert sql == (
+        "INSERT INTO rental_pricing (vehicle_id, daily_price) VALUES (?, ?) "
+        "ON CONFLICT DO UPDATE SET daily_price = excluded.daily_price, updated_at = NOW()"
+    )
+
+
+def test_on_duplicate_key_update_keeps_insert_values_list():
+    (sql,) = translate(
+        "INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = b + 1"
+    )
+    assert sql == "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET b = b + 1"
+
+
+def test_create_table_options_keys_and_enums():
+    statements = translate(
+        """
+        CREATE TABLE IF NOT EXISTS `job_run` (
+          id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+          job_name VARCHAR(64) NOT NULL COMMENT 'job',
+          status ENUM('running','ok','failed') NOT NULL DEFAULT 'running',
+          updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+          PRIMARY KEY (id),
+          UNIQUE KEY uq_job (job_name, updated_at),
+          KEY idx_status (status)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """
+    )
+    create, index = statements
+    assert create.startswith("CREATE TABLE IF NOT EXISTS job_run (")
+    assert "id INTEGER PRIMARY KEY AUTOINCREMENT" in create
+    assert "status TEXT NOT NULL DEFAULT 'running'" in create
+    assert "UNIQUE (job_name, updated_at)" in create
+    for noise in ("UNSIGNED", "COMMENT", "ON UPDATE", "ENGINE", "ENUM", "PRIMARY KEY (id)"):
+        assert noise not in create
+    assert index == "CREATE INDEX IF NOT EXISTS job_run__idx_status ON job_run (status)"
+    _assert_runs(statements)
+
+
+def test_create_table_composite_primary_key():
+    (create,) = translate(
+        "CREATE TABLE role_permission (role_id INT NOT NULL, perm VARCHAR(32) NOT NULL, "
+        "PRIMARY KEY (role_id, perm))"
+    )
+    assert "PRIMARY KEY (role_id, perm)" in create
+    _assert_runs((create,))
+
+
+def test_create_or_replace_view():
+    assert translate("CREATE OR REPLACE VIEW v_x AS SELECT 1 AS one") == (
+        "DROP VIEW IF EXISTS v_x",
+        "CREATE VIEW v_x AS SELECT 1 AS one",
+    )
+
+
+def test_alter_add_index():
+    assert translate("ALTER TABLE vehicle ADD INDEX idx_vin (vin)") == (
+        "CREATE INDEX IF NOT EXISTS vehicle__idx_vin ON vehicle (vin)",
+    )
+    assert translate("ALTER TABLE vehicle ADD UNIQUE KEY uq_vin (vin)") == (
+        "CREATE UNIQUE INDEX IF NOT EXISTS vehicle__uq_vin ON vehicle (vin)",
+    )
+
+
+def test_alter_add_constraint_is_dropped():
+    assert translate("ALTER TABLE vehicle ADD CONSTRAINT fk_b FOREIGN KEY (brand_id) REFERENCES md_brand(id)") == ()
+    assert translate("ALTER TABLE vehicle ADD FOREIGN KEY (brand_id) REFERENCES md_brand(id)") == ()
+
+
+def test_information_schema_goes_to_temp_views():
+    (sql,) = translate(
+        "SELECT table_name FROM information_schema.tables t "
+        "JOIN information_schema.COLUMNS c ON c.table_name = t.table_name "
+        "WHERE t.table_schema = DATABASE()"
+    )
+    assert "information_schema" not in sql
+    assert "FROM temp.is_tables t" in sql
+    assert "JOIN temp.is_COLUMNS c" in sql
+
+
+def test_statements_without_mysql_syntax_pass_through():
+    sql = "UPDATE vehicle SET status = ? WHERE id = ?"
+    assert translate(sql) == (sql,)
+
+
+def _assert_runs(statements):
+    conn = sqlite3.connect(":memory:")
+    try:
+        for statement in statements:
+            conn.execute(statement)
+    finally:
+        conn.close()